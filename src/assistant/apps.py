@@ -0,0 +1,360 @@
+"""Catalog of launchable applications for "open <app>".
+
+Scans XDG desktop entries (``*.desktop``) for graphical applications and
+executables on PATH, and caches the result per directory in a JSON file.
+Only desktop entries are offered by default: a bare PATH executable is
+added only when its name is on the catalog's allowlist, and ``sbin``
+directories and terminal programs are never included, so a misheard
+"open reboot" can't power the machine off. A refresh only rescans
+directories whose mtime changed; installing or removing a program
+renames files in its directory, which bumps the mtime. Run from ``src``
+to time a cold scan, a warm load and fuzzy lookups::
+
+    python -m assistant.apps
+    python -m assistant.apps --synthetic 5000
+"""
+import json
+import os
+import shlex
+import sys
+import time
+
+CACHE_VERSION = 2
+
+# Desktop entry Exec field codes that expand to files, URLs or icons
+_FIELD_CODES = {"%f", "%F", "%u", "%U", "%i", "%c", "%k", "%d", "%D", "%n", "%N", "%v", "%m"}
+
+
+def _is_sbin(directory):
+    return os.path.basename(os.path.normpath(directory)) == "sbin"
+
+
+def path_dirs():
+    """Directories on PATH, in lookup order, without duplicates or sbin"""
+    seen = []
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if directory and directory not in seen and not _is_sbin(directory):
+            seen.append(directory)
+    return seen
+
+
+def desktop_dirs():
+    """XDG ``applications`` directories, the user's own first"""
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join("~", ".local", "share")
+    data_dirs = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+    roots = [data_home] + data_dirs.split(":")
+    if sys.platform == "linux":
+        roots += ["/var/lib/flatpak/exports/share", os.path.join("~", ".local", "share", "flatpak",
+                                                                "exports", "share")]
+    dirs = []
+    for root in roots:
+        directory = os.path.join(os.path.expanduser(root), "applications")
+        if directory not in dirs:
+            dirs.append(directory)
+    return dirs
+
+
+def _executable_suffixes():
+    if os.name == "nt":
+        return tuple(ext.lower() for ext in os.environ.get("PATHEXT", ".EXE;.BAT;.CMD").split(";") if ext)
+    return None
+
+
+def scan_path_dir(directory):
+    """Return [[name, argv]] for the executables directly in directory"""
+    suffixes = _executable_suffixes()
+    apps = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name = entry.name.lower()
+            if name.startswith("."):
+                continue
+            if suffixes is not None:
+                stem, ext = os.path.splitext(name)
+                if ext not in suffixes:
+                    continue
+                name = stem
+            try:
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if suffixes is None and not os.access(entry.path, os.X_OK):
+                continue
+            if any(c.isalnum() for c in name):
+                apps.append([name, [entry.path]])
+    return apps
+
+
+def parse_exec(value):
+    """Split a desktop entry Exec line into argv, dropping field codes"""
+    try:
+        parts = shlex.split(value)
+    except ValueError:
+        return None
+    argv = [part.replace("%%", "%") for part in parts if part not in _FIELD_CODES]
+    return argv or None
+
+
+def parse_desktop_entry(path):
+    """Return [name, argv] for a launchable graphical desktop entry, or None"""
+    fields = {}
+    in_entry = False
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                # Only the main group; actions come in later groups
+                if in_entry:
+                    break
+                in_entry = line == "[Desktop Entry]"
+                continue
+            if in_entry and "=" in line:
+                key, _, value = line.partition("=")
+                fields.setdefault(key.strip(), value.strip())
+    if fields.get("Type", "Application") != "Application":
+        return None
+    if fields.get("NoDisplay") == "true" or fields.get("Hidden") == "true":
+        return None
+    # Terminal programs would run headless when launched by voice
+    if fields.get("Terminal") == "true":
+        return None
+    name = fields.get("Name", "").lower()
+    argv = parse_exec(fields.get("Exec", ""))
+    if not name or argv is None:
+        return None
+    return [name, argv]
+
+
+def scan_desktop_dir(directory):
+    """Return ([[name, argv]], subdirectories) for the entries directly in directory"""
+    apps, subdirs = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    subdirs.append(entry.path)
+                    continue
+            except OSError:
+                continue
+            if not entry.name.endswith(".desktop"):
+                continue
+            try:
+                parsed = parse_desktop_entry(entry.path)
+            except OSError:
+                continue
+            if parsed is not None:
+                apps.append(parsed)
+    return apps, sorted(subdirs)
+
+
+class AppCatalog:
+    """Installed applications by spoken name, cached on disk per directory.
+
+    ``apps`` maps a lower-case name to the argv that launches it. Desktop
+    entries (by their display name) take precedence over PATH executables,
+    and earlier directories over later ones, as a shell would resolve them.
+    PATH executables are only included when named in ``path_allowlist``;
+    ``path_apps`` holds the names that came from PATH.
+    """
+
+    def __init__(self, cache_path=None, path_directories=None, desktop_directories=None,
+                 path_allowlist=()):
+        self.cache_path = os.path.expanduser(cache_path) if cache_path else None
+        self.path_directories = [d for d in (path_dirs() if path_directories is None else path_directories)
+                                 if not _is_sbin(d)]
+        self.desktop_directories = desktop_dirs() if desktop_directories is None else list(desktop_directories)
+        self.path_allowlist = {name.lower() for name in path_allowlist}
+        self.apps = {}
+        self.path_apps = set()
+        # directory -> {"mtime", "kind", "apps", "subdirs"}
+        self._dirs = {}
+        self._changed = False
+        self.last_refresh = {}
+
+    def load(self):
+        """Read the cache; returns False if it is missing or unreadable"""
+        if not self.cache_path:
+            return False
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != CACHE_VERSION:
+            return False
+        self._dirs = data.get("dirs", {})
+        return True
+
+    def save(self):
+        """Write the cache if the last refresh changed anything"""
+        if not self.cache_path or not self._changed:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "dirs": self._dirs}, f)
+        os.replace(tmp_path, self.cache_path)
+        self._changed = False
+
+    def _visit(self, directory, kind, dirs, counts):
+        """Reuse the cached record for directory if its mtime is unchanged, else rescan it"""
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            return None
+        counts["checked"] += 1
+        record = self._dirs.get(directory)
+        if record is None or record["mtime"] != mtime or record["kind"] != kind:
+            try:
+                if kind == "path":
+                    apps, subdirs = scan_path_dir(directory), []
+                else:
+                    apps, subdirs = scan_desktop_dir(directory)
+            except OSError:
+                return None
+            record = {"mtime": mtime, "kind": kind, "apps": apps, "subdirs": subdirs}
+            counts["rescanned"] += 1
+        dirs[directory] = record
+        return record
+
+    def refresh(self):
+        """Bring the catalog up to date, rescanning only changed directories"""
+        started = time.perf_counter()
+        dirs = {}
+        counts = {"checked": 0, "rescanned": 0}
+        path_apps, desktop_apps = {}, {}
+        # Without an allowlist there is nothing to take from PATH
+        for directory in self.path_directories if self.path_allowlist else ():
+            record = self._visit(directory, "path", dirs, counts)
+            for name, argv in record["apps"] if record else ():
+                if name in self.path_allowlist:
+                    path_apps.setdefault(name, argv)
+        pending = list(self.desktop_directories)
+        while pending:
+            directory = pending.pop(0)
+            if directory in dirs:
+                continue
+            record = self._visit(directory, "desktop", dirs, counts)
+            if record is None:
+                continue
+            for name, argv in record["apps"]:
+                desktop_apps.setdefault(name, argv)
+            pending[:0] = record["subdirs"]
+
+        if counts["rescanned"] or dirs.keys() != self._dirs.keys():
+            self._changed = True
+        self._dirs = dirs
+        self.path_apps = set(path_apps) - set(desktop_apps)
+        path_apps.update(desktop_apps)
+        self.apps = path_apps
+        self.last_refresh = dict(counts, apps=len(self.apps),
+                                 ms=round((time.perf_counter() - started) * 1000, 2))
+        return self.apps
+
+
+def _make_synthetic_tree(root, count):
+    """Create count fake executables and desktop entries across a few directories;
+    returns (bin dirs, application dirs, executable names)"""
+    import random
+
+    rng = random.Random(0)
+    syllables = ["ka", "lo", "mi", "ren", "tor", "vel", "sa", "dun", "pri", "qua",
+                 "zen", "bro", "fi", "gal", "nex", "ul", "tra", "hom", "pex", "dri"]
+    bin_dirs = [os.path.join(root, f"bin{i}") for i in range(8)]
+    app_dir = os.path.join(root, "share", "applications")
+    for directory in bin_dirs + [app_dir]:
+        os.makedirs(directory, exist_ok=True)
+    names = set()
+    while len(names) < count:
+        names.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    executables = []
+    for index, name in enumerate(sorted(names)):
+        if index % 4 == 0:
+            with open(os.path.join(app_dir, f"{name}.desktop"), "w") as f:
+                f.write(f"[Desktop Entry]\nType=Application\nName={name.title()} Studio\n"
+                        f"Exec={name} %U\n")
+        else:
+            path = os.path.join(bin_dirs[index % len(bin_dirs)], name)
+            with open(path, "w") as f:
+                f.write("#!/bin/sh\n")
+            os.chmod(path, 0o755)
+            executables.append(name)
+    return bin_dirs, [app_dir], executables
+
+
+def _benchmark(args):
+    import tempfile
+
+    from assistant.fuzzy import FuzzyMatcher
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.synthetic:
+            # Allow every generated executable, to time scanning PATH at this size
+            path_directories, desktop_directories, allowlist = _make_synthetic_tree(scratch, args.synthetic)
+        else:
+            path_directories, desktop_directories, allowlist = None, None, ()
+        cache_path = os.path.join(scratch, "apps.json")
+
+        cold = AppCatalog(cache_path, path_directories, desktop_directories, allowlist)
+        started = time.perf_counter()
+        cold.refresh()
+        cold.save()
+        cold_ms = (time.perf_counter() - started) * 1000
+
+        warm = AppCatalog(cache_path, path_directories, desktop_directories, allowlist)
+        started = time.perf_counter()
+        warm.load()
+        warm.refresh()
+        warm_ms = (time.perf_counter() - started) * 1000
+
+        changed_ms = None
+        if args.synthetic:
+            # One new program in one directory
+            new_path = os.path.join(path_directories[0], "zzznewtool")
+            warm.path_allowlist.add("zzznewtool")
+            with open(new_path, "w") as f:
+                f.write("#!/bin/sh\n")
+            os.chmod(new_path, 0o755)
+            os.utime(path_directories[0], (time.time() + 5, time.time() + 5))
+            started = time.perf_counter()
+            warm.refresh()
+            changed_ms = (time.perf_counter() - started) * 1000
+
+        matcher = FuzzyMatcher()
+        started = time.perf_counter()
+        for name, argv in warm.apps.items():
+            matcher.add(name, argv)
+        matcher.build()
+        index_ms = (time.perf_counter() - started) * 1000
+
+        names = list(warm.apps)[:500]
+        timings = []
+        hits = 0
+        for name in names:
+            heard = f"open {name[:len(name) // 2]} {name[len(name) // 2:]}"
+            started = time.perf_counter()
+            match = matcher.match(heard)
+            timings.append(time.perf_counter() - started)
+            hits += match is not None and match.phrase == name
+        timings.sort()
+
+    print(f"apps:            {len(warm.apps)} from {warm.last_refresh['checked']} directories")
+    print(f"cold scan:       {cold_ms:.1f} ms (rescanned {cold.last_refresh['rescanned']})")
+    print(f"warm load:       {warm_ms:.1f} ms")
+    if changed_ms is not None:
+        print(f"one dir changed: {changed_ms:.1f} ms (rescanned {warm.last_refresh['rescanned']})")
+    print(f"fuzzy index:     {index_ms:.1f} ms")
+    if timings:
+        print(f"fuzzy lookup:    p50 {timings[len(timings) // 2] * 1e6:.0f} us, "
+              f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f} us, "
+              f"split names found {hits}/{len(names)}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time the application catalog")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="scan this many generated apps instead of the real PATH")
+    _benchmark(parser.parse_args())
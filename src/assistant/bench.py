@@ -0,0 +1,343 @@
+"""End-to-end latency benchmark for the voice pipeline.
+
+Feeds WAV fixtures through the same path as ``VoiceAssistant.listen()``:
+the microphone stream's capture thread and segmenter, recognition of
+the live audio while it is being spoken, command dispatch on the worker
+pool and the speech queue. Fixtures are played into the stream at
+``--speed`` times real time, and the endpoint is measured from the last
+voiced frame to the stream's end-of-utterance event. The recognizer and
+TTS engine are the fake stand-ins from ``assistant.core``, so it runs
+headless and offline.
+
+Fixtures are 16-bit mono WAV files; ``name.txt`` next to ``name.wav``
+holds the transcript the fake recognizer returns. Run from ``src``::
+
+    python -m assistant.bench --fixtures path/to/wavs --out results.json
+    python -m assistant.bench --baseline results.json --tolerance 0.2
+
+Without ``--fixtures`` a small synthetic set is generated. The exit code
+is 1 when any stage's p95 regressed past the tolerance.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from assistant.capture import MicrophoneStream
+from assistant.core import VoiceAssistant
+
+# Harmless commands: no browser, subprocess or screenshot side effects
+SYNTHETIC_COMMANDS = (
+    "hello",
+    "what time is it",
+    "what is the date today",
+    "what can you do",
+    "tell me a joke",
+    "who made you",
+)
+
+STAGES = ("endpoint", "recognize", "dispatch_wait", "handler", "speech_wait",
+          "time_to_first_word", "total")
+
+
+def synthesize_fixtures(directory, commands=SYNTHETIC_COMMANDS, sample_rate=16000, seed=0):
+    """Write speech-like noise bursts with transcripts for each command"""
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    for index, command in enumerate(commands):
+        lead = rng.normal(0, 40, int(sample_rate * 0.4))
+        words = []
+        for _ in command.split():
+            burst = rng.normal(0, 4000, int(sample_rate * rng.uniform(0.15, 0.3)))
+            gap = rng.normal(0, 40, int(sample_rate * 0.05))
+            words.extend((burst, gap))
+        tail = rng.normal(0, 40, int(sample_rate * 0.8))
+        samples = np.clip(np.concatenate([lead] + words + [tail]), -32768, 32767).astype(np.int16)
+
+        name = os.path.join(directory, f"{index:02d}")
+        with wave.open(name + ".wav", "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(sample_rate)
+            f.writeframes(samples.tobytes())
+        with open(name + ".txt", "w", encoding="utf-8") as f:
+            f.write(command)
+    return directory
+
+
+def load_fixtures(directory):
+    """Return (name, sample_rate, pcm bytes, transcript) for each WAV"""
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        with wave.open(path, "rb") as f:
+            if f.getnchannels() != 1 or f.getsampwidth() != 2:
+                print(f"Skipping {path}: fixtures must be 16-bit mono")
+                continue
+            rate = f.getframerate()
+            pcm = f.readframes(f.getnframes())
+        transcript_path = os.path.splitext(path)[0] + ".txt"
+        transcript = ""
+        if os.path.exists(transcript_path):
+            with open(transcript_path, encoding="utf-8") as f:
+                transcript = f.read().strip()
+        fixtures.append((os.path.basename(path), rate, pcm, transcript))
+    return fixtures
+
+
+def percentiles(values):
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(pick(0.50), 3),
+        "p95": round(pick(0.95), 3),
+        "p99": round(pick(0.99), 3),
+    }
+
+
+class PipelineBenchmark:
+    """Drives fixtures through a headless VoiceAssistant and collects timings"""
+
+    def __init__(self, recognizer_delay=0.0, speech_seconds_per_char=0.0,
+                 render_seconds_per_char=0.0, speech_pipeline=True, speed=1.0):
+        self.assistant = VoiceAssistant({
+            "recognizer": "fake",
+            "recognizer_options": {"delay": recognizer_delay},
+            "tts_engine": "fake",
+            "phrase_cache_enabled": False,
+            "command_queue_size": 1024,
+            "app_catalog_enabled": False,
+            "file_index_enabled": False,
+            "conversation_log_enabled": False,
+            "speech_pipeline": speech_pipeline,
+        })
+        self.speech_seconds_per_char = speech_seconds_per_char
+        self.render_seconds_per_char = render_seconds_per_char
+        self.speed = speed
+        self._speech_waits = []
+        self.assistant.set_gui_callback(self._on_speech_started)
+        self.engine = self._wait_for_engine()
+
+    def _wait_for_engine(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while self.assistant.engine is None:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Speech engine did not start")
+            time.sleep(0.005)
+        self.assistant.engine.seconds_per_char = self.speech_seconds_per_char
+        self.assistant.engine.render_seconds_per_char = self.render_seconds_per_char
+        return self.assistant.engine
+
+    def _on_speech_started(self, text):
+        item = self.assistant.current_speech
+        if item is not None:
+            self._speech_waits.append((item.started_at - item.enqueued_at) * 1000)
+
+    def _frames(self, segmenter, pcm, speed, marks):
+        """Yield the fixture frame by frame at speed x real time, noting the last voiced one"""
+        frame_bytes = segmenter.frame_samples * 2
+        interval = segmenter.frame_ms / 1000 / speed
+        next_at = time.perf_counter()
+        for index in range(0, len(pcm) - frame_bytes + 1, frame_bytes):
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            next_at += interval
+            frame = pcm[index:index + frame_bytes]
+            # Stamped before the frame reaches the segmenter, like a device read
+            if segmenter.frame_energy(frame) > segmenter.threshold:
+                marks["last_voiced"] = time.perf_counter()
+            yield frame
+
+    def _wait_for_speech(self, count, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while len(self.engine.spoken) < count:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.0005)
+        return True
+
+    def run_one(self, fixture):
+        name, rate, pcm, transcript = fixture
+        backend = self.assistant._get_recognizer_backend()
+        backend.transcripts = [transcript]
+        backend._index = 0
+
+        marks = {}
+        stream = MicrophoneStream(sample_rate=rate, level_meter=self.assistant.level_meter,
+                                  stream_audio=True)
+        stream.frames = self._frames(stream.segmenter, pcm, self.speed, marks)
+        self.assistant.mic_stream = stream
+        self.assistant.last_recognition = None
+        try:
+            return self._measure(name, stream, marks, len(pcm) / (2 * rate) / self.speed + 1)
+        finally:
+            # The fixture's trailing silence keeps playing while the reply is produced
+            self.assistant.stop_capture()
+
+    def _measure(self, name, stream, marks, timeout):
+        text = self.assistant.listen(timeout=timeout)
+        emitted_at = stream.last_segment_at
+        if self.assistant.last_recognition is None or emitted_at is None or "last_voiced" not in marks:
+            return {"fixture": name, "error": "no utterance detected"}
+        endpoint_ms = (emitted_at - marks["last_voiced"]) * 1000
+        recognize_ms = self.assistant.last_recognition.latency * 1000
+
+        spoken_before = len(self.engine.spoken)
+        waits_before = len(self._speech_waits)
+        dispatched_at = time.perf_counter()
+        job = self.assistant.dispatch_command(text)
+        if job is None or not job.wait(10) or not self._wait_for_speech(spoken_before + 1):
+            return {"fixture": name, "error": "no reply"}
+        first_word_at = self.engine.spoken[spoken_before][0]
+
+        return {
+            "fixture": name,
+            "text": text,
+            "endpoint": endpoint_ms,
+            "recognize": recognize_ms,
+            "dispatch_wait": job.queue_wait * 1000,
+            "handler": job.run_time * 1000,
+            "speech_wait": self._speech_waits[waits_before] if len(self._speech_waits) > waits_before else None,
+            "time_to_first_word": (first_word_at - dispatched_at) * 1000,
+            "total": endpoint_ms + (first_word_at - emitted_at) * 1000,
+        }
+
+    def throughput(self, texts, rounds=5):
+        """Dispatch recognized commands back to back; returns commands per second"""
+        commands = [t for t in texts if t] * rounds
+        if not commands:
+            return 0.0
+        started = time.perf_counter()
+        jobs = [self.assistant.dispatch_command(text) for text in commands]
+        for job in jobs:
+            if job is not None:
+                job.wait(10)
+        while not self.assistant.speech_queue.empty() or self.assistant.current_speech is not None:
+            time.sleep(0.0005)
+        return len(commands) / (time.perf_counter() - started)
+
+    def run(self, fixtures, repeat=3):
+        samples = []
+        for _ in range(repeat):
+            for fixture in fixtures:
+                samples.append(self.run_one(fixture))
+        errors = [s for s in samples if "error" in s]
+        good = [s for s in samples if "error" not in s]
+        stages = {stage: percentiles([s[stage] for s in good if s.get(stage) is not None])
+                  for stage in STAGES}
+        speech = self.assistant.speech_stats()
+        return {
+            "fixtures": len(fixtures),
+            "repeat": repeat,
+            "errors": errors,
+            "stages_ms": stages,
+            "speech_ms": {key: round(speech[key] * 1000, 3)
+                          for key in ("avg_first_audio", "max_first_audio", "avg_speaking")},
+            "throughput_cps": round(self.throughput([s["text"] for s in good[:len(fixtures)]]), 1),
+            "samples": samples,
+        }
+
+    def close(self):
+        self.assistant.shutdown()
+
+
+def compare(results, baseline, tolerance):
+    """Return stages whose p95 grew more than tolerance over the baseline"""
+    regressions = {}
+    for stage, stats in results["stages_ms"].items():
+        before = baseline.get("stages_ms", {}).get(stage, {}).get("p95")
+        after = stats.get("p95")
+        # Ignore sub-millisecond stages; their p95 is mostly scheduler noise
+        if before is None or after is None or max(before, after) < 1.0:
+            continue
+        if after > before * (1 + tolerance):
+            regressions[stage] = {"baseline_p95": before, "p95": after}
+    before = baseline.get("throughput_cps")
+    if before and results["throughput_cps"] < before * (1 - tolerance):
+        regressions["throughput_cps"] = {"baseline": before, "value": results["throughput_cps"]}
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ZILNOVA end-to-end latency benchmark")
+    parser.add_argument("--fixtures", help="directory of 16-bit mono WAV files with .txt transcripts")
+    parser.add_argument("--synthesize", metavar="DIR", help="write synthetic fixtures to DIR and exit")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--recognizer-delay", type=float, default=0.0,
+                        help="seconds the fake recognizer sleeps per utterance")
+    parser.add_argument("--speech-rate", type=float, default=0.0,
+                        help="seconds the fake TTS engine spends per character")
+    parser.add_argument("--render-rate", type=float, default=0.0,
+                        help="seconds the fake TTS engine spends synthesizing per character")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="play fixtures into the microphone stream this many times faster than real time")
+    parser.add_argument("--no-speech-pipeline", action="store_true",
+                        help="synthesize long replies in one piece instead of sentence by sentence")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative p95 growth before failing")
+    parser.add_argument("--verbose", action="store_true", help="show the assistant's own output")
+    args = parser.parse_args(argv)
+
+    if args.synthesize:
+        synthesize_fixtures(args.synthesize)
+        print(f"Wrote {len(SYNTHETIC_COMMANDS)} fixtures to {args.synthesize}")
+        return 0
+
+    directory = args.fixtures or synthesize_fixtures(tempfile.mkdtemp(prefix="zilnova-bench-"))
+    fixtures = load_fixtures(directory)
+    if not fixtures:
+        print(f"No fixtures found in {directory}")
+        return 2
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        bench = PipelineBenchmark(args.recognizer_delay, args.speech_rate, args.render_rate,
+                                  not args.no_speech_pipeline, args.speed)
+        try:
+            results = bench.run(fixtures, args.repeat)
+        finally:
+            bench.close()
+
+    print(f"{'stage':<20} {'p50':>9} {'p95':>9} {'p99':>9}  (ms)")
+    for stage, stats in results["stages_ms"].items():
+        if stats.get("count"):
+            print(f"{stage:<20} {stats['p50']:>9.3f} {stats['p95']:>9.3f} {stats['p99']:>9.3f}")
+    speech = results["speech_ms"]
+    print(f"speech: first audio avg {speech['avg_first_audio']:.1f} ms, max {speech['max_first_audio']:.1f} ms; "
+          f"speaking avg {speech['avg_speaking']:.1f} ms")
+    print(f"throughput: {results['throughput_cps']} commands/s, errors: {len(results['errors'])}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions: {json.dumps(regressions)}")
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
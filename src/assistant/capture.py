@@ -0,0 +1,330 @@
+import collections
+import math
+import time
+from queue import Queue, Empty, Full
+from threading import Thread, Event
+
+import numpy as np
+
+from assistant.startup import profiler
+
+
+class EnergySegmenter:
+    """Split a stream of PCM frames into utterances using frame energy.
+
+    The noise floor is tracked incrementally from frames classified as
+    non-speech, so there is no separate calibration step. An utterance
+    ends once energy stays below the threshold for ``hangover_ms``.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, hangover_ms=300,
+                 preroll_ms=300, min_speech_ms=150, max_segment_s=10.0,
+                 threshold_ratio=3.0, min_threshold=150.0, noise_alpha=0.05):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.hangover_frames = max(1, math.ceil(hangover_ms / frame_ms))
+        self.min_speech_frames = max(1, math.ceil(min_speech_ms / frame_ms))
+        self.max_segment_frames = int(max_segment_s * 1000 / frame_ms)
+        self.threshold_ratio = threshold_ratio
+        self.min_threshold = min_threshold
+        self.noise_alpha = noise_alpha
+
+        self.noise_floor = None
+        self._preroll = collections.deque(maxlen=max(1, math.ceil(preroll_ms / frame_ms)))
+        self._frames = []
+        self._voiced = 0
+        self._silent = 0
+        self._in_speech = False
+
+    @property
+    def in_speech(self):
+        return self._in_speech
+
+    @property
+    def utterance_frames(self):
+        """Frames of the utterance in progress, preroll included"""
+        return self._frames
+
+    @property
+    def threshold(self):
+        if self.noise_floor is None:
+            return self.min_threshold
+        return max(self.min_threshold, self.noise_floor * self.threshold_ratio)
+
+    @staticmethod
+    def frame_energy(frame):
+        """Return the RMS energy of a block of 16-bit PCM bytes"""
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+        if samples.size == 0:
+            return 0.0
+        return float(np.sqrt(np.mean(samples * samples)))
+
+    def reset(self):
+        """Drop any partial utterance but keep the learned noise floor"""
+        self._preroll.clear()
+        self._frames = []
+        self._voiced = 0
+        self._silent = 0
+        self._in_speech = False
+
+    def feed(self, frame):
+        """Consume one frame; returns the utterance bytes when one completes"""
+        energy = self.frame_energy(frame)
+        is_speech = energy > self.threshold
+
+        if not is_speech:
+            # Only non-speech frames contribute to the noise estimate
+            if self.noise_floor is None:
+                self.noise_floor = energy
+            else:
+                self.noise_floor += self.noise_alpha * (energy - self.noise_floor)
+
+        if not self._in_speech:
+            self._preroll.append(frame)
+            if is_speech:
+                self._voiced += 1
+                if self._voiced >= self.min_speech_frames:
+                    self._in_speech = True
+                    self._frames = list(self._preroll)
+                    self._preroll.clear()
+                    self._silent = 0
+            else:
+                self._voiced = 0
+            return None
+
+        self._frames.append(frame)
+        if is_speech:
+            self._silent = 0
+        else:
+            self._silent += 1
+
+        if self._silent >= self.hangover_frames or len(self._frames) >= self.max_segment_frames:
+            segment = b"".join(self._frames)
+            self.reset()
+            return segment
+        return None
+
+
+class LevelMeter:
+    """Fixed-size NumPy ring buffer of per-block RMS and peak levels.
+
+    The audio thread is the only writer; readers take a snapshot of the
+    write counter and copy out just the level values they need, never the
+    raw audio. Levels are stored normalized to 0..1 on a dB scale.
+    """
+
+    def __init__(self, sample_rate=16000, block_ms=10, seconds=5.0, floor_db=-60.0):
+        self.block_samples = max(1, int(sample_rate * block_ms / 1000))
+        self.block_ms = block_ms
+        self.size = max(1, int(seconds * 1000 / block_ms))
+        self.floor_db = floor_db
+        self.rms = np.zeros(self.size, dtype=np.float32)
+        self.peak = np.zeros(self.size, dtype=np.float32)
+        self._written = 0
+        self.last_write = None
+
+    def _normalize(self, values):
+        db = 20 * np.log10(np.maximum(values, 1.0) / 32768.0)
+        return np.clip(1.0 - db / self.floor_db, 0.0, 1.0)
+
+    def push(self, frame):
+        """Add the levels of one block of 16-bit PCM bytes"""
+        samples = np.frombuffer(frame, dtype=np.int16)
+        blocks = samples.size // self.block_samples
+        if blocks == 0:
+            return
+        data = samples[:blocks * self.block_samples].reshape(blocks, self.block_samples).astype(np.float32)
+        rms = self._normalize(np.sqrt(np.mean(data * data, axis=1)))
+        peak = self._normalize(np.max(np.abs(data), axis=1))
+
+        start = self._written % self.size
+        end = start + blocks
+        if end <= self.size:
+            self.rms[start:end] = rms
+            self.peak[start:end] = peak
+        else:
+            split = self.size - start
+            self.rms[start:] = rms[:split]
+            self.rms[:end - self.size] = rms[split:]
+            self.peak[start:] = peak[:split]
+            self.peak[:end - self.size] = peak[split:]
+        # Publish only after the values are in place
+        self._written += blocks
+        self.last_write = time.monotonic()
+
+    def is_active(self, stale_after=0.5):
+        return self.last_write is not None and time.monotonic() - self.last_write < stale_after
+
+    def is_voiced(self, seconds=1.0, threshold=0.5):
+        """Whether any peak in the last ``seconds`` reached threshold (0.5 is -30 dBFS)"""
+        if not self.is_active():
+            return False
+        levels = self.latest(max(1, int(seconds * 1000 / self.block_ms)), "peak")
+        return levels.size > 0 and float(levels.max()) >= threshold
+
+    def latest(self, count, kind="rms"):
+        """Copy of the most recent count levels, oldest first"""
+        source = self.rms if kind == "rms" else self.peak
+        written = self._written
+        count = min(count, self.size, written)
+        if count <= 0:
+            return np.zeros(0, dtype=np.float32)
+        end = written % self.size
+        start = end - count
+        if start >= 0:
+            return source[start:end].copy()
+        return np.concatenate((source[start:], source[:end]))
+
+    def decimate(self, points, seconds=1.0, kind="peak"):
+        """Reduce the last ``seconds`` of levels to ``points`` values by max-pooling"""
+        if not self.is_active():
+            return np.zeros(points, dtype=np.float32)
+        blocks = max(points, int(seconds * 1000 / self.block_ms))
+        levels = self.latest(blocks, kind)
+        if levels.size < blocks:
+            levels = np.concatenate((np.zeros(blocks - levels.size, dtype=np.float32), levels))
+        usable = blocks - blocks % points
+        return levels[-usable:].reshape(points, -1).max(axis=1)
+
+
+class MicrophoneStream:
+    """Long-lived microphone capture feeding an EnergySegmenter.
+
+    The device is opened once and read on a background thread; finished
+    utterances are delivered as ``sr.AudioData`` through ``get_segment``.
+    With ``stream_audio`` they are instead published while they are being
+    spoken, as ("start", None), ("audio", bytes) and ("end", bytes) events
+    on ``live``, so recognition can run alongside capture. If the consumer
+    falls ``max_live_seconds`` behind, audio chunks are dropped but the
+    start and end markers never are, so utterances stay separate.
+    ``frames`` is an iterable of 16-bit PCM frames the capture thread reads
+    instead of the device, for benchmarks; it sets its own pace.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, hangover_ms=300,
+                 buffer_seconds=5.0, max_pending=8, device_index=None, level_meter=None,
+                 stream_audio=False, max_live_seconds=30.0, frames=None, **segmenter_options):
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.device_index = device_index
+        self.frames = frames
+        self.segmenter = EnergySegmenter(sample_rate=sample_rate, frame_ms=frame_ms,
+                                         hangover_ms=hangover_ms, **segmenter_options)
+        # Recent raw frames, kept for consumers that want to look back
+        self.ring_buffer = collections.deque(
+            maxlen=max(1, int(buffer_seconds * 1000 / frame_ms)))
+        self.level_meter = level_meter
+        self.segments = Queue(maxsize=max_pending)
+        self.dropped_segments = 0
+        self.last_segment_at = None
+        self.stream_audio = stream_audio
+        self.live = Queue()
+        self.max_live = max(1, int(max_live_seconds * 1000 / frame_ms))
+        self.dropped_live = 0
+        self._live_frames = 0
+        self._live_bytes = 0
+
+        self._stop = Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Open the device and start the capture thread"""
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop capturing and release the device"""
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1)
+        self._thread = None
+        self.segmenter.reset()
+        # Events of an unfinished utterance would otherwise reach the next listen()
+        while True:
+            try:
+                self.live.get_nowait()
+            except Empty:
+                break
+        self._live_frames = 0
+        self._live_bytes = 0
+
+    def _capture_loop(self):
+        if self.frames is not None:
+            for frame in self.frames:
+                if self._stop.is_set():
+                    break
+                self.process_frame(frame)
+            return
+
+        import speech_recognition as sr
+
+        try:
+            with sr.Microphone(device_index=self.device_index, sample_rate=self.sample_rate,
+                               chunk_size=self.segmenter.frame_samples) as source:
+                self.sample_width = source.SAMPLE_WIDTH
+                frame = source.stream.read(source.CHUNK)
+                profiler.mark("time_to_first_listen")
+                while not self._stop.is_set():
+                    self.process_frame(frame)
+                    frame = source.stream.read(source.CHUNK)
+        except Exception as e:
+            print(f"Error in microphone stream: {str(e)}")
+
+    def process_frame(self, frame):
+        """Push one captured frame through the ring buffer and segmenter"""
+        self.ring_buffer.append(frame)
+        if self.level_meter is not None:
+            self.level_meter.push(frame)
+        segment = self.segmenter.feed(frame)
+        if self.stream_audio:
+            self._publish(segment)
+            if segment is not None:
+                self.last_segment_at = time.perf_counter()
+            return
+        if segment is not None:
+            self.last_segment_at = time.perf_counter()
+            try:
+                self.segments.put_nowait(segment)
+            except Full:
+                self.dropped_segments += 1
+
+    def _publish(self, segment):
+        """Queue the frames of the current utterance not yet sent to ``live``"""
+        if segment is None and not self.segmenter.in_speech:
+            return
+        if self._live_frames == 0 and self._live_bytes == 0:
+            self._put_live("start", None)
+        if segment is None:
+            frames = self.segmenter.utterance_frames[self._live_frames:]
+            data = b"".join(frames)
+            self._live_frames += len(frames)
+            self._live_bytes += len(data)
+            self._put_live("audio", data)
+        else:
+            self._put_live("end", segment[self._live_bytes:])
+            self._live_frames = 0
+            self._live_bytes = 0
+
+    def _put_live(self, kind, data):
+        if kind == "audio" and self.live.qsize() >= self.max_live:
+            self.dropped_live += 1
+            return
+        self.live.put_nowait((kind, data))
+
+    def get_segment(self, timeout=None):
+        """Return the next utterance as sr.AudioData, or None on timeout"""
+        import speech_recognition as sr
+
+        try:
+            segment = self.segments.get(timeout=timeout)
+        except Empty:
+            return None
+        return sr.AudioData(segment, self.sample_rate, self.sample_width)
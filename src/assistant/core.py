@@ -1,27 +1,596 @@
-import speech_recognition as sr
-import pyttsx3
+# speech_recognition, pyttsx3, psutil, requests and pyautogui are imported
+# where they are first needed so the window can appear before they load
 import webbrowser
 import os
 import subprocess
+import sys
 import datetime
 import json
-import psutil
-import requests
-import pyautogui
+import wave
 from typing import Dict, Any
-from queue import Queue
-from threading import Thread, Lock, Event
+from threading import Thread, Lock, Event, local, current_thread
 import time
+from utils.audio import AudioPlayer
+from assistant.apps import AppCatalog
+from assistant.capture import MicrophoneStream, LevelMeter
+from assistant.executor import CommandExecutor
+from assistant.files import FileIndex, common_folder, full_word_matches, query_words
+from assistant.fuzzy import FuzzyMatcher
+from assistant.history import ConversationLog
+from assistant.intents import IntentMatcher, PhraseTable
+from assistant.phrase_cache import PhraseCache
+from assistant.startup import profiler
+from assistant.tracing import Tracer
+from assistant.wakeword import WakeWordDetector, WakeWordGate
+from assistant.sysmetrics import SystemSampler, format_rate
+from assistant.speech import SpeechScheduler, SpeechJob, split_segments, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+
+# Extra phrases that ask for help or introduce an open/launch command
+HELP_PHRASES = ("help", "what can you do", "instructions", "guide me")
+OPEN_VERBS = ("open", "launch", "start", "run")
+
+# Defaults for VoiceAssistant(config=...); unknown keys are ignored
+DEFAULT_CONFIG = {
+    "recognizer": os.environ.get("ZILNOVA_RECOGNIZER", "google"),
+    "recognizer_options": {},
+    # Feed the recognizer while the user is still talking, so partial
+    # hypotheses arrive before the endpoint; off when the wake word gates audio
+    "stream_recognition": True,
+    "command_workers": 2,
+    "command_queue_size": 16,
+    "command_timeout": 15.0,
+    # Per-command overrides, keyed by the name returned from resolve_command
+    "command_timeouts": {"weather": 10.0, "screenshot": 10.0},
+    "weather_api_key": os.environ.get("OPENWEATHER_API_KEY", ""),
+    "weather_default_city": "London",
+    "weather_cache_ttl": 600.0,
+    "tracing_enabled": os.environ.get("ZILNOVA_TRACE") == "1",
+    "trace_path": os.path.join("~", ".zilnova", "traces.jsonl"),
+    "trace_max_bytes": 5 * 1024 * 1024,
+    "trace_backups": 3,
+    "metrics_path": os.path.join("~", ".zilnova", "metrics.prom"),
+    # "pyttsx3", or "fake" for headless benchmarks
+    "tts_engine": "pyttsx3",
+    "phrase_cache_enabled": True,
+    "phrase_cache_dir": os.path.join("~", ".zilnova", "phrase_cache"),
+    "phrase_cache_max_bytes": 50 * 1024 * 1024,
+    # Dynamic replies are cached once spoken this many times
+    "phrase_cache_promote_after": 3,
+    # Speak uncached multi-sentence replies one segment at a time, rendering
+    # the next while the current one plays
+    "speech_pipeline": True,
+    "speech_segment_chars": 120,
+    # Only utterances starting with "ZILNOVA" reach the recognizer; needs
+    # templates from `python -m assistant.wakeword --enroll 5`
+    "wake_word_enabled": os.environ.get("ZILNOVA_WAKE_WORD") == "1",
+    "wake_word_dir": os.path.join("~", ".zilnova", "wakeword"),
+    # 0 rejects more, 1 accepts more
+    "wake_word_sensitivity": 0.5,
+    "wake_word_follow_up": 5.0,
+    "screenshot_dir": os.path.join("~", "Desktop"),
+    # "png", "jpeg" or "webp"; level is PNG compress_level or JPEG/WebP quality
+    "screenshot_format": "png",
+    "screenshot_level": None,
+    "screenshot_workers": 1,
+    # "live", or "record" to log browser/app/screenshot actions instead of doing them
+    "side_effects": "live",
+    # Installed desktop applications, loaded in the background at startup
+    "app_catalog_enabled": True,
+    "app_catalog_path": os.path.join("~", ".zilnova", "apps.json"),
+    # Bare executables on PATH that "open <name>" may launch, matched exactly;
+    # otherwise only desktop applications are offered
+    "app_catalog_allowlist": [],
+    # Every command, what was said back and how long it took, searchable across sessions;
+    # keeps what the user said on disk, so only the desktop app turns it on
+    "conversation_log_enabled": False,
+    "conversation_log_path": os.path.join("~", ".zilnova", "history.db"),
+    # Names under the common home folders, searchable by "open my tax report";
+    # walks and watches those folders, so only the desktop app turns it on
+    "file_index_enabled": False,
+    "file_index_path": os.path.join("~", ".zilnova", "files.db"),
+    # None indexes Desktop, Documents, Downloads, Pictures, Music and Videos
+    "file_index_roots": None,
+    # Follow changes with inotify where available, else rescan this often
+    "file_index_watch": True,
+    "file_index_rescan_interval": 300.0,
+    # Misheard commands like "open you tube" are resolved at or above this confidence
+    "fuzzy_min_confidence": 0.75,
+    # Background CPU/memory/disk/network sampling for "system info"
+    "system_sampler_enabled": True,
+    "system_sample_interval": 1.0,
+    "system_sample_seconds": 300.0,
+    # Fraction of one core the sampler may use before it slows down
+    "system_sampler_max_overhead": 0.01,
+}
+
+GREETINGS = (
+    "Hello! How can I help you today?",
+    "Hi there! What can I do for you?",
+    "Hello! I'm here to assist you.",
+    "Hey! How can I be of service?",
+)
+
+# Error fallbacks spoken often enough to keep pre-rendered
+FALLBACK_PHRASES = (
+    "I didn't understand that command. Say 'help' if you need assistance.",
+    "Sorry, I encountered an error. Please try again.",
+    "Please specify which website or application you want to open.",
+    "Sorry, I couldn't open that.",
+    "Sorry, that is taking too long. Please try again.",
+)
+
+
+class RecognitionResult:
+    """Final transcript of one utterance plus how long the backend took"""
+
+    def __init__(self, text, backend, latency, partials=None):
+        self.text = text
+        self.backend = backend
+        self.latency = latency
+        self.partials = partials or []
+
+    def __repr__(self):
+        return f"RecognitionResult({self.text!r}, backend={self.backend!r}, latency={self.latency:.3f}s)"
+
+
+class RecognizerBackend:
+    """Base class for speech-to-text engines.
+
+    Audio is pushed incrementally with ``accept_audio``, which may return a
+    partial hypothesis; ``finish`` returns the final text for the utterance.
+    """
+
+    name = "base"
+    chunk_bytes = 3200  # 100 ms of 16 kHz 16-bit mono audio
+
+    def start_utterance(self, sample_rate: int, sample_width: int) -> None:
+        pass
+
+    def accept_audio(self, chunk: bytes):
+        return None
+
+    def finish(self) -> str:
+        raise NotImplementedError
+
+    def transcribe(self, audio, on_partial=None) -> RecognitionResult:
+        """Stream a finished sr.AudioData through the backend and time it"""
+        started = time.perf_counter()
+        stream = RecognitionStream(self, audio.sample_rate, audio.sample_width, on_partial)
+        stream.feed(audio.get_raw_data())
+        return stream.finish(started)
+
+
+class RecognitionStream:
+    """One utterance fed to a backend in ``chunk_bytes`` pieces as audio arrives"""
+
+    def __init__(self, backend, sample_rate, sample_width, on_partial=None):
+        self.backend = backend
+        self.on_partial = on_partial
+        self.partials = []
+        self._pending = b""
+        backend.start_utterance(sample_rate, sample_width)
+
+    def feed(self, data):
+        """Pass the whole chunks in data to the backend; the rest waits for more audio"""
+        pending = self._pending + data
+        size = self.backend.chunk_bytes
+        usable = len(pending) - len(pending) % size
+        for offset in range(0, usable, size):
+            self._accept(pending[offset:offset + size])
+        self._pending = pending[usable:]
+
+    def _accept(self, chunk):
+        partial = self.backend.accept_audio(chunk)
+        if partial and (not self.partials or self.partials[-1] != partial):
+            self.partials.append(partial)
+            if self.on_partial:
+                self.on_partial(partial)
+
+    def finish(self, started=None) -> RecognitionResult:
+        """Flush the remaining audio and return the final result.
+
+        Latency counts from started, or from this call, which for live
+        audio is the endpoint: the time the user waits for the transcript.
+        """
+        started = time.perf_counter() if started is None else started
+        if self._pending:
+            self._accept(self._pending)
+            self._pending = b""
+        text = self.backend.finish()
+        return RecognitionResult(text.lower().strip(), self.backend.name,
+                                 time.perf_counter() - started, self.partials)
+
+
+class GoogleRecognizerBackend(RecognizerBackend):
+    """Google Web Speech API; needs a network connection and has no partials"""
+
+    name = "google"
+
+    def __init__(self, recognizer=None, language="en-US"):
+        import speech_recognition as sr
+
+        self._sr = sr
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+        self._chunks = []
+
+    def start_utterance(self, sample_rate, sample_width):
+        self._sample_rate = sample_rate
+        self._sample_width = sample_width
+        self._chunks = []
+
+    def accept_audio(self, chunk):
+        self._chunks.append(chunk)
+        return None
+
+    def finish(self):
+        audio = self._sr.AudioData(b"".join(self._chunks), self._sample_rate, self._sample_width)
+        self._chunks = []
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language)
+        except self._sr.UnknownValueError:
+            return ""
+
+
+class VoskRecognizerBackend(RecognizerBackend):
+    """In-process offline recognition with Vosk, emitting partial hypotheses"""
+
+    name = "vosk"
+
+    def __init__(self, model_path=None):
+        try:
+            import vosk
+        except ImportError:
+            raise RuntimeError("The offline recognizer needs the 'vosk' package (pip install vosk)")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(model_path) if model_path else vosk.Model(lang="en-us")
+        self._rec = None
+
+    def start_utterance(self, sample_rate, sample_width):
+        if sample_width != 2:
+            raise ValueError("Vosk expects 16-bit audio")
+        self._rec = self._vosk.KaldiRecognizer(self.model, sample_rate)
+
+    def accept_audio(self, chunk):
+        if self._rec.AcceptWaveform(chunk):
+            return json.loads(self._rec.Result()).get("text") or None
+        return json.loads(self._rec.PartialResult()).get("partial") or None
+
+    def finish(self):
+        text = json.loads(self._rec.FinalResult()).get("text", "")
+        self._rec = None
+        return text
+
+
+class FakeRecognizerBackend(RecognizerBackend):
+    """Deterministic backend for tests and benchmarks.
+
+    ``transcripts`` is either a dict keyed by the raw audio bytes or a list
+    returned in order (cycling). Partials reveal the transcript word by word
+    in proportion to the audio received so far, or one word per
+    ``bytes_per_word`` when the audio is still being captured.
+    """
+
+    name = "fake"
+
+    def __init__(self, transcripts=None, default="", delay=0.0, bytes_per_word=9600):
+        self.transcripts = transcripts if transcripts is not None else []
+        self.default = default
+        self.delay = delay
+        self.bytes_per_word = bytes_per_word
+        self._index = 0
+        self._primed = False
+        self._chunks = []
+        self._received = 0
+        self._expected = 0
+        self._words = []
+
+    def _lookup(self, raw=None):
+        if isinstance(self.transcripts, dict):
+            return self.transcripts.get(raw, self.default)
+        if not self.transcripts:
+            return self.default
+        return self.transcripts[self._index % len(self.transcripts)]
+
+    def transcribe(self, audio, on_partial=None):
+        raw = audio.get_raw_data()
+        self._expected = len(raw)
+        self._words = self._lookup(raw).split()
+        self._primed = True
+        try:
+            return super().transcribe(audio, on_partial)
+        finally:
+            self._primed = False
+
+    def start_utterance(self, sample_rate, sample_width):
+        self._chunks = []
+        self._received = 0
+        if not self._primed:
+            # Live audio: the length is unknown until the endpoint
+            self._expected = 0
+            self._words = self._lookup().split()
+
+    def accept_audio(self, chunk):
+        self._chunks.append(chunk)
+        self._received += len(chunk)
+        if not self._words:
+            return None
+        if self._expected:
+            count = len(self._words) * self._received // self._expected
+        else:
+            count = min(len(self._words), self._received // self.bytes_per_word)
+        return " ".join(self._words[:count]) or None
+
+    def finish(self):
+        if self.delay:
+            time.sleep(self.delay)
+        text = self._lookup(b"".join(self._chunks))
+        self._index += 1
+        self._chunks = []
+        return text
+
+
+RECOGNIZER_BACKENDS = {
+    "google": GoogleRecognizerBackend,
+    "vosk": VoskRecognizerBackend,
+    "offline": VoskRecognizerBackend,
+    "fake": FakeRecognizerBackend,
+}
+
+
+def create_recognizer_backend(name: str, **options) -> RecognizerBackend:
+    """Instantiate a recognizer backend by its config name"""
+    try:
+        backend_cls = RECOGNIZER_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown recognizer backend: {name}")
+    return backend_cls(**options)
+
+
+def compare_recognizers(audio, backends) -> list:
+    """Run the same audio through several backends and collect their results"""
+    results = []
+    for backend in backends:
+        try:
+            results.append(backend.transcribe(audio))
+        except Exception as e:
+            print(f"Recognizer {backend.name} failed: {str(e)}")
+    return results
+
+
+class SideEffects:
+    """Desktop actions taken by handlers on the user's machine"""
+
+    def open_url(self, url):
+        webbrowser.open(url)
+
+    def launch(self, target):
+        subprocess.Popen(target)
+
+    def open_path(self, path):
+        """Open a file or folder with the desktop's default application"""
+        if sys.platform == "win32":
+            os.startfile(path)
+        elif sys.platform == "darwin":
+            subprocess.Popen(["open", path])
+        else:
+            subprocess.Popen(["xdg-open", path])
+
+
+class RecordingSideEffects(SideEffects):
+    """Records desktop actions instead of performing them, for replays.
+
+    Also stands in for the ScreenshotService and the WeatherService, the
+    latter answering with the report FakeWeatherServer serves. Calls are
+    kept globally in ``calls`` and, between ``begin()`` and ``collect()``,
+    per thread so a replay can attribute them to the command that made them.
+    """
 
-class VoiceAssistant:
     def __init__(self):
-        self.recognizer = sr.Recognizer()
+        self.calls = []
+        self._lock = Lock()
+        self._local = local()
+
+    def begin(self):
+        self._local.calls = []
+
+    def collect(self):
+        calls = getattr(self._local, "calls", None) or []
+        self._local.calls = None
+        return calls
+
+    def record(self, action, *args):
+        call = [action, *args]
+        with self._lock:
+            self.calls.append(call)
+        current = getattr(self._local, "calls", None)
+        if current is not None:
+            current.append(call)
+
+    def open_url(self, url):
+        self.record("open_url", url)
+
+    def launch(self, target):
+        self.record("launch", target)
+
+    def open_path(self, path):
+        self.record("open_path", path)
+
+    def take(self, region=None, window=None, fmt=None, level=None, index=None, on_saved=None):
+        self.record("screenshot", window, fmt)
+        path = f"screenshot.{fmt or 'png'}"
+        if on_saved:
+            on_saved(path)
+        return None, path, 0.0
+
+    def burst(self, count, interval, region=None, window=None, fmt=None, level=None, on_done=None):
+        self.record("screenshot_burst", count, interval, window, fmt)
+        if on_done:
+            on_done([f"screenshot_{i + 1:02d}.{fmt or 'png'}" for i in range(count)])
+
+    def get(self, city):
+        from assistant.weather import CityNotFound
+
+        self.record("weather", city)
+        if city.lower() == "nowhere":
+            raise CityNotFound(city)
+        return {"city": city, "temp": 21.5, "humidity": 40, "description": "clear sky"}
+
+    def close(self, wait=True):
+        pass
+
+    def stats(self):
+        return {"calls": len(self.calls)}
+
+    def close(self, wait=True):
+        pass
+
+
+class FakeAudioPlayer:
+    """Stand-in for AudioPlayer that waits out a clip's length instead of playing it"""
+
+    def __init__(self, file_path, on_start=None):
+        with wave.open(file_path, "rb") as f:
+            self.duration = f.getnframes() / f.getframerate()
+        self.on_start = on_start
+        self.finished = Event()
+        self._started_at = None
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        if self.on_start:
+            self.on_start()
+        return self
+
+    def wait(self, timeout=None):
+        """Block until the clip's length has passed or it is stopped; returns True if it ended"""
+        remaining = self.duration - (time.perf_counter() - self._started_at)
+        if timeout is not None:
+            remaining = min(remaining, timeout)
+        if not self.finished.wait(max(remaining, 0.0)) and (timeout is None or timeout >= remaining):
+            self.finished.set()
+        return self.finished.is_set()
+
+    def stop(self):
+        self.finished.set()
+
+
+class FakeSpeechEngine:
+    """Stand-in for a pyttsx3 engine that records what it would have said.
+
+    ``runAndWait`` spends ``render_seconds_per_char`` per character
+    synthesizing, fires the started-utterance callback and then sleeps for
+    ``seconds_per_char`` per character, so benchmarks can run headless
+    with a predictable speaking time. ``save_to_file`` writes silence of
+    that length, which ``player`` pretends to play.
+    """
+
+    def __init__(self, seconds_per_char=0.0, render_seconds_per_char=0.0):
+        self.seconds_per_char = seconds_per_char
+        self.render_seconds_per_char = render_seconds_per_char
+        self.properties = {'voice': 'fake', 'rate': 150, 'volume': 1.0, 'voices': []}
+        self.spoken = []
+        self._callbacks = {}
+        self._pending = []
+        self._stopped = Event()
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def connect(self, topic, callback):
+        self._callbacks.setdefault(topic, []).append(callback)
+
+    def say(self, text, name=None):
+        self._pending.append((text, None))
+
+    def save_to_file(self, text, path, name=None):
+        self._pending.append((text, path))
+
+    def runAndWait(self):
+        self._stopped.clear()
+        pending, self._pending = self._pending, []
+        for text, path in pending:
+            if self.render_seconds_per_char and self._stopped.wait(self.render_seconds_per_char * len(text)):
+                break
+            if path is not None:
+                with wave.open(path, "wb") as f:
+                    f.setnchannels(1)
+                    f.setsampwidth(2)
+                    f.setframerate(8000)
+                    f.writeframes(bytes(2 * int(8000 * self.seconds_per_char * len(text))))
+                continue
+            for callback in self._callbacks.get('started-utterance', []):
+                callback(name=None)
+            self.spoken.append((time.perf_counter(), text))
+            if self.seconds_per_char and self._stopped.wait(self.seconds_per_char * len(text)):
+                break
+
+    def player(self, path, text):
+        """A FakeAudioPlayer for a file from save_to_file that records text as spoken"""
+        return FakeAudioPlayer(path, on_start=lambda: self.spoken.append((time.perf_counter(), text)))
+
+    def stop(self):
+        self._pending = []
+        self._stopped.set()
+
+
+class VoiceAssistant:
+    def __init__(self, config: Dict[str, Any] = None):
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        self.tracer = Tracer(
+            enabled=self.config["tracing_enabled"],
+            path=self.config["trace_path"],
+            max_bytes=self.config["trace_max_bytes"],
+            backups=self.config["trace_backups"],
+            metrics_path=self.config["metrics_path"],
+        )
+        self.recognizer = None
+        self.recognizer_backend = None
+        self.last_recognition = None
+        self.partial_callback = None
+        self.mic_stream = None
+        self.level_meter = LevelMeter()
         self.engine = None
-        self.speech_queue = Queue()
+        self.speech_queue = SpeechScheduler()
+        self.current_speech = None
         self.speech_thread = None
         self.speech_lock = Lock()
         self.stop_speech = Event()
         self.gui_callback = None
+        self.weather_api_key = self.config["weather_api_key"]
+        self.weather_service = None
+        # Handlers run on the worker pool; guards creating the services above and below
+        self._service_lock = Lock()
+        self.side_effects = RecordingSideEffects() if self.config["side_effects"] == "record" else SideEffects()
+        # Recorded screenshots go through the same stand-in
+        self.screenshot_service = self.side_effects if self.config["side_effects"] == "record" else None
+        if self.config["side_effects"] == "record":
+            self.weather_service = self.side_effects
+        self.system_sampler = SystemSampler(
+            interval=self.config["system_sample_interval"],
+            seconds=self.config["system_sample_seconds"],
+            max_overhead=self.config["system_sampler_max_overhead"],
+        )
+        if self.config["system_sampler_enabled"]:
+            self.system_sampler.start()
+        self.phrase_cache = None
+        self._pending_warm = None
+        self._cache_lock = Lock()
+        self._player = None
+        self._utterance_started_at = None
+        # Set by run_command() so replies are returned instead of spoken
+        self._reply_sink = local()
+        self.wake_gate = self._init_wake_gate() if self.config["wake_word_enabled"] else None
+        self.conversation_log = None
+        if self.config["conversation_log_enabled"]:
+            try:
+                self.conversation_log = ConversationLog(self.config["conversation_log_path"])
+            except Exception as e:
+                print(f"Error opening conversation log: {str(e)}")
         
         # Developer information
         self.developer_info = {
@@ -32,12 +601,22 @@ class VoiceAssistant:
             "project": "ZILNOVA AI Assistant"
         }
         
-        # Initialize speech thread
-        self._init_speech_engine()
+        # The TTS engine is initialized on the speech thread so the
+        # constructor returns before it has loaded
         self.start_speech_thread()
+
+        # Worker pool so slow handlers don't block listening
+        self.command_executor = CommandExecutor(
+            deliver=self.speech_queue.put,
+            workers=self.config["command_workers"],
+            max_pending=self.config["command_queue_size"],
+            default_timeout=self.config["command_timeout"],
+            timeouts=self.config["command_timeouts"],
+            on_timeout=lambda job: self.speak("Sorry, that is taking too long. Please try again.", PRIORITY_HIGH),
+        )
         
         # Initialize commands
-        self.commands = {
+        self.commands = PhraseTable({
             'hello': self._handle_greeting,
             'hi': self._handle_greeting,
             'hey': self._handle_greeting,
@@ -48,6 +627,11 @@ class VoiceAssistant:
             'what can you do': self._handle_help,
             'system info': self._handle_system_info,
             'screenshot': self._handle_screenshot,
+            'screenshots': self._handle_screenshot,
+            'folder': self._handle_folder,
+            'find file': self._handle_find_file,
+            'find my': self._handle_find_file,
+            'where is my': self._handle_find_file,
             'who created you': self._handle_creator_info,
             'who made you': self._handle_creator_info,
             'who is your creator': self._handle_creator_info,
@@ -55,10 +639,10 @@ class VoiceAssistant:
             'about developer': self._handle_creator_info,
             'tell me about yourself': self._handle_self_intro,
             'introduce yourself': self._handle_self_intro,
-        }
+        })
         
         # URLs for web commands
-        self.urls = {
+        self.urls = PhraseTable({
             'youtube': 'https://www.youtube.com',
             'google': 'https://www.google.com',
             'gmail': 'https://mail.google.com',
@@ -67,21 +651,83 @@ class VoiceAssistant:
             'twitter': 'https://twitter.com',
             'linkedin': 'https://www.linkedin.com',
             'amazon': 'https://www.amazon.com'
-        }
+        })
         
         # Applications
-        self.apps = {
+        self.apps = PhraseTable({
             'notepad': 'notepad.exe',
             'calculator': 'calc.exe',
             'paint': 'mspaint.exe',
             'word': 'winword.exe',
             'excel': 'excel.exe'
-        }
+        })
+
+        # Compiled matchers over the tables above, rebuilt when a table changes
+        self._intent_index = None
+        self._index_signature = None
+
+        self.app_catalog = None
+        # Catalog apps only launched on an exact name, never a fuzzy guess
+        self.exact_only_apps = frozenset()
+        if self.config["app_catalog_enabled"]:
+            Thread(target=self._load_app_catalog, daemon=True).start()
+
+        self.file_index = None
+        if self.config["file_index_enabled"]:
+            try:
+                self.file_index = FileIndex(self.config["file_index_path"], self.config["file_index_roots"])
+                self.file_index.start(watch=self.config["file_index_watch"],
+                                      interval=self.config["file_index_rescan_interval"])
+            except Exception as e:
+                print(f"Error opening file index: {str(e)}")
+
+    def _load_app_catalog(self):
+        """Merge installed applications into self.apps off the startup path"""
+        import shutil
+
+        try:
+            with profiler.timed("app_catalog"):
+                catalog = AppCatalog(self.config["app_catalog_path"],
+                                     path_allowlist=self.config["app_catalog_allowlist"])
+                catalog.load()
+                catalog.refresh()
+                catalog.save()
+        except Exception as e:
+            print(f"Error loading application catalog: {str(e)}")
+            return
+        apps = PhraseTable(catalog.apps)
+        exact_only = set(catalog.path_apps)
+        # The built-in names win where their executable exists on this system
+        for name, target in self.apps.items():
+            if isinstance(target, list) or shutil.which(target):
+                apps[name] = target
+                exact_only.discard(name)
+        self.app_catalog = catalog
+        self.exact_only_apps = frozenset(exact_only)
+        # Swapped in whole so a concurrent index rebuild never sees a half-updated table
+        self.apps = apps
+        # Rebuild the matchers here rather than on the first command
+        self._get_intent_index()
+        print(f"Application catalog: {len(apps)} apps in {catalog.last_refresh['ms']} ms "
+              f"({catalog.last_refresh['rescanned']} of {catalog.last_refresh['checked']} directories rescanned)")
+
+    def app_catalog_stats(self) -> Dict[str, Any]:
+        """Return the last catalog refresh: apps, directories checked and rescanned, time"""
+        return dict(self.app_catalog.last_refresh) if self.app_catalog else {}
+
+    def file_index_stats(self) -> Dict[str, Any]:
+        """Return indexed entries and the cost of the last rescan and watcher update"""
+        return self.file_index.stats() if self.file_index else {}
 
     def _init_speech_engine(self):
         """Initialize the text-to-speech engine"""
         try:
-            self.engine = pyttsx3.init()
+            with profiler.timed("engine_init"):
+                if self.config["tts_engine"] == "fake":
+                    self.engine = FakeSpeechEngine()
+                else:
+                    import pyttsx3
+                    self.engine = pyttsx3.init()
             voices = self.engine.getProperty('voices')
             # Try to set a female voice if available
             for voice in voices:
@@ -90,9 +736,78 @@ class VoiceAssistant:
                     break
             self.engine.setProperty('rate', 150)    # Speed of speech
             self.engine.setProperty('volume', 1.0)  # Volume (0.0 to 1.0)
+            self.engine.connect('started-utterance', self._on_utterance_started)
         except Exception as e:
             print(f"Error initializing speech engine: {str(e)}")
 
+    def _on_utterance_started(self, name=None):
+        self._utterance_started_at = time.perf_counter()
+
+    def _render_phrase(self, text: str, path: str) -> None:
+        """Synthesize text into an audio file with the live engine settings"""
+        with self.speech_lock:
+            if self.engine is None:
+                self._init_speech_engine()
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+
+    def _render_on_speech_thread(self, text: str, path: str) -> None:
+        """Render like _render_phrase, but on the speech thread that owns the engine.
+
+        pyttsx3 engines aren't thread-safe, so other threads queue the render
+        as a job between utterances and wait for it.
+        """
+        if current_thread() is self.speech_thread:
+            self._render_phrase(text, path)
+            return
+        job = SpeechJob(self._render_phrase, text, path)
+        self.speech_queue.submit(job)
+        job.wait()
+
+    def _init_phrase_cache(self):
+        """Set up the pre-rendered phrase cache for the current voice and rate"""
+        if not self.config["phrase_cache_enabled"] or self.engine is None:
+            return
+        try:
+            phrase_cache = PhraseCache(
+                self.config["phrase_cache_dir"],
+                render=self._render_on_speech_thread,
+                voice=str(self.engine.getProperty('voice')),
+                rate=self.engine.getProperty('rate'),
+                max_bytes=self.config["phrase_cache_max_bytes"],
+                promote_after=self.config["phrase_cache_promote_after"],
+            )
+        except Exception as e:
+            print(f"Error initializing phrase cache: {str(e)}")
+            return
+        with self._cache_lock:
+            self.phrase_cache = phrase_cache
+            if self._pending_warm:
+                self.phrase_cache.warm(self._pending_warm)
+                self._pending_warm = None
+
+    def fixed_phrases(self) -> list:
+        """Texts this assistant always says the same way"""
+        return list(GREETINGS) + [
+            self._help_text(),
+            self._intro_text(),
+            self._creator_text(),
+        ] + list(FALLBACK_PHRASES)
+
+    def warm_phrase_cache(self, extra=()):
+        """Pre-render fixed responses in the background"""
+        phrases = self.fixed_phrases() + list(extra)
+        with self._cache_lock:
+            if self.phrase_cache:
+                self.phrase_cache.warm(phrases)
+            else:
+                # The engine is still loading; warm once the cache exists
+                self._pending_warm = phrases
+
+    def phrase_cache_stats(self) -> Dict[str, Any]:
+        """Return phrase cache hit rate and time-to-first-audio"""
+        return self.phrase_cache.stats() if self.phrase_cache else {}
+
     def start_speech_thread(self):
         """Start the speech processing thread"""
         if not self.speech_thread or not self.speech_thread.is_alive():
@@ -101,39 +816,238 @@ class VoiceAssistant:
 
     def _process_speech_queue(self):
         """Process queued speech items"""
+        with self.speech_lock:
+            if self.engine is None:
+                self._init_speech_engine()
+        self._init_phrase_cache()
+        profiler.mark("engine_ready")
+
         while not self.stop_speech.is_set():
             try:
-                if not self.speech_queue.empty():
-                    text = self.speech_queue.get()
-                    if text:
-                        # Update GUI first
-                        if self.gui_callback:
-                            self.gui_callback(text)
-                        # Then speak
-                        with self.speech_lock:
-                            if self.engine is None:
-                                self._init_speech_engine()
-                            print(f"ZILNOVA: {text}")
-                            self.engine.say(text)
-                            self.engine.runAndWait()
-                    self.speech_queue.task_done()
+                # Blocks until something is queued or the scheduler is closed
+                item = self.speech_queue.get()
+                if item is None:
+                    continue
+                if isinstance(item, SpeechJob):
+                    # Renders for the phrase cache and the server
+                    item.run()
+                    continue
+                text = item.text
+                self.current_speech = item
+                # Update GUI first
+                if self.gui_callback:
+                    self.gui_callback(text)
+                self.tracer.record("speech_wait", item.enqueued_at, item.started_at,
+                                   item.utterance_id, priority=item.priority)
+                # Then speak, from pre-rendered audio when we have it
+                cached = self.phrase_cache.lookup(text) if self.phrase_cache else None
+                segments = [text]
+                if not cached and self.config["speech_pipeline"] and self._renders_wav():
+                    segments = split_segments(text, self.config["speech_segment_chars"]) or segments
+                played = 0
+                with self.tracer.span("synthesis", item.utterance_id, cached=bool(cached),
+                                      chars=len(text), segments=len(segments)):
+                    if item.cancelled:
+                        pass
+                    elif cached:
+                        print(f"ZILNOVA: {text}")
+                        self._play(item, cached, text)
+                        played = 1
+                    elif len(segments) > 1:
+                        print(f"ZILNOVA: {text}")
+                        played = self._speak_segments(item, segments)
+                    else:
+                        print(f"ZILNOVA: {text}")
+                        self._say(item, text)
+                        played = 1
+                self._record_spoken(item, bool(cached), played)
+                self.current_speech = None
             except Exception as e:
                 print(f"Error in speech thread: {str(e)}")
                 # Reinitialize the engine if there's an error
                 self._init_speech_engine()
 
+    def _record_spoken(self, item, cached, segments):
+        """Report time-to-first-audio and speaking time separately"""
+        finished_at = time.perf_counter()
+        if item.first_audio_at is None:
+            return
+        self.speech_queue.record_spoken(item, finished_at, segments)
+        self.tracer.record("first_audio", item.started_at, item.first_audio_at,
+                           item.utterance_id, cached=cached, segments=segments)
+        self.tracer.record("speaking", item.first_audio_at, finished_at,
+                           item.utterance_id, segments=segments, interrupted=item.cancelled)
+        if self.phrase_cache:
+            self.phrase_cache.record_first_audio(cached, item.first_audio_at - item.started_at)
+
+    def _renders_wav(self):
+        """Whether save_to_file writes WAV, which is all AudioPlayer plays.
+
+        pyttsx3's NSSS driver on macOS writes AIFF whatever the extension,
+        so replies there are spoken directly instead of pipelined.
+        """
+        return isinstance(self.engine, FakeSpeechEngine) or sys.platform != "darwin"
+
+    def _say(self, item, text):
+        """Speak text straight through the engine"""
+        with self.speech_lock:
+            if self.engine is None:
+                self._init_speech_engine()
+            self._utterance_started_at = None
+            self.engine.say(text)
+            self.engine.runAndWait()
+            if item.first_audio_at is None:
+                item.first_audio_at = self._utterance_started_at
+
+    def _make_player(self, path, text):
+        """Player for a rendered clip; the fake engine only pretends to play it"""
+        if isinstance(self.engine, FakeSpeechEngine):
+            return self.engine.player(path, text)
+        return AudioPlayer(path)
+
+    def _start_clip(self, item, path, text):
+        """Start playing a clip and return its player; interrupt() stops it mid-clip.
+
+        A clip that can't be opened or played is spoken with say() instead,
+        and None is returned.
+        """
+        try:
+            player = self._make_player(path, text).start()
+        except Exception as e:
+            print(f"Error playing speech clip: {str(e)}")
+            self._say(item, text)
+            return None
+        self._player = player
+        if item.first_audio_at is None:
+            item.first_audio_at = time.perf_counter()
+        return player
+
+    def _finish_clip(self, player):
+        """Wait for a player from _start_clip to end or be stopped"""
+        if player is None:
+            return
+        try:
+            player.wait()
+        finally:
+            self._player = None
+
+    def _play(self, item, path, text):
+        """Stream one clip to the end"""
+        self._finish_clip(self._start_clip(item, path, text))
+
+    def _speak_segments(self, item, segments):
+        """Play segments in order, rendering each next one while the current plays.
+
+        Rendering stays on the speech thread, which owns the engine, and
+        the output device plays the clip on its own thread, so segment N+1
+        is synthesized while segment N is heard and first audio only waits
+        for the first segment. Cancelling the item stops at the next segment
+        boundary. Returns how many segments were played.
+        """
+        import shutil
+        import tempfile
+
+        directory = tempfile.mkdtemp(prefix="zilnova-speech-")
+        played = 0
+        player = None
+        try:
+            for index, segment in enumerate(segments):
+                if item.cancelled or self.stop_speech.is_set():
+                    break
+                path = self.phrase_cache.lookup(segment) if self.phrase_cache else None
+                if path is None:
+                    path = os.path.join(directory, f"{index}.wav")
+                    try:
+                        with self.tracer.span("render_segment", item.utterance_id,
+                                              index=index, chars=len(segment)):
+                            self._render_phrase(segment, path)
+                    except Exception as e:
+                        print(f"Error rendering speech: {str(e)}")
+                        path = None
+                # The previous segment has been playing while this one rendered
+                self._finish_clip(player)
+                player = None
+                if item.cancelled or self.stop_speech.is_set():
+                    break
+                if path is None:
+                    self._say(item, segment)
+                else:
+                    player = self._start_clip(item, path, segment)
+                played += 1
+            self._finish_clip(player)
+            player = None
+        finally:
+            if player is not None:
+                player.stop()
+                self._player = None
+            shutil.rmtree(directory, ignore_errors=True)
+        return played
+
+    def is_active(self) -> bool:
+        """Whether ZILNOVA is speaking or the microphone hears someone"""
+        return self.current_speech is not None or self.level_meter.is_voiced()
+
     def set_gui_callback(self, callback):
         """Set the GUI callback function"""
         self.gui_callback = callback
 
-    def speak(self, text: str):
+    def speak(self, text: str, priority: int = PRIORITY_NORMAL):
         """Add text to speech queue"""
         if text and isinstance(text, str):
-            self.speech_queue.put(text.strip())
+            text = text.strip()
+            # Collected for the conversation log by _run_handler
+            spoken = getattr(self._reply_sink, "spoken", None)
+            if spoken is not None:
+                spoken.append(text)
+            replies = getattr(self._reply_sink, "replies", None)
+            if replies is not None:
+                replies.append(text)
+                return
+            utterance_id = self.tracer.current_utterance()
+            # Replies from pooled handlers are released in command order
+            if self.command_executor.capture_reply(text, priority, utterance_id):
+                return
+            self.speech_queue.put(text, priority, utterance_id)
+
+    def interrupt(self, min_priority: int = PRIORITY_LOW):
+        """Drop pending speech at or below min_priority and cut off the current one if it qualifies"""
+        self.speech_queue.flush(min_priority)
+        current = self.current_speech
+        if current is not None and current.priority >= min_priority:
+            current.cancelled = True
+            player = self._player
+            if player is not None:
+                player.stop()
+            elif self.engine:
+                try:
+                    self.engine.stop()
+                except Exception as e:
+                    print(f"Error stopping speech: {str(e)}")
+
+    def speech_stats(self) -> Dict[str, Any]:
+        """Return speech queue depth, wait times, time-to-first-audio and speaking time"""
+        return self.speech_queue.stats()
+
+    def command_metrics(self) -> Dict[str, Any]:
+        """Return queue wait and run time statistics per command name"""
+        return self.command_executor.metrics()
 
     def shutdown(self):
         """Cleanup speech resources"""
+        self.command_executor.shutdown()
+        if self.weather_service is not None:
+            self.weather_service.close()
+        if self.screenshot_service is not None:
+            self.screenshot_service.close(wait=False)
+        self.system_sampler.stop()
+        if self.file_index is not None:
+            self.file_index.close()
+        if self.conversation_log is not None:
+            self.conversation_log.close()
         self.stop_speech.set()
+        self.speech_queue.close()
+        self.stop_capture()
+        self.tracer.close()
         if self.speech_thread and self.speech_thread.is_alive():
             self.speech_thread.join(timeout=1)
         with self.speech_lock:
@@ -143,98 +1057,409 @@ class VoiceAssistant:
                 except:
                     pass
 
-    def listen(self):
-        """Listen for voice input with improved error handling"""
+    def start_capture(self):
+        """Open the long-lived microphone stream if it isn't running yet"""
+        if self.mic_stream is None:
+            self.mic_stream = MicrophoneStream(level_meter=self.level_meter,
+                                               stream_audio=self.streams_recognition())
+        self.mic_stream.start()
+
+    def streams_recognition(self) -> bool:
+        """Whether captured audio goes to the recognizer while it is being spoken"""
+        return self.config["stream_recognition"] and self.wake_gate is None
+
+    def stop_capture(self):
+        """Release the microphone"""
+        if self.mic_stream is not None:
+            self.mic_stream.stop()
+
+    def next_utterance(self, timeout: float = 5):
+        """Return the next segmented utterance as sr.AudioData, or None on timeout"""
+        self.start_capture()
+        audio = self.mic_stream.get_segment(timeout=timeout)
+        if audio is not None and self.tracer.enabled:
+            # Each segment starts a new utterance; the span covers its audio
+            utterance_id = self.tracer.new_utterance()
+            end = self.mic_stream.last_segment_at or time.perf_counter()
+            duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+            self.tracer.record("capture", end - duration, end, utterance_id,
+                               noise_floor=round(self.mic_stream.segmenter.noise_floor or 0.0, 1))
+        return audio
+
+    def _init_wake_gate(self):
+        """Load the enrolled wake phrase templates; None if there are none"""
+        detector = WakeWordDetector.load(self.config["wake_word_dir"],
+                                         sensitivity=self.config["wake_word_sensitivity"])
+        if not detector.templates:
+            print("No wake word templates found; listening without a wake word")
+            return None
+        return WakeWordGate(detector, follow_up_s=self.config["wake_word_follow_up"])
+
+    def gate_utterance(self, audio):
+        """Return the audio to recognize, or None if it wasn't addressed to us"""
+        if self.wake_gate is None or audio is None:
+            return audio
+        with self.tracer.span("wake_word") as span:
+            audio = self.wake_gate.process(audio)
+            span.set(forwarded=audio is not None)
+        return audio
+
+    def wake_word_stats(self) -> Dict[str, Any]:
+        """Return wake word detections and recognizer calls saved"""
+        return self.wake_gate.stats() if self.wake_gate else {}
+
+    def _get_recognizer_backend(self) -> RecognizerBackend:
+        """Create the configured recognizer backend on first use"""
+        if self.recognizer_backend is None:
+            name = self.config["recognizer"]
+            options = dict(self.config.get("recognizer_options") or {})
+            with profiler.timed("recognizer_init"):
+                if name == "google":
+                    if self.recognizer is None:
+                        import speech_recognition as sr
+                        self.recognizer = sr.Recognizer()
+                    options.setdefault("recognizer", self.recognizer)
+                self.recognizer_backend = create_recognizer_backend(name, **options)
+        return self.recognizer_backend
+
+    def set_recognizer_backend(self, backend: RecognizerBackend):
+        """Swap the recognizer backend at runtime"""
+        self.recognizer_backend = backend
+
+    def set_partial_callback(self, callback):
+        """Set a function called with partial hypotheses while recognizing"""
+        self.partial_callback = callback
+
+    def recognize(self, audio) -> str:
+        """Convert captured audio to lower-case text"""
         try:
-            with sr.Microphone() as source:
-                print("Listening...")
-                # Adjust for ambient noise and set timeout
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                self.recognizer.dynamic_energy_threshold = True
-                
-                try:
-                    # Wait for speech with timeout
-                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
-                    
-                    # Convert speech to text
-                    text = self.recognizer.recognize_google(audio).lower()
-                    print(f"Heard: {text}")
-                    return text
-                except sr.WaitTimeoutError:
-                    return ""
-                except sr.UnknownValueError:
-                    return ""
-                except sr.RequestError:
-                    print("Could not request results from speech recognition service")
+            with self.tracer.span("recognition") as span:
+                result = self._get_recognizer_backend().transcribe(audio, self.partial_callback)
+                span.set(backend=result.backend, partials=len(result.partials))
+            return self._recognized(result)
+        except Exception as e:
+            self._recognition_failed(e)
+            return ""
+
+    def recognize_live(self, timeout: float = 5) -> str:
+        """Recognize the next utterance while it is being spoken.
+
+        Audio reaches the backend frame by frame from the microphone
+        stream, so partial hypotheses arrive as the user talks and only
+        ``finish`` is left at the endpoint. Returns "" if nobody starts
+        speaking within timeout or capture stops mid-utterance.
+        """
+        from queue import Empty
+
+        self.start_capture()
+        mic = self.mic_stream
+        deadline = time.monotonic() + timeout
+        stream = None
+        try:
+            while True:
+                wait = deadline - time.monotonic() if stream is None else 1.0
+                if wait <= 0:
                     return ""
+                try:
+                    kind, data = mic.live.get(timeout=wait)
+                except Empty:
+                    if stream is None or not mic.is_running:
+                        return ""
+                    continue
+                if kind == "start":
+                    stream = RecognitionStream(self._get_recognizer_backend(), mic.sample_rate,
+                                               mic.sample_width, self.partial_callback)
+                    speech_started = time.perf_counter()
+                    continue
+                if stream is None:
+                    # The tail of an utterance that began before we were listening
+                    continue
+                stream.feed(data)
+                if kind == "end":
+                    endpoint = time.perf_counter()
+                    result = stream.finish(endpoint)
+                    if self.tracer.enabled:
+                        utterance_id = self.tracer.new_utterance()
+                        self.tracer.record("capture", speech_started, endpoint, utterance_id,
+                                           noise_floor=round(mic.segmenter.noise_floor or 0.0, 1))
+                        self.tracer.record("recognition", endpoint, endpoint + result.latency,
+                                           utterance_id, backend=result.backend,
+                                           partials=len(result.partials), streamed=True)
+                    return self._recognized(result)
+        except Exception as e:
+            self._recognition_failed(e)
+            return ""
+
+    def _recognized(self, result) -> str:
+        self.last_recognition = result
+        if result.text:
+            print(f"Heard: {result.text} ({result.backend}, {result.latency * 1000:.0f} ms)")
+        return result.text
+
+    def _recognition_failed(self, e):
+        import speech_recognition as sr
+        if isinstance(e, sr.RequestError):
+            print("Could not request results from speech recognition service")
+        else:
+            print(f"Error in recognize(): {str(e)}")
+
+    def listen(self, timeout: float = 5):
+        """Listen for voice input with improved error handling"""
+        try:
+            if self.streams_recognition():
+                return self.recognize_live(timeout=timeout)
+            audio = self.next_utterance(timeout=timeout)
+            if audio is None:
+                return ""
+            return self.recognize(audio)
         except Exception as e:
             print(f"Error in listen(): {str(e)}")
             return ""
 
+    def _get_intent_index(self):
+        """Return (commands, open verbs, open targets, fuzzy commands, fuzzy targets) matchers,
+        rebuilding them if a table changed"""
+        tables = (self.commands, self.urls, self.apps)
+        signature = tuple((id(t), getattr(t, "version", None), len(t)) for t in tables)
+        if self._intent_index is None or signature != self._index_signature:
+            min_confidence = self.config["fuzzy_min_confidence"]
+            commands = IntentMatcher()
+            fuzzy_commands = FuzzyMatcher(min_confidence)
+            for phrase, handler in self.commands.items():
+                commands.add(phrase, handler)
+                fuzzy_commands.add(phrase, handler)
+            for phrase in HELP_PHRASES:
+                commands.add(phrase, self._handle_help)
+                fuzzy_commands.add(phrase, self._handle_help)
+
+            open_verbs = IntentMatcher()
+            for verb in OPEN_VERBS:
+                open_verbs.add(verb, verb)
+
+            # Websites take precedence over applications with the same name
+            open_targets = IntentMatcher()
+            fuzzy_targets = FuzzyMatcher(min_confidence)
+            for site, url in self.urls.items():
+                open_targets.add(site, ("url", site, url), priority=0)
+                fuzzy_targets.add(site, ("url", site, url))
+            for app_name, app_exec in self.apps.items():
+                open_targets.add(app_name, ("app", app_name, app_exec), priority=1)
+                if app_name not in self.exact_only_apps:
+                    fuzzy_targets.add(app_name, ("app", app_name, app_exec))
+
+            for matcher in (commands, open_verbs, open_targets, fuzzy_commands, fuzzy_targets):
+                matcher.build()
+            self._intent_index = (commands, open_verbs, open_targets, fuzzy_commands, fuzzy_targets)
+            self._index_signature = signature
+        return self._intent_index
+
+    def resolve_command(self, command: str):
+        """Return (name, handler) for a command without running it"""
+        commands, open_verbs, _, fuzzy_commands, _ = self._get_intent_index()
+
+        # Check for basic commands and help requests
+        match = commands.match(command)
+        if match:
+            handler = match.payload
+            name = getattr(handler, "__name__", "command").replace("_handle_", "")
+            return name, handler
+
+        # Handle open commands
+        if open_verbs.match(command):
+            return "open", self._handle_open_command
+
+        # Fall back to phrases that sound or are spelled like what was heard
+        match = fuzzy_commands.match(command)
+        if match:
+            print(f"Interpreting '{match.heard}' as '{match.phrase}' (confidence {match.confidence:.2f})")
+            handler = match.payload
+            name = getattr(handler, "__name__", "command").replace("_handle_", "")
+            return name, handler
+
+        return "unknown", self._handle_unknown
+
+    def _run_handler(self, handler, command: str, utterance_id: str = None,
+                     recognition_ms: float = None, submitted_at: float = None, name: str = None) -> None:
+        # Restored afterwards so a pool worker doesn't attribute later spans to this utterance
+        previous_utterance = self.tracer.current_utterance()
+        if utterance_id is not None:
+            self.tracer.bind(utterance_id)
+        started = time.perf_counter()
+        self._reply_sink.spoken = spoken = []
+        error = None
+        try:
+            with self.tracer.span("handler", utterance_id,
+                                  handler=getattr(handler, "__name__", "command")):
+                handler(command)
+        except Exception as e:
+            print(f"Error processing command: {str(e)}")
+            error = f"{type(e).__name__}: {e}"
+            if getattr(self._reply_sink, "replies", None) is not None:
+                self._reply_sink.error = error
+            self.speak("Sorry, I encountered an error. Please try again.", PRIORITY_HIGH)
+        finally:
+            self._reply_sink.spoken = None
+            self.tracer.bind(previous_utterance)
+        if self.conversation_log is not None:
+            self.conversation_log.record(
+                command, spoken,
+                handler=name or getattr(handler, "__name__", "command").replace("_handle_", ""),
+                recognition_ms=recognition_ms,
+                queue_ms=(started - submitted_at) * 1000 if submitted_at is not None else None,
+                handler_ms=(time.perf_counter() - started) * 1000,
+                error=error,
+            )
+
     def process_command(self, command: str) -> None:
         """Process voice commands"""
         try:
             command = command.lower().strip()
-            
-            # Check for basic commands
-            for key, handler in self.commands.items():
-                if key in command:
-                    handler(command)
-                    return
 
-            # Only provide help when specifically asked
-            if any(word in command for word in ["help", "what can you do", "instructions", "guide me"]):
-                self._handle_help(command)
-                return
-                    
-            # Handle open commands
-            if any(word in command for word in ["open", "launch", "start", "run"]):
-                self._handle_open_command(command)
-                return
-                
-            # Simple response for unrecognized commands
-            self.speak("I didn't understand that command. Say 'help' if you need assistance.")
+            # A new command preempts any long monologue still being spoken
+            self.interrupt(PRIORITY_LOW)
+
+            name, handler = self.resolve_command(command)
+            self._run_handler(handler, command, name=name)
             
         except Exception as e:
             print(f"Error processing command: {str(e)}")
-            self.speak("Sorry, I encountered an error. Please try again.")
+            self.speak("Sorry, I encountered an error. Please try again.", PRIORITY_HIGH)
+
+    def run_command(self, command: str):
+        """Run a command on the calling thread instead of the pool.
+
+        Returns (name, replies, error): the replies are collected rather
+        than spoken, and error describes an exception the handler raised.
+        """
+        command = command.lower().strip()
+        name, handler = self.resolve_command(command)
+        self._reply_sink.replies = replies = []
+        self._reply_sink.error = None
+        try:
+            self._run_handler(handler, command, name=name)
+        finally:
+            self._reply_sink.replies = None
+        return name, replies, self._reply_sink.error
+
+    def render_audio(self, text: str) -> bytes:
+        """Synthesize text with the live engine settings and return the audio file bytes"""
+        import tempfile
+
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            self._render_on_speech_thread(text, path)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+    def dispatch_command(self, command: str):
+        """Run a command on the worker pool; returns the job or None if it was rejected"""
+        command = command.lower().strip()
+        utterance_id = self.tracer.current_utterance()
+        with self.tracer.span("dispatch", utterance_id) as span:
+            self.interrupt(PRIORITY_LOW)
+            name, handler = self.resolve_command(command)
+            span.set(command=name)
+            recognition = self.last_recognition
+            recognition_ms = recognition.latency * 1000 if recognition is not None else None
+            job = self.command_executor.submit(name, self._run_handler, handler, command, utterance_id,
+                                               recognition_ms, time.perf_counter(), name)
+        if job is None:
+            self.speak("I'm still working on your earlier requests. Please try again in a moment.", PRIORITY_HIGH)
+        return job
+
+    def _handle_unknown(self, command: str) -> None:
+        """Simple response for unrecognized commands"""
+        self.speak("I didn't understand that command. Say 'help' if you need assistance.")
 
     def _handle_open_command(self, command: str) -> None:
         """Handle open/launch commands"""
         try:
-            # Website commands
-            for site, url in self.urls.items():
-                if site in command:
-                    self.speak(f"Opening {site}")
-                    webbrowser.open(url)
+            _, _, open_targets, _, fuzzy_targets = self._get_intent_index()
+            match = open_targets.match(command)
+            if not match:
+                folder = common_folder(command)
+                if folder is not None:
+                    self._open_folder(folder)
                     return
-            
-            # Application commands
-            for app_name, app_exec in self.apps.items():
-                if app_name in command:
-                    try:
-                        subprocess.Popen(app_exec)
-                        self.speak(f"Opening {app_name}")
-                    except FileNotFoundError:
-                        self.speak(f"Sorry, I couldn't find {app_name}")
+                match = fuzzy_targets.match(command)
+                if match:
+                    print(f"Interpreting '{match.heard}' as '{match.phrase}' "
+                          f"(confidence {match.confidence:.2f})")
+            if match:
+                kind, name, target = match.payload
+                if kind == "url":
+                    self.speak(f"Opening {name}", PRIORITY_HIGH)
+                    self.side_effects.open_url(target)
                     return
+                try:
+                    self.side_effects.launch(target)
+                    self.speak(f"Opening {name}", PRIORITY_HIGH)
+                except FileNotFoundError:
+                    self.speak(f"Sorry, I couldn't find {name}", PRIORITY_HIGH)
+                return
             
+            hits = self.file_index.search(command, limit=1) if self.file_index else []
+            if hits:
+                path, _ = hits[0]
+                name = os.path.basename(path)
+                # A single word that only prefixes the name ('pass' for passwords.txt) is too thin to act on
+                if len(query_words(command)) < 2 and not full_word_matches(command, name):
+                    self.speak(f"Did you mean {name}? Say its full name to open it.")
+                    return
+                self.speak(f"Opening {name}", PRIORITY_HIGH)
+                self.side_effects.open_path(path)
+                return
+
             self.speak("Please specify which website or application you want to open.")
             
         except Exception as e:
             print(f"Error opening application/website: {str(e)}")
-            self.speak("Sorry, I couldn't open that.")
+            self.speak("Sorry, I couldn't open that.", PRIORITY_HIGH)
+
+    def _open_folder(self, path: str) -> None:
+        name = os.path.basename(path) or "home"
+        if not os.path.isdir(path):
+            self.speak(f"Sorry, I couldn't find your {name} folder", PRIORITY_HIGH)
+            return
+        self.speak(f"Opening {name}", PRIORITY_HIGH)
+        self.side_effects.open_path(path)
+
+    def _handle_folder(self, command: str) -> None:
+        """Handle 'open downloads folder' and 'open folder <name>'"""
+        folder = common_folder(command)
+        if folder is not None:
+            self._open_folder(folder)
+            return
+        hits = self.file_index.search(command, limit=1, folders_only=True) if self.file_index else []
+        if hits:
+            self._open_folder(hits[0][0])
+            return
+        self.speak("Sorry, I couldn't find that folder.")
+
+    def _handle_find_file(self, command: str) -> None:
+        """Handle 'find file <name>': say where the best matches are"""
+        if self.file_index is None:
+            self.speak("File search is turned off.")
+            return
+        hits = self.file_index.search(command, limit=3)
+        if not hits:
+            self.speak("Sorry, I couldn't find a file like that.")
+            return
+        home = os.path.expanduser("~")
+        path, _ = hits[0]
+        folder = os.path.dirname(path)
+        if folder.startswith(home):
+            folder = "your home folder" if folder == home else os.path.relpath(folder, home)
+        others = f", and {len(hits) - 1} other matches" if len(hits) > 1 else ""
+        self.speak(f"I found {os.path.basename(path)} in {folder}{others}.")
 
     def _handle_greeting(self, command: str) -> None:
         """Handle greeting commands"""
-        greetings = [
-            "Hello! How can I help you today?",
-            "Hi there! What can I do for you?",
-            "Hello! I'm here to assist you.",
-            "Hey! How can I be of service?"
-        ]
         import random
-        self.speak(random.choice(greetings))
+        self.speak(random.choice(GREETINGS))
 
     def _handle_time(self, command: str) -> None:
         """Handle time-related commands"""
@@ -246,107 +1471,164 @@ class VoiceAssistant:
         current_date = datetime.datetime.now().strftime("%B %d, %Y")
         self.speak(f"Today's date is {current_date}")
 
+    def system_stats(self) -> Dict[str, Any]:
+        """Return the system sampler's own overhead"""
+        return self.system_sampler.stats()
+
     def _handle_system_info(self, command: str) -> None:
         """Handle system information requests"""
-        cpu = psutil.cpu_percent()
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
+        summary = self.system_sampler.summary(60.0)
+        if not summary:
+            # Sampler not running or no sample yet: measure once over a short interval
+            import psutil
+
+            cpu = psutil.cpu_percent(interval=0.2)
+            memory = psutil.virtual_memory()
+            disk = psutil.disk_usage(self.system_sampler.disk_path)
+            info = (
+                f"Here's your system status:\n"
+                f"CPU usage is {cpu}%\n"
+                f"Memory usage is {memory.percent}%\n"
+                f"Disk usage is {disk.percent}%"
+            )
+            self.speak(info)
+            return
+
+        cpu, memory = summary["cpu"], summary["memory"]
         info = (
             f"Here's your system status:\n"
-            f"CPU usage is {cpu}%\n"
-            f"Memory usage is {memory.percent}%\n"
-            f"Disk usage is {disk.percent}%"
+            f"CPU usage is {cpu['current']:.0f}%, averaging {cpu['avg']:.0f}% "
+            f"with a peak of {cpu['peak']:.0f}% over the last minute\n"
+            f"Memory usage is {memory['current']:.0f}%, peaking at {memory['peak']:.0f}%\n"
+            f"Disk usage is {summary['disk']['current']:.0f}%\n"
+            f"Network is receiving {format_rate(summary['net_recv']['avg'])} "
+            f"and sending {format_rate(summary['net_sent']['avg'])} per second"
         )
         self.speak(info)
 
+    def _get_screenshot_service(self):
+        from assistant.screenshots import ScreenshotService
+
+        with self._service_lock:
+            if self.screenshot_service is None:
+                self.screenshot_service = ScreenshotService(
+                    self.config["screenshot_dir"],
+                    fmt=self.config["screenshot_format"],
+                    level=self.config["screenshot_level"],
+                    workers=self.config["screenshot_workers"],
+                    on_saved=self._on_screenshot_saved,
+                    on_error=self._on_screenshot_error,
+                )
+            return self.screenshot_service
+
+    def _get_weather_service(self):
+        from assistant.weather import WeatherService
+
+        with self._service_lock:
+            if self.weather_service is None:
+                self.weather_service = WeatherService(self.weather_api_key,
+                                                      ttl=self.config["weather_cache_ttl"])
+            return self.weather_service
+
+    def _on_screenshot_saved(self, path, info):
+        print(f"Saved {path}: capture {info['capture_s'] * 1000:.0f} ms, "
+              f"encode {info['encode_s'] * 1000:.0f} ms, {info['bytes'] // 1024} KB")
+
+    def _on_screenshot_error(self, error):
+        print(f"Screenshot error: {str(error)}")
+        self.speak("Sorry, I couldn't save the screenshot", PRIORITY_HIGH)
+
+    def screenshot_stats(self) -> Dict[str, Any]:
+        """Return screenshot capture and encode times"""
+        return self.screenshot_service.stats() if self.screenshot_service else {}
+
     def _handle_screenshot(self, command: str) -> None:
         """Handle screenshot requests"""
+        from assistant.screenshots import WindowNotFound, parse_request
+
+        count, interval, fmt, window = parse_request(command)
         try:
-            # Generate filename with timestamp
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            screenshot_path = os.path.expanduser(f"~/Desktop/screenshot_{timestamp}.png")
-            pyautogui.screenshot(screenshot_path)
-            self.speak(f"Screenshot taken and saved to your desktop as screenshot_{timestamp}.png")
+            service = self._get_screenshot_service()
+            if count > 1:
+                service.burst(count, interval, window=window, fmt=fmt,
+                              on_done=lambda paths: self.speak(f"Saved {len(paths)} screenshots to your desktop"))
+                self.speak(f"Taking {count} screenshots, {interval:g} seconds apart")
+                return
+            # Only the capture happens here; it is saved once the background encode is written
+            self.speak("Taking a screenshot")
+            service.take(window=window, fmt=fmt, on_saved=lambda path: self.speak(
+                f"Screenshot saved to your desktop as {os.path.basename(path)}"))
+        except WindowNotFound:
+            self.speak(f"I couldn't find a window called {window}", PRIORITY_HIGH)
         except Exception as e:
             print(f"Screenshot error: {str(e)}")
-            self.speak("Sorry, I couldn't take a screenshot")
+            self.speak("Sorry, I couldn't take a screenshot", PRIORITY_HIGH)
 
-    def _handle_creator_info(self, command: str) -> None:
-        """Handle questions about the creator/developer"""
-        creator_response = (
+    def _creator_text(self) -> str:
+        return (
             f"I was created by {self.developer_info['name']}, "
             f"who is an {self.developer_info['role']} specializing in {self.developer_info['specialization']}. "
             f"He developed me as an advanced AI assistant to help users with various tasks. "
             f"I'm proud to be part of his innovative work in AI technology."
         )
-        self.speak(creator_response)
+
+    def _handle_creator_info(self, command: str) -> None:
+        """Handle questions about the creator/developer"""
+        self.speak(self._creator_text(), PRIORITY_LOW)
         
-    def _handle_self_intro(self, command: str) -> None:
-        """Handle self-introduction requests"""
-        intro = (
+    def _intro_text(self) -> str:
+        return (
             f"I am ZILNOVA, an AI assistant developed by {self.developer_info['name']}. "
             "I can help you with various tasks like checking the weather, managing your computer, "
             "opening applications and websites, and providing system information. "
             "I'm designed to be your helpful digital companion, always ready to assist you "
             "with both simple and complex tasks. Feel free to ask me anything!"
         )
-        self.speak(intro)
 
-    def _handle_help(self, command: str) -> None:
-        """Handle help commands with concise information"""
-        help_text = (
+    def _handle_self_intro(self, command: str) -> None:
+        """Handle self-introduction requests"""
+        self.speak(self._intro_text(), PRIORITY_LOW)
+
+    def _help_text(self) -> str:
+        return (
             "Here are my main commands:\n"
             "- Basic: hello, time, date\n"
             "- Open: websites (YouTube, Google, etc.) or apps (Notepad, Calculator)\n"
+            "- Files: open downloads folder, open my tax report, find file budget\n"
             "- System: system info, screenshot\n"
             "- Other: weather, about developer"
         )
-        self.speak(help_text)
+
+    def _handle_help(self, command: str) -> None:
+        """Handle help commands with concise information"""
+        self.speak(self._help_text(), PRIORITY_LOW)
 
     def _handle_weather(self, command: str) -> None:
         """Handle weather-related commands"""
+        import requests
+        from assistant.weather import CityNotFound, extract_city
+
         try:
             # Extract city name from command
-            city = "London"  # default city
-            command = command.lower()
-            
-            if "in" in command:
-                # Try to extract city name after "in"
-                city = command.split("in")[-1].strip()
-            elif "at" in command:
-                # Try to extract city name after "at"
-                city = command.split("at")[-1].strip()
-            elif "for" in command:
-                # Try to extract city name after "for"
-                city = command.split("for")[-1].strip()
+            city = extract_city(command, self.config["weather_default_city"])
             
-            # Remove any extra words that might have been captured
-            city = city.split()[0] if city.split() else "London"
-            
-            if not self.weather_api_key or self.weather_api_key == "YOUR_API_KEY":
+            # Replays answer from the recorded stand-in, key or no key
+            recording = self.weather_service is self.side_effects
+            if not recording and (not self.weather_api_key or self.weather_api_key == "YOUR_API_KEY"):
                 self.speak("I apologize, but I haven't been configured with a weather API key yet. "
                          "You'll need to add an OpenWeatherMap API key to use this feature.")
                 return
-                
-            # Make API request
-            url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={self.weather_api_key}&units=metric"
-            response = requests.get(url)
+
+            report = self._get_weather_service().get(city)
             
-            if response.status_code == 200:
-                data = response.json()
-                temp = data['main']['temp']
-                weather_desc = data['weather'][0]['description']
-                humidity = data['main']['humidity']
-                
-                weather_info = (
-                    f"The weather in {city} is {weather_desc} with a temperature of "
-                    f"{temp:.1f}°C and humidity of {humidity}%"
-                )
-                self.speak(weather_info)
-            else:
-                self.speak(f"I'm sorry, I couldn't find weather information for {city}")
+            weather_info = (
+                f"The weather in {city} is {report['description']} with a temperature of "
+                f"{report['temp']:.1f}°C and humidity of {report['humidity']}%"
+            )
+            self.speak(weather_info)
                 
+        except CityNotFound:
+            self.speak(f"I'm sorry, I couldn't find weather information for {city}")
         except requests.RequestException:
             self.speak("I'm having trouble connecting to the weather service. Please check your internet connection.")
         except Exception as e:
@@ -0,0 +1,246 @@
+import time
+from queue import Queue, Full
+from threading import Thread, Lock, Event, Timer, local
+
+
+class CommandJob:
+    """One submitted command and its lifecycle timestamps"""
+
+    def __init__(self, seq, name, fn, args, timeout):
+        self.seq = seq
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.timeout = timeout
+        self.status = "pending"
+        self.error = None
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        self.replies = []
+        self.cancelled = Event()
+        self.done = Event()
+        self._timer = None
+
+    @property
+    def queue_wait(self):
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def run_time(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def __repr__(self):
+        return f"CommandJob(#{self.seq} {self.name!r}, {self.status})"
+
+
+class CommandExecutor:
+    """Bounded worker pool for command handlers.
+
+    Handlers run off the listening thread. Replies spoken from inside a
+    handler are routed through ``capture_reply`` so they reach ``deliver``
+    in submission order: the oldest unfinished command speaks directly,
+    later ones are buffered until everything before them has finished,
+    timed out or been cancelled. Python threads can't be killed, so a
+    timed-out handler keeps its worker until it returns but replies it
+    makes after the deadline are dropped.
+    """
+
+    def __init__(self, deliver, workers=2, max_pending=16, default_timeout=15.0,
+                 timeouts=None, on_timeout=None):
+        self.deliver = deliver
+        self.default_timeout = default_timeout
+        self.timeouts = dict(timeouts or {})
+        self.on_timeout = on_timeout
+
+        self._queue = Queue(maxsize=max_pending)
+        self._next_seq = 0
+        self._lock = Lock()
+        self._local = local()
+        # Jobs not yet passed by the speaking slot, keyed by sequence number
+        self._order = {}
+        self._head = 0
+        self._stopped = False
+        self._metrics = {}
+        self.rejected = 0
+
+        self._workers = []
+        for i in range(workers):
+            worker = Thread(target=self._worker_loop, name=f"command-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, name, fn, *args, timeout=None):
+        """Queue fn(*args); returns the job, or None if the pool is saturated"""
+        if timeout is None:
+            timeout = self.timeouts.get(name, self.default_timeout)
+        with self._lock:
+            if self._stopped:
+                return None
+            job = CommandJob(self._next_seq, name, fn, args, timeout)
+            try:
+                self._queue.put_nowait(job)
+            except Full:
+                self.rejected += 1
+                return None
+            self._next_seq += 1
+            self._order[job.seq] = job
+        return job
+
+    def current_job(self):
+        """Return the job running on the calling thread, if any"""
+        return getattr(self._local, "job", None)
+
+    def capture_reply(self, *reply):
+        """Route a reply spoken by a handler; returns False if not called from a job.
+
+        The reply arguments are passed through to ``deliver`` unchanged.
+        """
+        job = self.current_job()
+        if job is None:
+            return False
+        with self._lock:
+            if job.cancelled.is_set():
+                return True
+            if job.seq == self._head:
+                self.deliver(*reply)
+            else:
+                job.replies.append(reply)
+        return True
+
+    def cancel(self, job):
+        """Cancel a pending or running job and drop its unsent replies"""
+        with self._lock:
+            self._finish(job, "cancelled")
+
+    def cancel_all(self):
+        with self._lock:
+            for job in list(self._order.values()):
+                self._finish(job, "cancelled")
+
+    def metrics(self):
+        """Return queue wait and run time per command name"""
+        with self._lock:
+            result = {}
+            for name, m in self._metrics.items():
+                result[name] = dict(m)
+                started = m["count"] - m["cancelled_before_start"]
+                result[name]["avg_wait"] = m["total_wait"] / started if started else 0.0
+                result[name]["avg_run"] = m["total_run"] / m["completed"] if m["completed"] else 0.0
+            return result
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            self._stopped = True
+        self.cancel_all()
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join(timeout=1)
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                if job.cancelled.is_set():
+                    continue
+                job.started_at = time.perf_counter()
+                job.status = "running"
+                if job.timeout:
+                    job._timer = Timer(job.timeout, self._expire, (job,))
+                    job._timer.daemon = True
+                    job._timer.start()
+            self._local.job = job
+            status = "done"
+            try:
+                job.fn(*job.args)
+            except Exception as e:
+                job.error = e
+                status = "error"
+                print(f"Error in command {job.name}: {str(e)}")
+            finally:
+                self._local.job = None
+            job.finished_at = time.perf_counter()
+            with self._lock:
+                self._record_run(job, status)
+                self._finish(job, status)
+
+    def _expire(self, job):
+        with self._lock:
+            if job.done.is_set():
+                return
+            self._finish(job, "timeout")
+        print(f"Command {job.name} timed out after {job.timeout}s")
+        if self.on_timeout:
+            self.on_timeout(job)
+
+    def _metric(self, name):
+        m = self._metrics.get(name)
+        if m is None:
+            m = self._metrics[name] = {
+                "count": 0, "completed": 0, "errors": 0, "timeouts": 0, "cancelled": 0,
+                "cancelled_before_start": 0, "total_wait": 0.0, "max_wait": 0.0,
+                "total_run": 0.0, "max_run": 0.0,
+            }
+        return m
+
+    def _record_run(self, job, status):
+        m = self._metric(job.name)
+        m["completed"] += 1
+        m["total_run"] += job.run_time
+        m["max_run"] = max(m["max_run"], job.run_time)
+        if status == "error":
+            m["errors"] += 1
+
+    def _finish(self, job, status):
+        # Caller holds self._lock
+        if job.done.is_set():
+            return
+        if job._timer is not None:
+            job._timer.cancel()
+        if status in ("cancelled", "timeout"):
+            job.cancelled.set()
+        job.status = status
+        job.done.set()
+
+        m = self._metric(job.name)
+        m["count"] += 1
+        if job.started_at is not None:
+            wait = job.queue_wait
+            m["total_wait"] += wait
+            m["max_wait"] = max(m["max_wait"], wait)
+        elif status == "cancelled":
+            m["cancelled_before_start"] += 1
+        if status == "timeout":
+            m["timeouts"] += 1
+        elif status == "cancelled":
+            m["cancelled"] += 1
+
+        # A timed-out job keeps what it already said; a cancelled one says nothing
+        if status == "cancelled":
+            job.replies.clear()
+        self._advance()
+
+    def _advance(self):
+        # Caller holds self._lock. Flush replies of the job holding the
+        # speaking slot and move the slot past every finished job.
+        while self._head < self._next_seq:
+            job = self._order.get(self._head)
+            if job is not None:
+                for reply in job.replies:
+                    self.deliver(*reply)
+                job.replies.clear()
+                if not job.done.is_set():
+                    return
+                del self._order[self._head]
+            self._head += 1
@@ -0,0 +1,593 @@
+"""Folder and file lookup for "open folder" and "find file" commands.
+
+Names under the user's folders are kept in SQLite with an FTS5 table of
+their words, so a lookup is one indexed query instead of a disk walk.
+Every directory's mtime is stored; a rescan lists only directories whose
+mtime changed. On Linux an inotify watcher rescans changed directories
+as soon as they change; elsewhere rescans run periodically. Run from
+``src`` to benchmark on a synthetic tree::
+
+    python -m assistant.files --files 1000000 --tree /tmp/zilnova-tree
+"""
+import os
+import re
+import sqlite3
+import sys
+import time
+from threading import Event, Lock, Thread
+
+from assistant.intents import tokenize
+
+# Spoken folder names and where they live under the home directory
+COMMON_FOLDERS = {
+    "downloads": "Downloads",
+    "documents": "Documents",
+    "desktop": "Desktop",
+    "pictures": "Pictures",
+    "photos": "Pictures",
+    "music": "Music",
+    "videos": "Videos",
+    "home": "",
+}
+
+# Words in a request that aren't part of the name being looked for
+STOPWORDS = {
+    "open", "launch", "start", "show", "find", "search", "for", "locate", "where", "is", "my",
+    "the", "a", "an", "file", "files", "folder", "folders", "directory", "please", "me", "called",
+    "named", "in", "of", "up",
+}
+
+_WORD_RE = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, dir_id INTEGER, name TEXT, is_dir INTEGER, mtime REAL, size INTEGER);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(terms, kind, prefix='2 3');
+"""
+
+
+def default_roots():
+    """The common folders that exist under the home directory"""
+    home = os.path.expanduser("~")
+    roots = []
+    for folder in dict.fromkeys(COMMON_FOLDERS.values()):
+        path = os.path.join(home, folder) if folder else None
+        if path and os.path.isdir(path):
+            roots.append(path)
+    return roots
+
+
+def common_folder(text):
+    """Path of the common folder text asks for, e.g. 'open my downloads', or None.
+
+    Only when the folder is all that's named, so 'open holiday photos'
+    still searches for a file.
+    """
+    words = query_words(text)
+    if len(words) == 1 and words[0] in COMMON_FOLDERS:
+        return os.path.join(os.path.expanduser("~"), COMMON_FOLDERS[words[0]])
+    return None
+
+
+def name_terms(name):
+    """Words of a file name for the full-text index: 'TaxReport_2023.pdf' -> 'tax report 2023 pdf'"""
+    return " ".join(word.lower() for word in _WORD_RE.findall(name))
+
+
+def query_words(text):
+    """The words of a request that should match a file name"""
+    return [word for word in tokenize(text) if word not in STOPWORDS and "'" not in word]
+
+
+def full_word_matches(text, name):
+    """How many words of a request are whole words of name, not just prefixes"""
+    terms = set(name_terms(name).split())
+    return sum(1 for word in query_words(text) if word in terms)
+
+
+class FileIndex:
+    """Incremental SQLite index of the files and folders under some roots.
+
+    ``refresh()`` stats every known directory and relists only those whose
+    mtime changed, so a rescan costs one stat per directory rather than
+    one per file. Searches go through a second connection, so they don't
+    wait for a rescan in progress (WAL mode lets reads run during writes).
+    """
+
+    def __init__(self, db_path, roots=None, skip_hidden=True, batch_dirs=500):
+        self.db_path = os.path.expanduser(db_path)
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self.roots = [os.path.abspath(os.path.expanduser(r)) for r in (default_roots() if roots is None else roots)]
+        self.skip_hidden = skip_hidden
+        # Directories written per transaction, so readers see a long first scan progress
+        self.batch_dirs = batch_dirs
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._reader = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._write_lock = Lock()
+        self._read_lock = Lock()
+        self._stop = Event()
+        self._thread = None
+        self.watcher = None
+        self.last_refresh = {}
+        self.last_update = {}
+
+    # Writing
+
+    def _listing(self, path):
+        """{name: (is_dir, mtime, size)} for the entries directly in path"""
+        listing = {}
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if self.skip_hidden and entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_symlink():
+                        continue
+                    is_dir = entry.is_dir()
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                listing[entry.name] = (is_dir, stat.st_mtime, 0 if is_dir else stat.st_size)
+        return listing
+
+    def _remove_tree(self, path):
+        """Forget a directory and everything indexed below it"""
+        db = self._db
+        # Every path below 'path/' sorts between 'path/' and 'path0' ('0' follows the separator)
+        dir_ids = [row[0] for row in db.execute(
+            "SELECT id FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+            (path, path + os.sep, path + chr(ord(os.sep) + 1)))]
+        for dir_id in dir_ids:
+            db.execute("DELETE FROM names WHERE rowid IN (SELECT id FROM files WHERE dir_id = ?)", (dir_id,))
+            db.execute("DELETE FROM files WHERE dir_id = ?", (dir_id,))
+            db.execute("DELETE FROM dirs WHERE id = ?", (dir_id,))
+        return len(dir_ids)
+
+    def _sync_dir(self, path, counts, force=False):
+        """Bring one directory's entries up to date.
+
+        Returns (subdirectories, newly seen subdirectories); an unchanged
+        directory is not listed and its subdirectories come from the index.
+        """
+        db = self._db
+        counts["checked"] += 1
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            counts["removed_dirs"] += self._remove_tree(path)
+            return [], []
+        row = db.execute("SELECT id, mtime FROM dirs WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[1] == mtime and not force:
+            subdirs = [os.path.join(path, name) for (name,) in db.execute(
+                "SELECT name FROM files WHERE dir_id = ? AND is_dir = 1", (row[0],))]
+            return subdirs, []
+        try:
+            listing = self._listing(path)
+        except OSError:
+            counts["removed_dirs"] += self._remove_tree(path)
+            return [], []
+        counts["listed"] += 1
+        if row is None:
+            dir_id = db.execute("INSERT INTO dirs (path, mtime) VALUES (?, ?)", (path, mtime)).lastrowid
+        else:
+            dir_id = row[0]
+            db.execute("UPDATE dirs SET mtime = ? WHERE id = ?", (mtime, dir_id))
+
+        existing = {name: (file_id, is_dir, file_mtime, size) for file_id, name, is_dir, file_mtime, size
+                    in db.execute("SELECT id, name, is_dir, mtime, size FROM files WHERE dir_id = ?", (dir_id,))}
+        for name, (file_id, is_dir, _, _) in existing.items():
+            current = listing.get(name)
+            if current is None or bool(current[0]) != bool(is_dir):
+                db.execute("DELETE FROM names WHERE rowid = ?", (file_id,))
+                db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                counts["removed"] += 1
+                if is_dir:
+                    counts["removed_dirs"] += self._remove_tree(os.path.join(path, name))
+        subdirs, added_dirs = [], []
+        for name, (is_dir, file_mtime, size) in listing.items():
+            known = existing.get(name)
+            if known is not None and bool(known[1]) == is_dir:
+                if known[2] != file_mtime or known[3] != size:
+                    db.execute("UPDATE files SET mtime = ?, size = ? WHERE id = ?", (file_mtime, size, known[0]))
+            else:
+                file_id = db.execute(
+                    "INSERT INTO files (dir_id, name, is_dir, mtime, size) VALUES (?, ?, ?, ?, ?)",
+                    (dir_id, name, int(is_dir), file_mtime, size)).lastrowid
+                db.execute("INSERT INTO names (rowid, terms, kind) VALUES (?, ?, ?)",
+                           (file_id, name_terms(name), "dir" if is_dir else "file"))
+                counts["added"] += 1
+                if is_dir:
+                    added_dirs.append(os.path.join(path, name))
+            if is_dir:
+                subdirs.append(os.path.join(path, name))
+        return subdirs, added_dirs
+
+    def _walk(self, paths, counts):
+        """Sync paths and everything below them in batched transactions"""
+        stack = list(paths)
+        pending = 0
+        with self._write_lock:
+            self._db.execute("BEGIN")
+            try:
+                while stack and not self._stop.is_set():
+                    subdirs, _ = self._sync_dir(stack.pop(), counts)
+                    stack.extend(subdirs)
+                    pending += 1
+                    if pending >= self.batch_dirs:
+                        self._db.execute("COMMIT")
+                        self._db.execute("BEGIN")
+                        pending = 0
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def refresh(self):
+        """Rescan every root, relisting only directories whose mtime changed"""
+        started = time.perf_counter()
+        counts = {"checked": 0, "listed": 0, "added": 0, "removed": 0, "removed_dirs": 0}
+        if not self.last_refresh:
+            self._forget_old_roots()
+        self._walk(self.roots, counts)
+        counts["ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.last_refresh = counts
+        return counts
+
+    def _forget_old_roots(self):
+        """Drop directories left from roots that are no longer configured"""
+        with self._write_lock:
+            for (path,) in self._db.execute("SELECT path FROM dirs").fetchall():
+                if self._stop.is_set():
+                    return
+                if not any(path == root or path.startswith(root + os.sep) for root in self.roots):
+                    self._remove_tree(path)
+
+    def update(self, paths, on_dir=None):
+        """Relist specific directories, e.g. ones a watcher saw change.
+
+        New subdirectories are indexed whole; known ones are left alone.
+        """
+        started = time.perf_counter()
+        counts = {"checked": 0, "listed": 0, "added": 0, "removed": 0, "removed_dirs": 0}
+        with self._write_lock:
+            self._db.execute("BEGIN")
+            try:
+                for path in paths:
+                    if self._stop.is_set():
+                        break
+                    _, added_dirs = self._sync_dir(path, counts, force=True)
+                    stack = list(added_dirs)
+                    while stack and not self._stop.is_set():
+                        below = stack.pop()
+                        subdirs, _ = self._sync_dir(below, counts)
+                        if on_dir is not None:
+                            on_dir(below)
+                        stack.extend(subdirs)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        counts["ms"] = round((time.perf_counter() - started) * 1000, 3)
+        self.last_update = counts
+        return counts
+
+    def directories(self):
+        with self._read_lock:
+            return [path for (path,) in self._reader.execute("SELECT path FROM dirs")]
+
+    # Reading
+
+    def search(self, text, limit=5, folders_only=False):
+        """Return [(path, is_dir)] for names containing every word of text, best first.
+
+        Words match name words by prefix ('tax rep' finds 'TaxReport.pdf').
+        Every match is ranked: names the words make up more of come first
+        ('Tax Report.pdf' before 'tax report draft copy 3.txt'), then the
+        most recently modified.
+        """
+        words = query_words(text)
+        if not words:
+            return []
+        match = "terms : (" + " AND ".join(f'"{word}"*' for word in words) + ")"
+        if folders_only:
+            match = "kind : dir AND " + match
+        sql = ("SELECT d.path, f.name, f.is_dir FROM "
+               "(SELECT rowid, bm25(names, 1.0, 0.0) AS score FROM names WHERE names MATCH ?) m "
+               "JOIN files f ON f.id = m.rowid JOIN dirs d ON d.id = f.dir_id "
+               "ORDER BY m.score, f.mtime DESC LIMIT ?")
+        with self._read_lock:
+            rows = self._reader.execute(sql, (match, limit)).fetchall()
+        return [(os.path.join(path, name), bool(is_dir)) for path, name, is_dir in rows]
+
+    def stats(self):
+        with self._read_lock:
+            files, folders = self._reader.execute(
+                "SELECT COUNT(*), COALESCE(SUM(is_dir), 0) FROM files").fetchone()
+        return {
+            "entries": files,
+            "folders": folders,
+            "watching": self.watcher is not None,
+            "last_refresh": dict(self.last_refresh),
+            "last_update": dict(self.last_update),
+        }
+
+    # Keeping up to date
+
+    def start(self, watch=True, interval=300.0):
+        """Index in the background, then follow changes with inotify or periodic rescans"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, args=(watch, interval), daemon=True)
+        self._thread.start()
+
+    def _run(self, watch, interval):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Error indexing files: {str(e)}")
+        if self._stop.is_set():
+            return
+        if watch and InotifyWatcher.available():
+            try:
+                self.watcher = InotifyWatcher()
+                for path in self.directories():
+                    if self._stop.is_set():
+                        break
+                    self.watcher.add(path)
+            except OSError as e:
+                # Usually the per-user watch limit; rescans still keep the index fresh
+                print(f"File watcher unavailable, rescanning every {interval:.0f} s: {str(e)}")
+                if self.watcher is not None:
+                    self.watcher.close()
+                self.watcher = None
+        if self.watcher is not None:
+            self._follow(self.watcher)
+            return
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error rescanning files: {str(e)}")
+
+    def _follow(self, watcher, settle=0.2):
+        """Relist directories the watcher reports, once they've been quiet for settle seconds"""
+        dirty = set()
+        while not self._stop.is_set():
+            changed = watcher.read(timeout=settle)
+            if changed:
+                dirty.update(changed)
+                continue
+            if not dirty:
+                continue
+            paths = sorted(dirty)
+            dirty.clear()
+            try:
+                self.update(paths, on_dir=watcher.add)
+            except Exception as e:
+                print(f"Error updating file index: {str(e)}")
+        watcher.close()
+
+    def close(self):
+        """Stop the background thread and close the database.
+
+        Scans and updates check the stop flag between directories, so the
+        join waits for at most one directory; closing the connections under
+        a running thread would fail it mid-write.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._db.close()
+        self._reader.close()
+
+
+class InotifyWatcher:
+    """Directory change notifications from Linux inotify, through ctypes.
+
+    One watch per directory; ``read()`` returns the directories whose
+    entries changed. Watches on deleted directories go away by themselves.
+    """
+
+    IN_MODIFY_ENTRIES = 0x40 | 0x80 | 0x100 | 0x200  # moved from/to, create, delete
+    IN_DELETE_SELF = 0x400
+    IN_IGNORED = 0x8000
+    IN_ONLYDIR = 0x01000000
+    IN_NONBLOCK = 0x800
+    IN_CLOEXEC = 0x80000
+
+    _libc = None
+
+    @classmethod
+    def available(cls):
+        if not sys.platform.startswith("linux"):
+            return False
+        if cls._libc is None:
+            import ctypes
+            import ctypes.util
+
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                libc.inotify_init1, libc.inotify_add_watch
+            except (OSError, AttributeError):
+                cls._libc = False
+            else:
+                cls._libc = libc
+        return bool(cls._libc)
+
+    def __init__(self):
+        import ctypes
+
+        self._ctypes = ctypes
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self._paths = {}  # watch descriptor -> directory
+
+    def add(self, path):
+        mask = self.IN_MODIFY_ENTRIES | self.IN_DELETE_SELF | self.IN_ONLYDIR
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = self._ctypes.get_errno()
+            raise OSError(errno, f"{os.strerror(errno)}: {path}")
+        self._paths[wd] = path
+
+    def read(self, timeout=0.5):
+        """Directories with changed entries since the last read, waiting up to timeout"""
+        import select
+        import struct
+
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+            offset += 16 + length
+            path = self._paths.get(wd)
+            if path is None:
+                continue
+            if mask & self.IN_IGNORED:
+                del self._paths[wd]
+            elif mask & self.IN_DELETE_SELF:
+                # The parent's own delete event removes it from the index
+                continue
+            else:
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+_WORDS = ("tax", "report", "invoice", "budget", "holiday", "photo", "resume", "letter", "notes",
+          "project", "plan", "meeting", "draft", "final", "summary", "contract", "receipt", "bank",
+          "statement", "school", "homework", "recipe", "travel", "insurance", "medical", "car",
+          "house", "garden", "music", "video", "presentation", "slides", "thesis", "chapter",
+          "design", "logo", "backup", "archive", "family", "wedding", "birthday", "party")
+_EXTENSIONS = ("pdf", "docx", "xlsx", "txt", "jpg", "png", "mp3", "mp4", "pptx", "zip")
+
+
+def _make_tree(root, files, per_dir=100, fanout=10, seed=0):
+    """Create a synthetic tree of files named like a user's documents"""
+    import random
+
+    rng = random.Random(seed)
+    dirs_needed = max(1, files // per_dir)
+    dirs = [root]
+    index = 0
+    while len(dirs) < dirs_needed:
+        parent = dirs[index]
+        for _ in range(fanout):
+            dirs.append(os.path.join(parent, f"{rng.choice(_WORDS)} {len(dirs)}"))
+        index += 1
+    dirs = dirs[:dirs_needed]
+    created = 0
+    for directory in dirs:
+        os.makedirs(directory, exist_ok=True)
+        for _ in range(per_dir):
+            name = (f"{rng.choice(_WORDS)}_{rng.choice(_WORDS)}_{rng.randint(2000, 2025)}_{created}"
+                    f".{rng.choice(_EXTENSIONS)}")
+            open(os.path.join(directory, name), "wb").close()
+            created += 1
+    return dirs
+
+
+def _benchmark(argv=None):
+    import argparse
+    import random
+    import shutil
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Benchmark the file index on a synthetic tree")
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--tree", help="reuse or create the synthetic tree here (kept afterwards)")
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.mkdtemp(prefix="zilnova-files-")
+    tree = args.tree or os.path.join(scratch, "tree")
+    try:
+        if not os.path.isdir(tree):
+            started = time.perf_counter()
+            _make_tree(tree, args.files)
+            print(f"created {args.files} files in {time.perf_counter() - started:.1f} s")
+
+        index = FileIndex(os.path.join(scratch, "files.db"), roots=[tree])
+        started = time.perf_counter()
+        counts = index.refresh()
+        elapsed = time.perf_counter() - started
+        entries = counts["added"]
+        print(f"initial index:   {entries} entries in {elapsed:.1f} s ({entries / elapsed:,.0f} entries/s), "
+              f"db {os.path.getsize(os.path.join(scratch, 'files.db')) / 2**20:.0f} MB")
+
+        counts = index.refresh()
+        print(f"no-change scan:  {counts['ms']:.0f} ms ({counts['checked']} directories stat'ed, "
+              f"{counts['listed']} listed)")
+
+        rng = random.Random(1)
+        directories = index.directories()
+        touched = rng.sample(directories, min(10, len(directories)))
+        stamp = int(time.time())
+        for number, directory in enumerate(touched):
+            open(os.path.join(directory, f"zilnova new file {stamp} {number}.txt"), "wb").close()
+            victim = next((e.path for e in os.scandir(directory) if e.is_file()), None)
+            if victim:
+                os.remove(victim)
+            # Coarse filesystem timestamps could hide a change made in the same tick
+            os.utime(directory, (time.time() + 2, time.time() + 2))
+        counts = index.refresh()
+        print(f"rescan, 10 dirs changed: {counts['ms']:.0f} ms (+{counts['added']} -{counts['removed']})")
+        started = time.perf_counter()
+        counts = index.update(touched)
+        print(f"update of those dirs:    {(time.perf_counter() - started) * 1000:.1f} ms "
+              f"(what a watcher event costs)")
+
+        timings = []
+        found = 0
+        for _ in range(args.queries):
+            words = rng.sample(_WORDS, rng.choice((1, 2)))
+            text = "open my " + " ".join(w[:max(3, len(w) - rng.randint(0, 2))] for w in words)
+            started = time.perf_counter()
+            hits = index.search(text)
+            timings.append(time.perf_counter() - started)
+            found += bool(hits)
+        timings.sort()
+        print(f"query:           p50 {timings[len(timings) // 2] * 1000:.2f} ms, "
+              f"p99 {timings[int(len(timings) * 0.99)] * 1000:.2f} ms, {found}/{len(timings)} found")
+
+        if InotifyWatcher.available():
+            index.start(watch=True)
+            deadline = time.time() + 30
+            while index.watcher is None and time.time() < deadline:
+                time.sleep(0.05)
+            if index.watcher is not None:
+                target = os.path.join(touched[0], "zilnova watched report.txt")
+                started = time.perf_counter()
+                open(target, "wb").close()
+                while not index.search("zilnova watched report") and time.perf_counter() - started < 5:
+                    time.sleep(0.005)
+                print(f"watcher: new file searchable after {(time.perf_counter() - started) * 1000:.0f} ms")
+                os.remove(target)
+        index.close()
+    finally:
+        # The tree is kept only when --tree asked for it
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,352 @@
+import math
+import re
+
+from assistant.intents import tokenize
+
+# Applied in order to the space-free spelling before vowels are dropped
+_PHONETIC_RULES = (
+    ("tch", "ch"), ("sch", "sk"), ("ph", "f"), ("gh", ""), ("ck", "k"), ("wh", "w"),
+    ("kn", "n"), ("wr", "r"), ("qu", "kw"), ("dg", "j"), ("x", "ks"),
+)
+_SOFT_C = re.compile(r"c(?=[eiy])")
+_SILENT = re.compile(r"[aeiouyhw]")
+_REPEATS = re.compile(r"(.)\1+")
+
+
+def squash(text):
+    """Spelling key: lower-case words joined without spaces, so 'you tube' == 'youtube'"""
+    return "".join(tokenize(text))
+
+
+def phonetic_key(text):
+    """Rough sound-alike key in the spirit of Metaphone.
+
+    Keeps the first letter, maps sound-alike spellings together and drops
+    vowels and silent letters after it, so 'calculate her' and 'calculator'
+    both become 'klkltr'.
+    """
+    s = squash(text)
+    for old, new in _PHONETIC_RULES:
+        s = s.replace(old, new)
+    s = _SOFT_C.sub("s", s).replace("c", "k").replace("q", "k").replace("z", "s")
+    if not s:
+        return ""
+    return _REPEATS.sub(r"\1", s[0] + _SILENT.sub("", s[1:]))
+
+
+def _deletes(key):
+    """The key plus every string one deletion away from it"""
+    return {key} | {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def edit_distance(a, b, limit=None):
+    """Levenshtein distance; once it exceeds limit, returns limit + 1.
+
+    With a limit only the diagonal band of width 2 * limit + 1 is filled,
+    since no path outside it can stay within the limit.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is None:
+        limit = len(a)
+    if len(a) - len(b) > limit:
+        return limit + 1
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        best = current[0]
+        for j in range(low, high + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != b[j - 1]))
+            if value > over:
+                value = over
+            current[j] = value
+            if value < best:
+                best = value
+        if best > limit:
+            return over
+        previous = current
+    return previous[-1]
+
+
+class FuzzyMatch:
+    """A registered phrase that approximately occurs in an utterance"""
+    __slots__ = ("phrase", "payload", "confidence", "start", "end", "heard")
+
+    def __init__(self, phrase, payload, confidence, start, end, heard):
+        self.phrase = phrase
+        self.payload = payload
+        self.confidence = confidence
+        self.start = start
+        self.end = end
+        self.heard = heard
+
+    def __repr__(self):
+        return f"FuzzyMatch({self.heard!r} -> {self.phrase!r}, confidence={self.confidence:.2f})"
+
+
+class FuzzyMatcher:
+    """Spelling and sound-alike index for recovering misrecognized phrases.
+
+    Every phrase is indexed by its space-free spelling and its phonetic
+    key, each together with all single-character deletions. A lookup
+    generates the same deletions for each word n-gram of the utterance, so
+    candidates within two spelling edits or one phonetic insertion or
+    deletion are found with dict lookups instead of a scan, and only those
+    few are scored with a real edit distance, at most ``max_candidates``
+    per n-gram. Confidence blends spelling and phonetic similarity in 0..1.
+
+    Limits, from ``python -m assistant.fuzzy``: median lookups stay under
+    a millisecond up to about 10,000 phrases (p99 2-4 ms) and reach about
+    1 ms at 50,000. Past 1000 phrases the default threshold rises with the
+    index size, because short everyday words ('turn', 'some') land within
+    two edits of some phrase. The price is that the weakest real
+    misrecognitions stop matching ('note bad' from 10,000 phrases, 'thyme'
+    at 50,000), and 'milk' still matches a nonsense phrase at 50,000.
+    """
+
+    def __init__(self, min_confidence=0.75, min_fuzzy_length=4, min_spelling=0.5,
+                 max_candidates=32, density_step=0.06):
+        self.min_confidence = min_confidence
+        # Past 1000 phrases near neighbours crowd every word, so the default
+        # threshold rises by density_step per tenfold growth
+        self.density_step = density_step
+        self.threshold = min_confidence
+        # Each n-gram scores at most this many candidates, closest kinds first
+        self.max_candidates = max_candidates
+        # Sound keys collide across large catalogs ('notepad' and 'nghttpd'),
+        # so the spelling must stay at least this similar too
+        self.min_spelling = min_spelling
+        # Shorter keys only match exactly; 'hi' is too close to everything
+        self.min_fuzzy_length = min_fuzzy_length
+        self._entries = []
+        self._seen = set()
+        self._spelling = {}
+        self._phonetic = {}
+        self._phonetic_deletes = {}
+        self._max_words = 1
+        # spelling -> (sound key, candidate ids); filler like 'please open' recurs
+        self._lookups = {}
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, phrase, payload):
+        spelling = squash(phrase)
+        if not spelling or spelling in self._seen:
+            return
+        self._seen.add(spelling)
+        self._entries.append((phrase, payload, spelling, phonetic_key(phrase)))
+        self._dirty = True
+
+    def build(self):
+        spelling_index, phonetic_index, phonetic_deletes = {}, {}, {}
+        max_words = 1
+        for entry_id, (phrase, _, spelling, sound) in enumerate(self._entries):
+            max_words = max(max_words, len(tokenize(phrase)))
+            fuzzy = len(spelling) >= self.min_fuzzy_length
+            for key in (_deletes(spelling) if fuzzy else (spelling,)):
+                spelling_index.setdefault(key, []).append(entry_id)
+            if fuzzy and sound:
+                phonetic_index.setdefault(sound, []).append(entry_id)
+                for key in _deletes(sound) - {sound}:
+                    phonetic_deletes.setdefault(key, []).append(entry_id)
+        self._spelling, self._phonetic = spelling_index, phonetic_index
+        self._phonetic_deletes = phonetic_deletes
+        # A recognizer can split one registered word in two
+        self._max_words = max_words + 1
+        self._lookups = {}
+        self._dirty = False
+        growth = math.log10(len(self._entries) / 1000) if len(self._entries) > 1000 else 0.0
+        self.threshold = min(0.95, self.min_confidence + self.density_step * growth)
+
+    def _lookup(self, spelling):
+        """Sound key and candidate entry ids for one n-gram's spelling"""
+        cached = self._lookups.get(spelling)
+        if cached is not None:
+            return cached
+        # Closest kinds first: exact spelling, spelling edits, then sound-alikes
+        keys = [(self._spelling, spelling)]
+        sound = ""
+        if len(spelling) >= self.min_fuzzy_length:
+            sound = phonetic_key(spelling)
+            keys += [(self._spelling, key) for key in _deletes(spelling) - {spelling}]
+            keys.append((self._phonetic, sound))
+            # Sound keys are short, so allow only one inserted or dropped consonant
+            keys.append((self._phonetic_deletes, sound))
+            keys += [(self._phonetic, key) for key in _deletes(sound) - {sound}]
+        candidates = {}
+        for index, key in keys:
+            for entry_id in index.get(key, ()):
+                candidates[entry_id] = None
+            if len(candidates) >= self.max_candidates:
+                break
+        if len(self._lookups) >= 10000:
+            self._lookups.clear()
+        self._lookups[spelling] = result = (sound, tuple(candidates)[:self.max_candidates])
+        return result
+
+    def _score(self, spelling, sound, entry, floor):
+        """Confidence for one candidate, or -1 once it provably can't reach floor"""
+        _, _, entry_spelling, entry_sound = entry
+        if spelling == entry_spelling:
+            return 1.0
+        longest = max(len(spelling), len(entry_spelling))
+        # The length gap bounds the spelling similarity before any DP runs
+        best_spelling = 1.0 - abs(len(spelling) - len(entry_spelling)) / longest
+        if best_spelling < self.min_spelling or 0.4 * best_spelling + 0.6 < floor:
+            return -1.0
+        sound_longest = max(len(sound), len(entry_sound)) or 1
+        sound_sim = 1.0 - edit_distance(sound, entry_sound, 2) / sound_longest
+        if 0.4 + 0.6 * sound_sim < floor:
+            return -1.0
+        # Only as many spelling edits as still leave the floor reachable
+        allowed = int(min(1.0 - (floor - 0.6 * sound_sim) / 0.4, 1.0 - self.min_spelling) * longest)
+        distance = edit_distance(spelling, entry_spelling, allowed)
+        if distance > allowed:
+            return -1.0
+        return 0.4 * (1.0 - distance / longest) + 0.6 * sound_sim
+
+    def match(self, text, min_confidence=None):
+        """Return the most confident match in text, or None below min_confidence"""
+        if self._dirty:
+            self.build()
+        threshold = self.threshold if min_confidence is None else min_confidence
+        words = tokenize(text)
+        best, best_key = None, None
+        for start in range(len(words)):
+            for end in range(start + 1, min(len(words), start + self._max_words) + 1):
+                spelling = "".join(words[start:end])
+                sound, candidates = self._lookup(spelling)
+                for entry_id in candidates:
+                    entry = self._entries[entry_id]
+                    # Weighted by how much of the utterance the match explains, so
+                    # 'zenren sami' beats an exact hit on just 'sami', but each
+                    # point of confidence lost costs three points of coverage
+                    floor = threshold
+                    if best_key is not None:
+                        floor = max(threshold, 1.0 - (1.0 - best_key[0] / len(spelling)) / 3)
+                        if floor > 1.0:
+                            break
+                    confidence = self._score(spelling, sound, entry, floor)
+                    key = (len(spelling) * (1.0 - 3 * (1.0 - confidence)), confidence)
+                    if confidence >= threshold and (best_key is None or key > best_key):
+                        best_key = key
+                        best = FuzzyMatch(entry[0], entry[1], confidence, start, end,
+                                          " ".join(words[start:end]))
+        return best
+
+
+# Misrecognitions seen from cloud recognizers, with the phrase that was meant
+MISRECOGNITIONS = (
+    ("open you tube", "youtube"),
+    ("open git hub", "github"),
+    ("open note pad", "notepad"),
+    ("open calculate her", "calculator"),
+    ("open face book", "facebook"),
+    ("open linked in", "linkedin"),
+    ("open g mail", "gmail"),
+    ("open you tub", "youtube"),
+    ("open exel", "excel"),
+    ("open note bad", "notepad"),
+    ("open calculater", "calculator"),
+    ("open twiter", "twitter"),
+    ("open amazon dot com", "amazon"),
+    ("what's the whether like", "weather"),
+    ("take a screen shot", "screenshot"),
+    ("show me the system in fo", "system info"),
+    ("what is the thyme", "time"),
+    ("tell me about your self", "tell me about yourself"),
+    ("introduce your self", "introduce yourself"),
+    ("who created chu", "who created you"),
+)
+
+# Utterances that should not match anything
+NEGATIVES = (
+    "turn off the lights",
+    "play some music",
+    "what is the capital of france",
+    "remind me to buy milk",
+    "how tall is mount everest",
+)
+
+_KNOWN_PHRASES = ("youtube", "google", "gmail", "github", "facebook", "twitter", "linkedin",
+                  "amazon", "notepad", "calculator", "paint", "word", "excel", "weather", "time",
+                  "date", "help", "system info", "screenshot", "who created you",
+                  "tell me about yourself", "introduce yourself", "hello")
+
+
+def _corrupt(rng, phrase):
+    """Simulate a misrecognition: split a word, drop or swap a letter"""
+    letters = list(phrase)
+    choice = rng.random()
+    position = rng.randrange(1, max(2, len(letters) - 1))
+    if choice < 0.3 and " " not in phrase:
+        letters.insert(position, " ")
+    elif choice < 0.6:
+        del letters[position]
+    elif choice < 0.8:
+        vowels = "aeiou"
+        if letters[position] in vowels:
+            letters[position] = rng.choice(vowels)
+        else:
+            letters[position - 1], letters[position] = letters[position], letters[position - 1]
+    else:
+        letters.insert(position, letters[position])
+    return "".join(letters)
+
+
+def _benchmark(sizes=(100, 1000, 10000, 50000), samples=2000):
+    """Lookup latency and accuracy on the misrecognition corpus at growing index sizes"""
+    import random
+    import time
+
+    rng = random.Random(0)
+    syllables = ["ka", "lo", "mi", "ren", "tor", "vel", "sa", "dun", "pri", "qua",
+                 "zen", "bro", "fi", "gal", "nex", "ul", "tra", "hom", "pex", "dri"]
+    print(f"{'phrases':>8} {'thresh':>6} {'p50 us':>8} {'p99 us':>8} {'corpus':>7} {'right':>6} "
+          f"{'wrong':>6} {'none':>6} {'false':>6} {'build ms':>9}")
+    for size in sizes:
+        phrases = list(_KNOWN_PHRASES)
+        while len(phrases) < size:
+            words = rng.randint(1, 2)
+            phrases.append(" ".join("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+                                    for _ in range(words)))
+        matcher = FuzzyMatcher()
+        for phrase in phrases:
+            matcher.add(phrase, phrase)
+        started = time.perf_counter()
+        matcher.build()
+        build_ms = (time.perf_counter() - started) * 1000
+
+        corpus_hits = sum(1 for text, expected in MISRECOGNITIONS
+                          if (m := matcher.match(text)) is not None and m.phrase == expected)
+        false_matches = sum(1 for text in NEGATIVES if matcher.match(text) is not None)
+
+        timings = []
+        right = wrong = 0
+        for _ in range(samples):
+            target = rng.choice(phrases)
+            heard = f"please open {_corrupt(rng, target)} now"
+            started = time.perf_counter()
+            m = matcher.match(heard)
+            timings.append(time.perf_counter() - started)
+            if m is not None:
+                right += m.phrase == target
+                wrong += m.phrase != target
+        timings.sort()
+        p50 = timings[len(timings) // 2] * 1e6
+        p99 = timings[int(len(timings) * 0.99)] * 1e6
+        print(f"{size:>8} {matcher.threshold:>6.3f} {p50:>8.1f} {p99:>8.1f} "
+              f"{corpus_hits:>3}/{len(MISRECOGNITIONS):<3} {right / samples:>6.1%} {wrong / samples:>6.1%} "
+              f"{(samples - right - wrong) / samples:>6.1%} {false_matches:>2}/{len(NEGATIVES):<3} {build_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    _benchmark()
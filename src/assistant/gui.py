@@ -1,60 +1,474 @@
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QFrame, QVBoxLayout, 
-                          QPushButton, QLabel, QWidget, QHBoxLayout, QTextEdit,
-                          QGraphicsOpacityEffect)
+                          QPushButton, QLabel, QWidget, QHBoxLayout, QListView,
+                          QLineEdit, QAbstractItemView, QGraphicsOpacityEffect)
 from PyQt6.QtCore import (Qt, QPoint, pyqtSignal, QPropertyAnimation, QTimer, 
-                         QSize, QRectF, QPointF)
+                         QSize, QRectF, QPointF, QObject, QEvent,
+                         QAbstractListModel, QModelIndex)
 from PyQt6.QtGui import (QFont, QIcon, QPixmap, QPainter, QColor, QPainterPath, 
                         QLinearGradient, QPen)
 import sys
 import os
 import math
+import textwrap
+import time
+from collections import deque
+from threading import Lock
+
+class FrameClock(QObject):
+    """Single timer driving every animated widget at a fixed frame rate.
+
+    Widgets subscribe with ``isAnimating()``, ``isWatching()`` and
+    ``advance(dt)`` methods. The frame timer only runs while the window is
+    visible and at least one subscriber is animating. A subscriber that is
+    watching something which may start it without a GUI event (audio,
+    speech) is polled every ``IDLE_POLL_MS`` instead, so an idle or
+    minimized window paints nothing.
+    """
+
+    IDLE_POLL_MS = 250
+
+    def __init__(self, fps=30, parent=None):
+        super().__init__(parent)
+        self.fps = fps
+        self.paused = False
+        self._subscribers = []
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._on_frame)
+        self._last_frame = None
+        self._poll = QTimer(self)
+        self._poll.setInterval(self.IDLE_POLL_MS)
+        self._poll.timeout.connect(self.wake)
+
+        # Counters for frame_stats()
+        self._frames = 0
+        self._paint_count = 0
+        self._paint_total = 0.0
+        self._window_start = time.perf_counter()
+        self._measured_fps = 0.0
+
+    def setFps(self, fps):
+        self.fps = max(1, int(fps))
+        if self._timer.isActive():
+            self._timer.start(int(1000 / self.fps))
+
+    def subscribe(self, widget):
+        if widget not in self._subscribers:
+            self._subscribers.append(widget)
+        self.wake()
+
+    def unsubscribe(self, widget):
+        if widget in self._subscribers:
+            self._subscribers.remove(widget)
+
+    def setPaused(self, paused):
+        self.paused = paused
+        if paused:
+            self._timer.stop()
+            self._poll.stop()
+        else:
+            self.wake()
+
+    def wake(self):
+        """Start the timer if anything wants to animate, else poll while anything watches"""
+        if self.paused or self._timer.isActive():
+            return
+        if any(w.isAnimating() for w in self._subscribers):
+            self._poll.stop()
+            self._last_frame = time.perf_counter()
+            self._timer.start(int(1000 / self.fps))
+        else:
+            self._idle()
+
+    def _idle(self):
+        if any(w.isWatching() for w in self._subscribers):
+            if not self._poll.isActive():
+                self._poll.start()
+        else:
+            self._poll.stop()
+
+    def isRunning(self):
+        return self._timer.isActive()
+
+    def _on_frame(self):
+        now = time.perf_counter()
+        dt = now - self._last_frame if self._last_frame else 1 / self.fps
+        self._last_frame = now
+        animating = False
+        for widget in list(self._subscribers):
+            if widget.isAnimating():
+                widget.advance(dt)
+                animating = True
+        if not animating:
+            self._timer.stop()
+            self._idle()
+        self._frames += 1
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self._measured_fps = self._frames / elapsed
+            self._frames = 0
+            self._window_start = now
+
+    def recordPaint(self, seconds):
+        self._paint_count += 1
+        self._paint_total += seconds
+
+    def stats(self):
+        """Return the measured frame rate and average paint time"""
+        return {
+            "target_fps": self.fps,
+            "fps": self._measured_fps if self._timer.isActive() else 0.0,
+            "running": self._timer.isActive(),
+            "paints": self._paint_count,
+            "avg_paint_ms": self._paint_total / self._paint_count * 1000 if self._paint_count else 0.0,
+        }
+
+
+class GuiBridge(QObject):
+    """Marshals updates from worker threads onto the Qt thread.
+
+    Any thread may call ``add_to_history``, ``update_status`` or ``call``.
+    Updates are queued and applied together at most once per frame
+    interval: history lines are appended in one go and only the newest
+    status is shown. History is bounded by ``max_pending``, the oldest
+    lines being dropped first if the GUI falls behind. Calls are never
+    dropped, since they carry control and widget state; a call identical
+    to one already pending is coalesced into it instead.
+    """
+
+    _schedule = pyqtSignal()
+
+    def __init__(self, gui, interval_ms=33, max_pending=1000):
+        super().__init__(gui)
+        self.gui = gui
+        self.max_pending = max_pending
+        self._lock = Lock()
+        self._history = deque()
+        self._status = None
+        self._calls = deque()
+        self._call_keys = set()  # hashable (fn, args) of pending calls
+        self._scheduled = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._drain)
+        # Queued, so the timer is always started from the GUI thread
+        self._schedule.connect(self._timer.start, Qt.ConnectionType.QueuedConnection)
+
+        self.posted = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def _post(self):
+        # Caller holds self._lock
+        self.posted += 1
+        if not self._scheduled:
+            self._scheduled = True
+            self._schedule.emit()
+
+    def add_to_history(self, text, is_user=False):
+        with self._lock:
+            self._history.append((text, is_user))
+            if len(self._history) > self.max_pending:
+                self._history.popleft()
+                self.dropped += 1
+            self._post()
+
+    def update_status(self, text):
+        with self._lock:
+            if self._status is not None:
+                self.coalesced += 1
+            self._status = text
+            self._post()
+
+    def call(self, fn, *args):
+        """Run fn(*args) on the GUI thread with the next batch"""
+        key = (fn, args)
+        with self._lock:
+            try:
+                if key in self._call_keys:
+                    self.coalesced += 1
+                    return
+                self._call_keys.add(key)
+            except TypeError:
+                pass  # Unhashable arguments are never coalesced
+            self._calls.append(key)
+            self._post()
+
+    def _drain(self):
+        with self._lock:
+            history, self._history = self._history, deque()
+            status, self._status = self._status, None
+            calls, self._calls = self._calls, deque()
+            self._call_keys = set()
+            self._scheduled = False
+            self.batches += 1
+            if len(history) > 1:
+                self.coalesced += len(history) - 1
+        if history:
+            self.gui.add_history_batch(history)
+        if status is not None:
+            self.gui.update_status(status)
+        for fn, args in calls:
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Error in GUI call: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "posted": self.posted,
+                "batches": self.batches,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "pending": len(self._history) + len(self._calls) + (self._status is not None),
+            }
+
+
+class HistoryModel(QAbstractListModel):
+    """Fixed-capacity conversation rows for a QListView.
+
+    Messages are wrapped into one row per line so every row is the same
+    height; with ``setUniformItemSizes`` the view then only lays out the
+    rows on screen. Past ``capacity`` rows the oldest fall off the top,
+    the full history being in the conversation log. The messages behind
+    the rows are kept so ``set_columns`` can re-wrap them when the view
+    is resized.
+    """
+
+    USER_PREFIX = "👤 You: "
+    ASSISTANT_PREFIX = "🤖 ZILNOVA: "
+    MIN_TEXT_COLUMNS = 16
+
+    def __init__(self, capacity=500, columns=96, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.columns = columns
+        self._rows = deque()  # (line, full message)
+        # Every message is at least one row, so this is enough to refill them
+        self._messages = deque(maxlen=capacity)
+        self.dropped = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        line, message = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return line
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return message
+        return None
+
+    def _lines(self, text, is_user, stamp=None):
+        prefix = self.USER_PREFIX if is_user else self.ASSISTANT_PREFIX
+        if stamp:
+            prefix = f"{stamp}  {prefix}"
+        message = f"{prefix}{text}"
+        width = max(self.MIN_TEXT_COLUMNS, self.columns - len(prefix))
+        lines = []
+        for paragraph in text.split("\n"):
+            lines.extend(textwrap.wrap(paragraph, width) or [""])
+        indent = " " * len(prefix)
+        return [(f"{prefix if i == 0 else indent}{line}", message) for i, line in enumerate(lines)]
+
+    def append(self, entries):
+        """Add (text, is_user) or (text, is_user, stamp) messages at the bottom"""
+        rows = []
+        for entry in entries:
+            self._messages.append(entry)
+            rows.extend(self._lines(*entry))
+        if not rows:
+            return
+        rows = rows[-self.capacity:]
+        overflow = len(self._rows) + len(rows) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self._rows.popleft()
+            self.endRemoveRows()
+            self.dropped += overflow
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def set_columns(self, columns):
+        """Re-wrap the kept messages to a new line width"""
+        if columns == self.columns:
+            return
+        self.columns = columns
+        rows = []
+        for entry in self._messages:
+            rows.extend(self._lines(*entry))
+        self.beginResetModel()
+        self._rows = deque(rows[-self.capacity:])
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows.clear()
+        self._messages.clear()
+        self.endResetModel()
+
+
+class HistoryView(QListView):
+    """List view that wraps its HistoryModel to the visible width.
+
+    The rows don't word-wrap themselves (that would make their heights
+    differ), so the model is told how many monospace columns fit in the
+    viewport whenever it is resized or a model is set.
+    """
+
+    def setModel(self, model):
+        super().setModel(model)
+        self._apply_columns()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._apply_columns()
+
+    def columns(self):
+        char = self.fontMetrics().horizontalAdvance("M")
+        # One column short: the prefix emoji is drawn two columns wide
+        return max(1, self.viewport().width() // max(1, char) - 1)
+
+    def _apply_columns(self):
+        model = self.model()
+        if isinstance(model, HistoryModel) and self.viewport().width() > 0:
+            model.set_columns(self.columns())
+
 
 class RobotWidget(QWidget):
-    def __init__(self, parent=None):
+    ANGLE_SPEED = 100.0   # degrees per second (5 per 50 ms tick)
+    PULSE_SPEED = 10 / 3  # radians per second (0.1 per 30 ms tick)
+    ANGLE_STEP = 5        # mouth phase resolution in degrees
+    IDLE_SECONDS = 1.0    # keep pulsing this long after activity stops
+
+    def __init__(self, parent=None, clock=None):
         super().__init__(parent)
         self.setMinimumSize(200, 200)
         self.angle = 0
         self.pulse_size = 0
-        
-        # Animation timer using QTimer instead of QBasicTimer
-        self.anim_timer = QTimer(self)
-        self.anim_timer.timeout.connect(self.animate)
-        self.anim_timer.start(50)
-        
-        # Pulse animation
-        self.pulse_timer = QTimer(self)
-        self.pulse_timer.timeout.connect(self.pulse)
-        self.pulse_timer.start(30)
+        self.show_stats = False
+
+        self.clock = clock
+        self.activity_source = None
+        self._last_activity = time.perf_counter()
+        self._static_layer = None
+        self._mouth_paths = {}
+        self._gradient = None
         
         self.is_listening = False
+        if self.clock is not None:
+            self.clock.subscribe(self)
 
-    def animate(self):
-        self.angle = (self.angle + 5) % 360
-        self.update()
+    def setActivitySource(self, source):
+        """Animate only while source() is true, e.g. while speaking or hearing speech"""
+        self.activity_source = source
+        if self.clock is not None:
+            self.clock.wake()
 
-    def pulse(self):
-        self.pulse_size = (self.pulse_size + 0.1) % (2 * math.pi)
+    def isAnimating(self):
+        if self.is_listening and (self.activity_source is None or self.activity_source()):
+            self._last_activity = time.perf_counter()
+            return True
+        return time.perf_counter() - self._last_activity < self.IDLE_SECONDS
+
+    def isWatching(self):
+        return self.is_listening
+
+    def advance(self, dt):
+        self.angle = (self.angle + self.ANGLE_SPEED * dt) % 360
+        self.pulse_size = (self.pulse_size + self.PULSE_SPEED * dt) % (2 * math.pi)
         self.update()
 
     def setListening(self, listening):
         self.is_listening = listening
+        self._last_activity = time.perf_counter()
+        if self.clock is not None:
+            self.clock.wake()
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    def resizeEvent(self, event):
+        self._static_layer = None
+        self._mouth_paths = {}
+        self._gradient = None
+        super().resizeEvent(event)
 
-        # Calculate center and sizes
+    def _geometry(self):
         width = self.width()
         height = self.height()
-        center_x = width / 2
-        center_y = height / 2
         size = min(width, height) * 0.8
+        return width / 2, height / 2, size, size * 0.6
+
+    def _render_static_layer(self):
+        """Draw the head and eyes once into a pixmap"""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        center_x, center_y, _, head_size = self._geometry()
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(QColor("#00FF00"), 2))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+
+        # Head
+        head_rect = QRectF(
+            center_x - head_size/2,
+            center_y - head_size/2,
+            head_size,
+            head_size
+        )
+        painter.drawRoundedRect(head_rect, 15, 15)
+        
+        # Eyes
+        eye_size = head_size * 0.2
+        eye_y = center_y - eye_size/2
+        left_eye_x = center_x - head_size/4 - eye_size/2
+        painter.drawEllipse(QRectF(left_eye_x, eye_y, eye_size, eye_size))
+        right_eye_x = center_x + head_size/4 - eye_size/2
+        painter.drawEllipse(QRectF(right_eye_x, eye_y, eye_size, eye_size))
+        painter.end()
+        return pixmap
+
+    def _mouth_path(self, phase):
+        """Waveform mouth for a quantized phase, built once per size"""
+        path = self._mouth_paths.get(phase)
+        if path is None:
+            center_x, center_y, _, head_size = self._geometry()
+            mouth_width = head_size * 0.4
+            mouth_height = head_size * 0.1
+            start_x = center_x - mouth_width/2
+            y = center_y + head_size/4
+            path = QPainterPath()
+            path.moveTo(start_x, y)
+            # A point every 2 px is visually identical to one per pixel
+            for i in range(0, int(mouth_width), 2):
+                offset = math.sin((i + phase) * 0.2) * mouth_height
+                path.lineTo(start_x + i, y + offset)
+            self._mouth_paths[phase] = path
+        return path
+
+    def paintEvent(self, event):
+        started = time.perf_counter()
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        center_x, center_y, size, head_size = self._geometry()
         
         # Draw outer circle with gradient
-        gradient = QLinearGradient(0, 0, 0, height)
-        gradient.setColorAt(0, QColor(0, 255, 0, 30))
-        gradient.setColorAt(1, QColor(0, 255, 0, 10))
+        if self._gradient is None:
+            self._gradient = QLinearGradient(0, 0, 0, self.height())
+            self._gradient.setColorAt(0, QColor(0, 255, 0, 30))
+            self._gradient.setColorAt(1, QColor(0, 255, 0, 10))
         
         # Pulsing outer circle
         pulse_radius = size/2 + math.sin(self.pulse_size) * 10
@@ -64,37 +478,18 @@ class RobotWidget(QWidget):
             pulse_radius * 2,
             pulse_radius * 2
         )
-        painter.setBrush(gradient)
+        painter.setBrush(self._gradient)
         painter.setPen(Qt.PenStyle.NoPen)
         painter.drawEllipse(outer_rect)
 
-        # Draw robot face
+        # Static head and eyes
+        if self._static_layer is None:
+            self._static_layer = self._render_static_layer()
+        painter.drawPixmap(0, 0, self._static_layer)
+
         pen = QPen(QColor("#00FF00"), 2)
         painter.setPen(pen)
-        
-        # Head
-        head_size = size * 0.6
-        head_rect = QRectF(
-            center_x - head_size/2,
-            center_y - head_size/2,
-            head_size,
-            head_size
-        )
-        painter.drawRoundedRect(head_rect, 15, 15)
-        
-        # Eyes
-        eye_size = head_size * 0.2
-        eye_y = center_y - eye_size/2
-        
-        # Left eye
-        left_eye_x = center_x - head_size/4 - eye_size/2
-        left_eye_rect = QRectF(left_eye_x, eye_y, eye_size, eye_size)
-        painter.drawEllipse(left_eye_rect)
-        
-        # Right eye
-        right_eye_x = center_x + head_size/4 - eye_size/2
-        right_eye_rect = QRectF(right_eye_x, eye_y, eye_size, eye_size)
-        painter.drawEllipse(right_eye_rect)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
         
         # Animated mouth
         mouth_width = head_size * 0.4
@@ -102,17 +497,8 @@ class RobotWidget(QWidget):
         
         if self.is_listening:
             # Animated waveform mouth when listening
-            path = QPainterPath()
-            start_x = center_x - mouth_width/2
-            y = center_y + head_size/4
-            path.moveTo(start_x, y)
-            
-            for i in range(int(mouth_width)):
-                x = start_x + i
-                offset = math.sin((i + self.angle) * 0.2) * mouth_height
-                path.lineTo(x, y + offset)
-            
-            painter.drawPath(path)
+            phase = int(self.angle) // self.ANGLE_STEP * self.ANGLE_STEP
+            painter.drawPath(self._mouth_path(phase))
         else:
             # Simple smile when not listening
             mouth_rect = QRectF(
@@ -123,26 +509,85 @@ class RobotWidget(QWidget):
             )
             painter.drawArc(mouth_rect, 0, 180 * 16)
 
+        if self.show_stats and self.clock is not None:
+            stats = self.clock.stats()
+            painter.drawText(5, 15, f"{stats['fps']:.0f} fps  {stats['avg_paint_ms']:.2f} ms/paint")
+        painter.end()
+
+        if self.clock is not None:
+            self.clock.recordPaint(time.perf_counter() - started)
+
 class WaveformWidget(QWidget):
-    def __init__(self, parent=None):
+    BAR_PX = 4            # horizontal pixels per level point
+    WINDOW_SECONDS = 1.0  # how much recent audio the waveform spans
+
+    def __init__(self, parent=None, clock=None):
         super().__init__(parent)
         self.setMinimumHeight(50)
-        self.waves = [0] * 10  # Initialize with 10 zero values
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.updateWaves)
-        
+        self.level_source = None
+        self.waves = [0] * self.points()
+        self.running = False
+        self._flat = True
+        self.clock = clock
+        if self.clock is not None:
+            self.clock.subscribe(self)
+
+    def setLevelSource(self, meter):
+        """Read levels from a capture.LevelMeter"""
+        self.level_source = meter
+        self.waves = [0] * self.points()
+
+    def points(self):
+        """One level per BAR_PX pixels, but no more than the meter has blocks in the window"""
+        points = max(2, self.width() // self.BAR_PX)
+        if self.level_source is not None:
+            points = min(points, max(2, int(self.WINDOW_SECONDS * 1000 / self.level_source.block_ms)))
+        return points
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        points = self.points()
+        if points != len(self.waves):
+            self.waves = [0] * points
+            self.updateWaves()
+
+    def isAnimating(self):
+        # Scrolls while the window holds speech, then once more to go flat
+        if not self.running or self.level_source is None:
+            return False
+        return not self._flat or self.level_source.is_voiced(self.WINDOW_SECONDS)
+
+    def isWatching(self):
+        return self.running
+
     def startAnimation(self):
-        self.timer.start(50)
+        self.running = True
+        if self.clock is not None:
+            self.clock.wake()
         
     def stopAnimation(self):
-        self.timer.stop()
-        self.waves = [0] * 10
+        self.running = False
+        self._flat = True
+        self.waves = [0] * self.points()
         self.update()
+
+    def advance(self, dt):
+        self.updateWaves()
         
     def updateWaves(self):
-        import random
-        self.waves = self.waves[1:] + [random.randint(10, 40)]
-        self.update()
+        # Without an active capture the line simply stays flat
+        if self.level_source is None:
+            return
+        self._flat = not self.level_source.is_voiced(self.WINDOW_SECONDS)
+        if self._flat:
+            waves = [0] * self.points()
+        else:
+            levels = self.level_source.decimate(self.points(), self.WINDOW_SECONDS)
+            half_height = self.height() / 2 - 2
+            waves = (levels * half_height).tolist()
+        if waves != self.waves:
+            self.waves = waves
+            self.update()
         
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -163,6 +608,61 @@ class WaveformWidget(QWidget):
                 y2 = center_y - self.waves[i + 1]
                 painter.drawLine(int(x1), int(y1), int(x2), int(y2))
 
+class SystemDashboard(QWidget):
+    """Sparklines of CPU, memory and network from a sysmetrics.SystemSampler.
+
+    Repaints at the sampler's rate, and only while visible.
+    """
+    POINTS = 60
+    ROWS = (("CPU", "cpu"), ("MEM", "memory"), ("NET", "net_recv"))
+
+    def __init__(self, sampler, parent=None):
+        super().__init__(parent)
+        self.sampler = sampler
+        self.setMinimumHeight(60)
+        self.lines = {}
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(max(100, int(sampler.interval * 1000)))
+
+    def refresh(self):
+        if not self.isVisible() or self.window().isMinimized() or not self.sampler.has_samples():
+            return
+        self.lines = {key: self.sampler.history(key, self.POINTS) for _, key in self.ROWS}
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        row_height = self.height() / len(self.ROWS)
+        label_width = 90
+        plot_width = self.width() - label_width - 4
+        for row, (label, key) in enumerate(self.ROWS):
+            values = self.lines.get(key)
+            top = row * row_height
+            if values is None or values.size == 0:
+                continue
+            # Percentages use a fixed 0..100 scale, rates scale to their own peak
+            scale = 100.0 if key != "net_recv" else max(float(values.max()), 1.0)
+            if key == "net_recv":
+                text = f"{label} {values[-1] / 1024:.0f}K/s"
+            else:
+                text = f"{label} {values[-1]:.0f}%"
+            painter.setPen(QColor("#00FF00"))
+            painter.drawText(QRectF(0, top, label_width, row_height),
+                             Qt.AlignmentFlag.AlignVCenter, text)
+            painter.setPen(QPen(QColor(0, 255, 0, 160), 1.5))
+            step = plot_width / max(1, self.POINTS - 1)
+            offset = self.POINTS - values.size
+            previous = None
+            for i, value in enumerate(values):
+                point = QPointF(label_width + (offset + i) * step,
+                                top + row_height - 2 - (row_height - 4) * min(1.0, value / scale))
+                if previous is not None:
+                    painter.drawLine(previous, point)
+                previous = point
+
+
 class TitleBar(QFrame):
     def __init__(self, parent):
         super().__init__(parent)
@@ -242,9 +742,16 @@ class AssistantGUI(QMainWindow):
     start_listening = pyqtSignal()
     stop_listening = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, fps=None):
         super().__init__()
         self.setWindowTitle("ZILNOVA AI Assistant")
+
+        # One clock for all animations; ZILNOVA_GUI_FPS overrides the default
+        if fps is None:
+            fps = int(os.environ.get("ZILNOVA_GUI_FPS", "30"))
+        self.frame_clock = FrameClock(fps, self)
+        # Worker threads must go through the bridge, never call widgets directly
+        self.bridge = GuiBridge(self, interval_ms=int(1000 / fps))
         self.setMinimumSize(900, 700)
         self.setWindowFlag(Qt.WindowType.FramelessWindowHint)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
@@ -278,11 +785,12 @@ class AssistantGUI(QMainWindow):
         self.layout.addWidget(self.content_widget)
 
         # Add robot animation in the center
-        self.robot = RobotWidget(self)
+        self.robot = RobotWidget(self, clock=self.frame_clock)
+        self.robot.show_stats = os.environ.get("ZILNOVA_SHOW_FPS") == "1"
         content_layout.addWidget(self.robot)
 
         # Add waveform visualization
-        self.waveform = WaveformWidget(self)
+        self.waveform = WaveformWidget(self, clock=self.frame_clock)
         content_layout.addWidget(self.waveform)
 
         # Status label
@@ -300,32 +808,26 @@ class AssistantGUI(QMainWindow):
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         content_layout.addWidget(self.status_label)
 
-        # Command history
-        self.history_text = QTextEdit(self)
-        self.history_text.setReadOnly(True)
-        self.history_text.setStyleSheet("""
-            QTextEdit {
-                background-color: rgba(20, 20, 20, 200);
-                color: #00FF00;
-                border: 1px solid rgba(0, 255, 0, 50);
-                border-radius: 10px;
-                font-family: 'Consolas', monospace;
-                font-size: 14px;
-                padding: 15px;
-                selection-background-color: rgba(0, 255, 0, 50);
-            }
-            QScrollBar:vertical {
-                border: none;
-                background: rgba(0, 255, 0, 20);
-                width: 10px;
-                border-radius: 5px;
-            }
-            QScrollBar::handle:vertical {
-                background: rgba(0, 255, 0, 130);
-                border-radius: 5px;
-            }
-        """)
-        content_layout.addWidget(self.history_text)
+        # Command history: a bounded model, the rest is in the conversation log
+        self.history_model = HistoryModel(parent=self)
+        self.history_view = self._make_history_view(self.history_model)
+        self._scroll_pending = False
+        content_layout.addWidget(self.history_view)
+
+        # Past-session search over the conversation log, see enable_history_search()
+        self.conversation_log = None
+        self.search_edit = None
+        self.search_model = None
+        self._search_timer = None
+
+        # Optional live system metrics, see enable_dashboard()
+        self.dashboard = None
+
+        # Optional per-utterance timing overlay, see enable_trace_overlay()
+        self.trace_label = None
+        self._trace_utterance = None
+        self._trace_lines = {}
+        self._content_layout = content_layout
 
         # Control buttons
         button_layout = QHBoxLayout()
@@ -370,13 +872,36 @@ class AssistantGUI(QMainWindow):
 
     def _on_start(self):
         self.start_listening.emit()
-        self.waveform.startAnimation()
-        self.robot.setListening(True)
+        self.set_listening(True)
         
     def _on_stop(self):
         self.stop_listening.emit()
-        self.waveform.stopAnimation()
-        self.robot.setListening(False)
+        self.set_listening(False)
+
+    def set_listening(self, listening):
+        """Start or stop the robot and waveform animations"""
+        if listening:
+            self.waveform.startAnimation()
+        else:
+            self.waveform.stopAnimation()
+        self.robot.setListening(listening)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.frame_clock.setPaused(self.isMinimized())
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.frame_clock.setPaused(True)
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.frame_clock.setPaused(self.isMinimized() or not self.isVisible())
+        super().changeEvent(event)
+
+    def frame_stats(self):
+        """Return frame rate and paint time of the animated widgets"""
+        return self.frame_clock.stats()
 
     def update_status(self, text):
         self.status_label.setText(text)
@@ -403,17 +928,146 @@ class AssistantGUI(QMainWindow):
                 }
             """)
 
+    def _make_history_view(self, model):
+        view = HistoryView(self)
+        view.setModel(model)
+        # Same-height rows let the view skip laying out everything off screen
+        view.setUniformItemSizes(True)
+        view.setWordWrap(False)
+        view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        view.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        view.setStyleSheet("""
+            QListView {
+                background-color: rgba(20, 20, 20, 200);
+                color: #00FF00;
+                border: 1px solid rgba(0, 255, 0, 50);
+                border-radius: 10px;
+                font-family: 'Consolas', monospace;
+                font-size: 14px;
+                padding: 15px;
+            }
+            QScrollBar:vertical {
+                border: none;
+                background: rgba(0, 255, 0, 20);
+                width: 10px;
+                border-radius: 5px;
+            }
+            QScrollBar::handle:vertical {
+                background: rgba(0, 255, 0, 130);
+                border-radius: 5px;
+            }
+        """)
+        return view
+
     def add_to_history(self, text, is_user=False):
-        prefix = "👤 You: " if is_user else "🤖 ZILNOVA: "
-        self.history_text.append(f"{prefix}{text}")
-        
-        # Scroll to bottom
-        self.history_text.verticalScrollBar().setValue(
-            self.history_text.verticalScrollBar().maximum()
-        )
+        self.add_history_batch([(text, is_user)])
+
+    def add_history_batch(self, entries):
+        """Append several history lines with a single scroll"""
+        self.history_model.append(entries)
+        # Scrolling relays out every row, so do it once per event loop pass
+        if not self._scroll_pending:
+            self._scroll_pending = True
+            QTimer.singleShot(0, self._scroll_history)
+
+    def _scroll_history(self):
+        self._scroll_pending = False
+        if self.history_view.model() is self.history_model:
+            self.history_view.scrollToBottom()
+
+    def enable_history_search(self, log):
+        """Show a search box over the conversation log above the history"""
+        if self.search_edit is not None:
+            return
+        self.conversation_log = log
+        self.search_model = HistoryModel(parent=self)
+        self.search_edit = QLineEdit(self)
+        self.search_edit.setPlaceholderText("Search past conversations...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setStyleSheet("""
+            QLineEdit {
+                background-color: rgba(20, 20, 20, 200);
+                color: #00FF00;
+                border: 1px solid rgba(0, 255, 0, 50);
+                border-radius: 10px;
+                font-family: 'Consolas', monospace;
+                font-size: 14px;
+                padding: 6px 12px;
+            }
+        """)
+        # Search once typing pauses rather than on every keystroke
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self._run_search)
+        self.search_edit.textChanged.connect(self._search_timer.start)
+        self._content_layout.insertWidget(self._content_layout.indexOf(self.history_view),
+                                          self.search_edit)
+
+    def _run_search(self):
+        text = self.search_edit.text().strip()
+        if not text:
+            self.history_view.setModel(self.history_model)
+            self.history_view.scrollToBottom()
+            return
+        try:
+            rows = self.conversation_log.search(text, limit=100)
+        except Exception as e:
+            print(f"Error searching conversation log: {str(e)}")
+            rows = []
+        entries = []
+        # Oldest first, like the live history
+        for row in reversed(rows):
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["ts"]))
+            entries.append((row["utterance"], True, stamp))
+            if row["response"]:
+                entries.append((row["response"], False))
+        if not entries:
+            entries.append(("No past conversations match.", False))
+        self.search_model.clear()
+        self.search_model.append(entries)
+        self.history_view.setModel(self.search_model)
+        self.history_view.scrollToBottom()
+
+    def enable_trace_overlay(self):
+        """Show stage timings of the latest utterance under the history"""
+        if self.trace_label is not None:
+            return
+        self.trace_label = QLabel("", self)
+        self.trace_label.setStyleSheet("""
+            QLabel {
+                color: rgba(0, 255, 0, 180);
+                font-family: 'Consolas', monospace;
+                font-size: 12px;
+                padding: 4px;
+                border: none;
+            }
+        """)
+        self._content_layout.insertWidget(self._content_layout.indexOf(self.history_view) + 1,
+                                          self.trace_label)
+
+    def enable_dashboard(self, sampler):
+        """Show live CPU, memory and network sparklines above the status label"""
+        if self.dashboard is not None:
+            return
+        self.dashboard = SystemDashboard(sampler, self)
+        self._content_layout.insertWidget(self._content_layout.indexOf(self.status_label),
+                                          self.dashboard)
+
+    def show_trace(self, span):
+        """Add one tracing span (a dict from assistant.tracing) to the overlay"""
+        if self.trace_label is None:
+            return
+        if span.get("utterance") != self._trace_utterance:
+            self._trace_utterance = span.get("utterance")
+            self._trace_lines = {}
+        self._trace_lines[span["span"]] = span["duration_ms"]
+        self.trace_label.setText("  ".join(
+            f"{name} {ms:.0f}ms" for name, ms in self._trace_lines.items()))
 
     def clear_history(self):
-        self.history_text.clear()
+        self.history_model.clear()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
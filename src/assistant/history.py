@@ -0,0 +1,233 @@
+"""Persistent, searchable log of every command and what ZILNOVA answered.
+
+Interactions are appended to a SQLite database in WAL mode by a writer
+thread that commits in batches, so logging never waits on the disk in
+the command path. An FTS5 index over utterances and responses makes
+searching every past session a single query. Run from ``src``::
+
+    python -m assistant.history --search "weather london"
+    python -m assistant.history --benchmark 200000
+"""
+import os
+import queue
+import sqlite3
+import time
+from threading import Lock, Thread
+
+from assistant.intents import tokenize
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY, started REAL, ended REAL);
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY, session INTEGER, ts REAL, utterance TEXT, response TEXT,
+    handler TEXT, recognition_ms REAL, queue_ms REAL, handler_ms REAL, error TEXT);
+CREATE VIRTUAL TABLE IF NOT EXISTS interactions_fts USING fts5(
+    utterance, response, content='interactions', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS interactions_ai AFTER INSERT ON interactions BEGIN
+    INSERT INTO interactions_fts (rowid, utterance, response) VALUES (new.id, new.utterance, new.response);
+END;
+"""
+
+_COLUMNS = ("id", "session", "ts", "utterance", "response", "handler",
+            "recognition_ms", "queue_ms", "handler_ms", "error")
+
+_STOP = object()
+
+
+class ConversationLog:
+    """Append-only interaction log shared by every session on this machine.
+
+    ``record`` only queues the row; the writer thread inserts whatever has
+    queued up in one transaction. Reads use their own connection, which
+    WAL lets run alongside the writer.
+    """
+
+    def __init__(self, path, max_pending=10000, new_session=True):
+        self.path = os.path.expanduser(path)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.session = None
+        if new_session:
+            self.session = self._db.execute("INSERT INTO sessions (started) VALUES (?)",
+                                            (time.time(),)).lastrowid
+        self._reader = sqlite3.connect(self.path, check_same_thread=False)
+        self._read_lock = Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._count_lock = Lock()
+        self.recorded = 0
+        self.failed = 0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._writer = Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def record(self, utterance, responses=(), handler=None, recognition_ms=None, queue_ms=None,
+               handler_ms=None, error=None):
+        """Queue one interaction; responses is the list of things said back"""
+        row = (self.session, time.time(), utterance, "\n".join(responses), handler,
+               recognition_ms, queue_ms, handler_ms, error)
+        with self._count_lock:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.dropped += 1
+                return
+            self.recorded += 1
+
+    def _write_loop(self):
+        while True:
+            rows = [self._queue.get()]
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = _STOP in rows
+            rows = [row for row in rows if row is not _STOP]
+            if rows:
+                try:
+                    self._db.execute("BEGIN")
+                    self._db.executemany(
+                        "INSERT INTO interactions (session, ts, utterance, response, handler, "
+                        "recognition_ms, queue_ms, handler_ms, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows)
+                    self._db.execute("COMMIT")
+                    self.written += len(rows)
+                    self.batches += 1
+                except sqlite3.Error as e:
+                    print(f"Error writing conversation log: {str(e)}")
+                    if self._db.in_transaction:
+                        self._db.execute("ROLLBACK")
+                    self.failed += len(rows)
+            if stop:
+                return
+
+    def flush(self, timeout=5.0):
+        """Wait until everything recorded so far has been written"""
+        deadline = time.monotonic() + timeout
+        while self.written + self.failed < self.recorded and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def _rows(self, sql, args):
+        with self._read_lock:
+            rows = self._reader.execute(sql, args).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def search(self, text, limit=100, session=None):
+        """Interactions whose utterance or response contains every word of text, newest first"""
+        words = [word for word in tokenize(text) if "'" not in word]
+        if not words:
+            return []
+        match = " AND ".join(f'"{word}"*' for word in words)
+        sql = ("SELECT " + ", ".join(f"i.{c}" for c in _COLUMNS) +
+               " FROM interactions_fts JOIN interactions i ON i.id = interactions_fts.rowid"
+               " WHERE interactions_fts MATCH ?" + (" AND i.session = ?" if session is not None else "") +
+               " ORDER BY interactions_fts.rowid DESC LIMIT ?")
+        args = (match, session, limit) if session is not None else (match, limit)
+        return self._rows(sql, args)
+
+    def recent(self, limit=50, session=None):
+        """The last interactions, oldest first"""
+        where = " WHERE session = ?" if session is not None else ""
+        args = (session, limit) if session is not None else (limit,)
+        rows = self._rows("SELECT " + ", ".join(_COLUMNS) + " FROM interactions" + where +
+                          " ORDER BY id DESC LIMIT ?", args)
+        return rows[::-1]
+
+    def sessions(self, limit=20):
+        """Recent sessions with their interaction counts, newest first"""
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT s.id, s.started, s.ended, COUNT(i.id) FROM sessions s "
+                "LEFT JOIN interactions i ON i.session = s.id GROUP BY s.id ORDER BY s.id DESC LIMIT ?",
+                (limit,)).fetchall()
+        return [{"id": r[0], "started": r[1], "ended": r[2], "interactions": r[3]} for r in rows]
+
+    def stats(self):
+        return {
+            "session": self.session,
+            "recorded": self.recorded,
+            "written": self.written,
+            "batches": self.batches,
+            "pending": self._queue.qsize(),
+            "dropped": self.dropped,
+        }
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join(timeout=5)
+        if self.session is not None:
+            try:
+                self._db.execute("UPDATE sessions SET ended = ? WHERE id = ?", (time.time(), self.session))
+            except sqlite3.Error:
+                pass
+        self._db.close()
+        self._reader.close()
+
+
+def _benchmark(count):
+    import random
+    import tempfile
+
+    from assistant.bench import SYNTHETIC_COMMANDS
+
+    rng = random.Random(0)
+    replies = ("The current time is 08:15 PM", "Opening youtube", "Today's date is March 3, 2025",
+               "Weather in London: light rain, 12 degrees", "I didn't understand that command.",
+               "Screenshot taken and saved to your desktop")
+    with tempfile.TemporaryDirectory() as scratch:
+        log = ConversationLog(os.path.join(scratch, "history.db"))
+        started = time.perf_counter()
+        record_times = []
+        for number in range(count):
+            call_started = time.perf_counter()
+            log.record(f"{rng.choice(SYNTHETIC_COMMANDS)} {number}", [rng.choice(replies)],
+                       handler="time", recognition_ms=rng.uniform(200, 900), queue_ms=0.1, handler_ms=1.0)
+            record_times.append(time.perf_counter() - call_started)
+            if log.stats()["pending"] > 5000:
+                time.sleep(0.001)
+        log.flush(timeout=600)
+        elapsed = time.perf_counter() - started
+        record_times.sort()
+        print(f"appended {log.written} interactions in {elapsed:.1f} s ({log.written / elapsed:,.0f}/s, "
+              f"{log.batches} transactions), record() p99 {record_times[int(len(record_times) * 0.99)] * 1e6:.0f} us")
+        print(f"database: {os.path.getsize(log.path) / 2**20:.1f} MB")
+
+        words = ["weather", "london", "time", "open youtube", "screenshot", "date march", "rain"]
+        timings = []
+        for _ in range(500):
+            query = rng.choice(words)
+            search_started = time.perf_counter()
+            log.search(query, limit=100)
+            timings.append(time.perf_counter() - search_started)
+        timings.sort()
+        print(f"search (100 newest hits): p50 {timings[len(timings) // 2] * 1000:.2f} ms, "
+              f"p99 {timings[int(len(timings) * 0.99)] * 1000:.2f} ms")
+        log.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Search or benchmark ZILNOVA's conversation log")
+    parser.add_argument("--path", default=os.path.join("~", ".zilnova", "history.db"))
+    parser.add_argument("--search", help="print past interactions containing these words")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="time N appends and searches in a scratch log")
+    args = parser.parse_args()
+    if args.benchmark:
+        _benchmark(args.benchmark)
+    else:
+        log = ConversationLog(args.path, new_session=False)
+        rows = log.search(args.search) if args.search else log.recent()
+        for row in rows:
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["ts"]))
+            print(f"{stamp}  [{row['handler']}] {row['utterance']}")
+            for line in row["response"].splitlines():
+                print(f"                  -> {line}")
+        log.close()
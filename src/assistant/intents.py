@@ -0,0 +1,199 @@
+import re
+from collections import deque
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    """Split text into lower-case word tokens"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class PhraseTable(dict):
+    """A dict that counts its mutations so compiled indexes know when to rebuild"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def _changed(self):
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._changed()
+        return super().setdefault(key, default)
+
+    def pop(self, key, *default):
+        self._changed()
+        return super().pop(key, *default)
+
+    def popitem(self):
+        self._changed()
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+
+class IntentMatch:
+    """A registered phrase found in an utterance"""
+    __slots__ = ("phrase", "payload", "priority", "start", "end")
+
+    def __init__(self, phrase, payload, priority, start, end):
+        self.phrase = phrase
+        self.payload = payload
+        self.priority = priority
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"IntentMatch({self.phrase!r}, priority={self.priority}, start={self.start})"
+
+
+class IntentMatcher:
+    """Word-level Aho-Corasick matcher over registered phrases.
+
+    Phrases only match on whole words, so "hi" does not fire on "this".
+    When several phrases occur, the lowest priority value wins, then the
+    phrase with more words, then the earliest one in the utterance.
+    """
+
+    def __init__(self):
+        self._phrases = {}
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._phrases)
+
+    def add(self, phrase, payload, priority=None):
+        """Register a phrase; priority defaults to registration order"""
+        words = tuple(tokenize(phrase))
+        if not words:
+            return
+        if priority is None:
+            priority = len(self._phrases)
+        # First registration of a phrase wins, like the first matching dict key did
+        if words not in self._phrases:
+            self._phrases[words] = (priority, payload, phrase)
+            self._dirty = True
+
+    def clear(self):
+        self._phrases.clear()
+        self._dirty = True
+
+    def build(self):
+        """Compile the registered phrases into the automaton"""
+        goto = [{}]
+        output = [[]]
+        for words, entry in self._phrases.items():
+            state = 0
+            for word in words:
+                nxt = goto[state].get(word)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][word] = nxt
+                    goto.append({})
+                    output.append([])
+                state = nxt
+            output[state].append((len(words), entry))
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and word not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(word, 0)
+                fail[nxt] = target if target != nxt else 0
+                output[nxt] = output[nxt] + output[fail[nxt]]
+
+        self._goto, self._fail, self._output = goto, fail, output
+        self._dirty = False
+
+    def find_all(self, text):
+        """Return every registered phrase occurring in text"""
+        if self._dirty:
+            self.build()
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        state = 0
+        for index, word in enumerate(tokenize(text)):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for length, (priority, payload, phrase) in output[state]:
+                matches.append(IntentMatch(phrase, payload, priority,
+                                           index - length + 1, index + 1))
+        return matches
+
+    def match(self, text):
+        """Return the best match in text, or None"""
+        best = None
+        best_key = None
+        for m in self.find_all(text):
+            key = (m.priority, m.start - m.end, m.start)
+            if best_key is None or key < best_key:
+                best, best_key = m, key
+        return best
+
+
+def _benchmark(sizes=(10, 100, 1000, 5000, 20000), repeats=2000):
+    """Compare compiled dispatch against a linear substring scan"""
+    import random
+    import time
+
+    rng = random.Random(0)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    utterance = "hey zilnova could you please open the weather report for london tomorrow"
+
+    print(f"{'phrases':>8} {'compiled us':>12} {'linear us':>10} {'build ms':>9}")
+    for size in sizes:
+        phrases = [" ".join("".join(rng.choice(alphabet) for _ in range(rng.randint(3, 8)))
+                            for _ in range(rng.randint(1, 3)))
+                   for _ in range(size)]
+        phrases.append("weather")
+
+        matcher = IntentMatcher()
+        for phrase in phrases:
+            matcher.add(phrase, phrase)
+        start = time.perf_counter()
+        matcher.build()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            matcher.match(utterance)
+        compiled_us = (time.perf_counter() - start) / repeats * 1e6
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for phrase in phrases:
+                if phrase in utterance:
+                    break
+        linear_us = (time.perf_counter() - start) / repeats * 1e6
+
+        print(f"{size:>8} {compiled_us:>12.2f} {linear_us:>10.2f} {build_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,140 @@
+"""Load-test client for ``assistant.server``.
+
+Opens one keep-alive connection per simulated user, creates a session on
+each and sends commands back to back. Reports overall throughput and
+request latency percentiles. Run from ``src`` against a running server::
+
+    python -m assistant.server --tts-engine fake --workers 4 &
+    python -m assistant.loadtest --sessions 50 --requests 20
+
+With ``--spawn`` the server is started in-process on a free port.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from assistant.bench import SYNTHETIC_COMMANDS, percentiles
+
+
+class Client:
+    """Minimal HTTP/1.1 keep-alive JSON client over asyncio streams"""
+
+    def __init__(self, host="127.0.0.1", port=8765, unix_path=None):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        if self.unix_path:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.unix_path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, payload=None):
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            if key.strip().lower() == "content-length":
+                length = int(value)
+        data = await self.reader.readexactly(length) if length else b""
+        return status, json.loads(data) if data else None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+async def simulate_user(client, commands, requests, audio, latencies, errors):
+    await client.connect()
+    try:
+        status, created = await client.request("POST", "/sessions", {})
+        if status != 201:
+            errors.append(status)
+            return
+        path = f"/sessions/{created['session']}/text"
+        for index in range(requests):
+            started = time.perf_counter()
+            status, _ = await client.request("POST", path, {
+                "text": commands[index % len(commands)], "audio": audio})
+            if status == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                errors.append(status)
+        await client.request("DELETE", f"/sessions/{created['session']}")
+    finally:
+        await client.close()
+
+
+async def run_load(sessions, requests, host="127.0.0.1", port=8765, unix_path=None,
+                   commands=SYNTHETIC_COMMANDS, audio=False):
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        simulate_user(Client(host, port, unix_path), commands, requests, audio, latencies, errors)
+        for _ in range(sessions)))
+    elapsed = time.perf_counter() - started
+    return {
+        "sessions": sessions,
+        "requests": len(latencies) + len(errors),
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+async def _spawn_and_run(args):
+    from assistant.server import AssistantServer
+
+    server = AssistantServer(workers=args.workers, config={"tts_engine": "fake"})
+    await server.warm_up()
+    listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        return await run_load(args.sessions, args.requests, port=port, audio=args.audio)
+    finally:
+        listener.close()
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ZILNOVA server load test")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this Unix socket instead of TCP")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent users")
+    parser.add_argument("--requests", type=int, default=20, help="commands per user")
+    parser.add_argument("--audio", action="store_true", help="ask for synthesized replies")
+    parser.add_argument("--spawn", action="store_true", help="start a server with fake TTS in-process")
+    parser.add_argument("--workers", type=int, help="worker processes when spawning")
+    args = parser.parse_args(argv)
+
+    if args.spawn:
+        results = asyncio.run(_spawn_and_run(args))
+    else:
+        results = asyncio.run(run_load(args.sessions, args.requests, args.host, args.port,
+                                       args.unix, audio=args.audio))
+    latency = results["latency_ms"]
+    print(f"{results['sessions']} sessions, {results['requests']} requests in {results['seconds']} s")
+    print(f"throughput: {results['throughput_rps']} requests/s, errors: {results['errors']}")
+    if latency.get("count"):
+        print(f"latency ms: p50 {latency['p50']:.2f}  p95 {latency['p95']:.2f}  p99 {latency['p99']:.2f}")
+    return 1 if results["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import hashlib
+import os
+from collections import OrderedDict
+from threading import Lock, Thread
+
+
+class PhraseCache:
+    """Size-bounded on-disk LRU of pre-rendered speech.
+
+    Entries are WAV files keyed by text, voice and rate. ``render`` is a
+    callable ``render(text, path)`` that synthesizes text into path and
+    returns once it is written; it is only ever called from ``ensure``,
+    which the warm-up thread uses. Dynamic texts
+    are promoted into the cache once they have been spoken
+    ``promote_after`` times; texts with digits (times, dates, readings)
+    rarely repeat verbatim and are never promoted. Miss counts are kept
+    for the ``max_tracked`` most recently missed texts only.
+    """
+
+    def __init__(self, directory, render, voice="", rate=0, max_bytes=50 * 1024 * 1024,
+                 promote_after=3, max_tracked=1000):
+        self.directory = os.path.expanduser(directory)
+        self.render = render
+        self.voice = voice
+        self.rate = rate
+        self.max_bytes = max_bytes
+        self.promote_after = promote_after
+        self.max_tracked = max_tracked
+
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._total_bytes = 0
+        self._lock = Lock()
+        self._pending = []
+        self._spoken = OrderedDict()  # key -> misses, least recently missed first
+        self._worker = None
+
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+        self._ttfa = {"hit": [0, 0.0], "miss": [0, 0.0]}
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".wav") and not name.endswith(".tmp.wav"):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def key(self, text):
+        return hashlib.sha1(f"{self.voice}|{self.rate}|{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".wav")
+
+    def lookup(self, text):
+        """Return the cached audio path for text, or None"""
+        key = self.key(text)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                if not any(c.isdigit() for c in text):
+                    self._count_miss(key, text)
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._forget(key)
+            return None
+        return path
+
+    def _count_miss(self, key, text):
+        # Caller holds self._lock
+        count = self._spoken.pop(key, 0) + 1
+        self._spoken[key] = count
+        if len(self._spoken) > self.max_tracked:
+            self._spoken.popitem(last=False)
+        if count == self.promote_after:
+            self._schedule([text])
+
+    def ensure(self, text):
+        """Render text now if it isn't cached; returns the path or None"""
+        key = self.key(text)
+        with self._lock:
+            if key in self._entries:
+                return self._path(key)
+        path = self._path(key)
+        tmp = path[:-4] + ".tmp.wav"
+        try:
+            self.render(text, tmp)
+            size = os.path.getsize(tmp)
+            if size == 0:
+                os.remove(tmp)
+                return None
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"Error rendering phrase: {str(e)}")
+            return None
+        with self._lock:
+            self.renders += 1
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict()
+        return path
+
+    def warm(self, texts):
+        """Render texts on a background thread"""
+        with self._lock:
+            self._schedule(texts)
+
+    def _schedule(self, texts):
+        # Caller holds self._lock
+        self._pending.extend(texts)
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = Thread(target=self._warm_loop, daemon=True)
+            self._worker.start()
+
+    def _warm_loop(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                text = self._pending.pop(0)
+            self.ensure(text)
+
+    def _forget(self, key):
+        size = self._entries.pop(key, 0)
+        self._total_bytes -= size
+
+    def _evict(self):
+        # Caller holds self._lock
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, _ = next(iter(self._entries.items()))
+            self._forget(key)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def record_first_audio(self, hit, seconds):
+        """Record time from dequeue to first audio for a hit or a live synthesis"""
+        with self._lock:
+            bucket = self._ttfa["hit" if hit else "miss"]
+            bucket[0] += 1
+            bucket[1] += seconds
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "renders": self.renders,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "pending": len(self._pending),
+                "tracked": len(self._spoken),
+                "avg_first_audio_hit": self._ttfa["hit"][1] / self._ttfa["hit"][0] if self._ttfa["hit"][0] else 0.0,
+                "avg_first_audio_miss": self._ttfa["miss"][1] / self._ttfa["miss"][0] if self._ttfa["miss"][0] else 0.0,
+            }
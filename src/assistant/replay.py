@@ -0,0 +1,154 @@
+"""Replay recorded commands through the command engine without a mic.
+
+Reads one command per line, or JSONL objects with a ``text`` field (plus
+optional ``id`` and ``expect``, the handler name it should resolve to),
+from a file or stdin. Browser, app, screenshot and weather actions are
+recorded instead of performed and TTS is the fake engine. Writes one
+JSON result per command to stdout and a summary to stderr. Run from
+``src``::
+
+    python -m assistant.replay transcripts.txt
+    cat transcripts.jsonl | python -m assistant.replay - --jobs 4 --out results.jsonl
+
+The exit code is 1 if any command errored or missed its expected handler.
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from assistant.bench import percentiles
+from assistant.core import VoiceAssistant
+
+REPLAY_CONFIG = {
+    "tts_engine": "fake",
+    "recognizer": "fake",
+    "phrase_cache_enabled": False,
+    "wake_word_enabled": False,
+    "side_effects": "record",
+    # Keep "open <app>" results the same on every machine
+    "app_catalog_enabled": False,
+    "file_index_enabled": False,
+    "conversation_log_enabled": False,
+    "system_sampler_enabled": False,
+}
+
+
+def read_commands(stream, fmt="auto"):
+    """Yield dicts with id, text and expect from lines or JSONL"""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if fmt == "jsonl" or (fmt == "auto" and line.startswith("{")):
+            record = json.loads(line)
+            text = record.get("text") or record.get("command") or record.get("transcript") or ""
+            yield {"id": record.get("id", number), "text": text, "expect": record.get("expect")}
+        else:
+            yield {"id": number, "text": line, "expect": None}
+
+
+class Replayer:
+    """Runs commands on a headless assistant and records what each one did"""
+
+    def __init__(self, config=None):
+        self.assistant = VoiceAssistant(dict(REPLAY_CONFIG, **(config or {})))
+        # Build the intent index up front so parallel workers don't race to do it
+        self.assistant.resolve_command("")
+
+    def run_one(self, entry):
+        effects = self.assistant.side_effects
+        effects.begin()
+        started = time.perf_counter()
+        name, replies, error = self.assistant.run_command(entry["text"])
+        elapsed = time.perf_counter() - started
+        result = {
+            "id": entry["id"],
+            "text": entry["text"],
+            "handler": name,
+            "replies": replies,
+            "side_effects": effects.collect(),
+            "ms": round(elapsed * 1000, 3),
+            "ok": error is None,
+        }
+        if error is not None:
+            result["error"] = error
+        if entry.get("expect") is not None:
+            result["expected"] = entry["expect"]
+            result["ok"] = result["ok"] and name == entry["expect"]
+        return result
+
+    def run(self, entries, jobs=1):
+        """Yield results in input order"""
+        if jobs <= 1:
+            for entry in entries:
+                yield self.run_one(entry)
+            return
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            yield from pool.map(self.run_one, entries)
+
+    def close(self):
+        self.assistant.shutdown()
+
+
+def summarize(results, elapsed):
+    by_handler = {}
+    for result in results:
+        by_handler.setdefault(result["handler"], []).append(result["ms"])
+    return {
+        "commands": len(results),
+        "failed": sum(1 for r in results if not r["ok"]),
+        "seconds": round(elapsed, 3),
+        "throughput_cps": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "handlers_ms": {name: percentiles(values) for name, values in sorted(by_handler.items())},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay commands through ZILNOVA's command engine")
+    parser.add_argument("input", nargs="?", default="-", help="command file, or - for stdin")
+    parser.add_argument("--format", choices=("auto", "lines", "jsonl"), default="auto")
+    parser.add_argument("--jobs", type=int, default=1, help="commands to run in parallel")
+    parser.add_argument("--out", help="write per-command results here instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="show the assistant's own output")
+    args = parser.parse_args(argv)
+
+    if args.input == "-":
+        entries = list(read_commands(sys.stdin, args.format))
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            entries = list(read_commands(f, args.format))
+
+    # Bound before stdout is redirected, so results still reach the real stdout
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    results = []
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with quiet:
+            replayer = Replayer()
+            started = time.perf_counter()
+            try:
+                for result in replayer.run(entries, args.jobs):
+                    results.append(result)
+                    out.write(json.dumps(result) + "\n")
+            finally:
+                elapsed = time.perf_counter() - started
+                replayer.close()
+    finally:
+        if args.out:
+            out.close()
+
+    summary = summarize(results, elapsed)
+    print(f"{summary['commands']} commands in {summary['seconds']} s "
+          f"({summary['throughput_cps']} commands/s), {summary['failed']} failed", file=sys.stderr)
+    for name, stats in summary["handlers_ms"].items():
+        print(f"  {name:<14} n={stats['count']:<5} p50 {stats['p50']:.3f} ms  p95 {stats['p95']:.3f} ms",
+              file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
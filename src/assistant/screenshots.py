@@ -0,0 +1,229 @@
+import datetime
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock, Thread, Event
+
+# Pillow save options per format; the level/quality knob maps onto these
+FORMATS = {
+    "png": ("PNG", "compress_level"),
+    "jpeg": ("JPEG", "quality"),
+    "webp": ("WEBP", "quality"),
+}
+DEFAULT_LEVELS = {"png": 6, "jpeg": 90, "webp": 85}
+
+NUMBER_WORDS = {"two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+                "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+
+
+class WindowNotFound(LookupError):
+    """No open window matches the requested title"""
+
+
+def _encode(raw, mode, size, path, fmt, level):
+    """Encode raw pixels and write them to path; runs in a pool process"""
+    from PIL import Image
+
+    started = time.perf_counter()
+    image = Image.frombytes(mode, size, raw)
+    pil_format, option = FORMATS[fmt]
+    if pil_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    tmp = path + ".tmp"
+    image.save(tmp, pil_format, **{option: level})
+    os.replace(tmp, path)
+    return path, time.perf_counter() - started, os.path.getsize(path)
+
+
+def parse_request(command):
+    """Pull count, interval, format and window out of a screenshot command.
+
+    'take 5 screenshots every 2 seconds as jpeg of the chrome window'
+    gives (5, 2.0, 'jpeg', 'chrome').
+    """
+    text = command.lower()
+    count = 1
+    match = re.search(r"(\d+|" + "|".join(NUMBER_WORDS) + r")\s+(?:screenshots|screen shots|shots)", text)
+    if match:
+        value = match.group(1)
+        count = int(value) if value.isdigit() else NUMBER_WORDS[value]
+    interval = 1.0
+    match = re.search(r"every\s+(\d+(?:\.\d+)?)\s*(?:seconds?|secs?|s)\b", text)
+    if match:
+        interval = float(match.group(1))
+    elif re.search(r"every\s+second\b", text):
+        interval = 1.0
+    fmt = "png"
+    for name, aliases in (("jpeg", ("jpeg", "jpg")), ("webp", ("webp",)), ("png", ("png",))):
+        if any(re.search(rf"\b{alias}\b", text) for alias in aliases):
+            fmt = name
+            break
+    window = None
+    text = re.sub(r"\s*\b(?:as|in) (?:a |an )?(?:png|jpe?g|webp)\b", "", text)
+    match = re.search(r"of (?:the )?(.+?) window\b", text) or re.search(r"\bwindow (?:called |named )?(.+)$", text)
+    if match:
+        window = match.group(1).strip()
+    return count, interval, fmt, window
+
+
+class ScreenshotService:
+    """Captures the screen into memory and encodes on a process pool.
+
+    Capturing is the only step on the caller's thread; PNG/JPEG/WebP
+    compression and the file write happen in a worker process so a slow
+    encode never delays the next command. ``on_saved(path, info)`` and
+    ``on_error(exc)`` are called from a pool callback thread.
+    """
+
+    def __init__(self, directory=os.path.join("~", "Desktop"), fmt="png", level=None,
+                 workers=1, on_saved=None, on_error=None):
+        self.directory = os.path.expanduser(directory)
+        self.fmt = fmt
+        self.level = level
+        self.workers = workers
+        self.on_saved = on_saved
+        self.on_error = on_error
+        self._pool = None
+        self._lock = Lock()
+        self._stop = Event()
+        self._captures = 0
+        self._capture_time = 0.0
+        self._last_capture = 0.0
+        self._encodes = 0
+        self._encode_time = 0.0
+        self._last_encode = 0.0
+        self._pending = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    @staticmethod
+    def window_region(title):
+        """Return (left, top, width, height) of the first window whose title contains title"""
+        try:
+            import pygetwindow
+        except ImportError:
+            raise WindowNotFound("Window capture needs pygetwindow")
+        for window in pygetwindow.getWindowsWithTitle(title):
+            if window.width > 0 and window.height > 0:
+                return window.left, window.top, window.width, window.height
+        raise WindowNotFound(title)
+
+    def grab(self, region=None):
+        """Capture into memory; returns the PIL image and the capture time"""
+        import pyautogui
+
+        started = time.perf_counter()
+        image = pyautogui.screenshot(region=region)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._captures += 1
+            self._capture_time += elapsed
+            self._last_capture = elapsed
+        return image, elapsed
+
+    def _path(self, fmt, index=None):
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = "" if index is None else f"_{index + 1:02d}"
+        extension = "jpg" if fmt == "jpeg" else fmt
+        return os.path.join(self.directory, f"screenshot_{timestamp}{suffix}.{extension}")
+
+    def take(self, region=None, window=None, fmt=None, level=None, index=None, on_saved=None):
+        """Capture now and queue the encode; returns (future, path, capture_seconds).
+
+        ``on_saved(path)`` runs once this screenshot has been written.
+        """
+        fmt = fmt or self.fmt
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported screenshot format: {fmt}")
+        level = level if level is not None else self.level
+        if level is None:
+            level = DEFAULT_LEVELS[fmt]
+        if window:
+            region = self.window_region(window)
+        image, capture_time = self.grab(region)
+        path = self._path(fmt, index)
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            self._pending += 1
+        future = self._get_pool().submit(_encode, image.tobytes(), image.mode, image.size,
+                                         path, fmt, level)
+        future.add_done_callback(lambda f: self._encoded(f, capture_time, on_saved))
+        return future, path, capture_time
+
+    def _encoded(self, future, capture_time, on_saved=None):
+        with self._lock:
+            self._pending -= 1
+        try:
+            path, encode_time, size = future.result()
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+            return
+        with self._lock:
+            self._encodes += 1
+            self._encode_time += encode_time
+            self._last_encode = encode_time
+        if self.on_saved:
+            self.on_saved(path, {"capture_s": capture_time, "encode_s": encode_time, "bytes": size})
+        if on_saved:
+            on_saved(path)
+
+    def burst(self, count, interval, region=None, window=None, fmt=None, level=None, on_done=None):
+        """Take count screenshots interval seconds apart on a background thread.
+
+        Captures follow a fixed schedule, so a slow capture doesn't push
+        the later ones back. ``on_done(paths)`` runs once all are encoded.
+        """
+        if window:
+            region = self.window_region(window)
+
+        def run():
+            futures = []
+            start = time.monotonic()
+            for index in range(count):
+                delay = start + index * interval - time.monotonic()
+                if delay > 0 and self._stop.wait(delay):
+                    break
+                try:
+                    futures.append(self.take(region, None, fmt, level, index)[0])
+                except Exception as e:
+                    if self.on_error:
+                        self.on_error(e)
+                    break
+            paths = []
+            for future in futures:
+                try:
+                    paths.append(future.result()[0])
+                except Exception:
+                    pass
+            if on_done:
+                on_done(paths)
+
+        thread = Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """Return capture and encode times in milliseconds"""
+        with self._lock:
+            return {
+                "captures": self._captures,
+                "avg_capture_ms": self._capture_time / self._captures * 1000 if self._captures else 0.0,
+                "last_capture_ms": self._last_capture * 1000,
+                "encodes": self._encodes,
+                "avg_encode_ms": self._encode_time / self._encodes * 1000 if self._encodes else 0.0,
+                "last_encode_ms": self._last_encode * 1000,
+                "pending": self._pending,
+            }
+
+    def close(self, wait=True):
+        self._stop.set()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
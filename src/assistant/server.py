@@ -0,0 +1,351 @@
+"""Headless multi-session ZILNOVA server.
+
+An asyncio HTTP/1.1 front end keeps per-session state and hands commands
+to a pool of worker processes, each hosting its own headless
+``VoiceAssistant``. Replies come back as text and, on request, as
+synthesized audio. Run from ``src``::
+
+    python -m assistant.server --port 8765 --workers 4
+    python -m assistant.server --unix /tmp/zilnova.sock
+
+Endpoints (JSON in and out unless noted):
+
+    POST   /sessions                 {"city": "Paris"} -> {"session": id}
+    DELETE /sessions/<id>
+    POST   /sessions/<id>/text       {"text": "what time is it", "audio": false}
+    POST   /sessions/<id>/audio      raw 16-bit WAV body; ?audio=1 for spoken replies
+    GET    /stats
+
+Commands with desktop side effects (opening apps, screenshots) are
+refused, since they would act on the server's own desktop.
+"""
+import argparse
+import asyncio
+import base64
+import collections
+import io
+import json
+import os
+import sys
+import time
+import uuid
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+# Handlers that act on the machine running the assistant
+DESKTOP_COMMANDS = ("open", "folder", "find_file", "screenshot")
+DESKTOP_REPLY = "That command isn't available when I'm running as a server."
+
+WORKER_CONFIG = {
+    "tts_engine": "pyttsx3",
+    "phrase_cache_enabled": False,
+    "system_sampler_enabled": False,
+    "wake_word_enabled": False,
+    "tracing_enabled": False,
+    "app_catalog_enabled": False,
+    "file_index_enabled": False,
+    "conversation_log_enabled": False,
+}
+
+STATUS_TEXT = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request",
+               404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+               429: "Too Many Requests", 500: "Internal Server Error"}
+
+# One headless assistant per worker process, created by _worker_init
+_assistant = None
+
+
+def _worker_init(config):
+    global _assistant
+    from assistant.core import VoiceAssistant
+
+    _assistant = VoiceAssistant(dict(WORKER_CONFIG, **config))
+
+
+def _worker_run(command, audio=False):
+    """Run one command; returns (name, replies, audio_b64, handler_s, synth_s)"""
+    started = time.perf_counter()
+    name, _ = _assistant.resolve_command(command.lower().strip())
+    if name in DESKTOP_COMMANDS:
+        replies = [DESKTOP_REPLY]
+    else:
+        name, replies, _ = _assistant.run_command(command)
+    handler_s = time.perf_counter() - started
+    encoded = None
+    if audio and replies:
+        started = time.perf_counter()
+        encoded = base64.b64encode(_assistant.render_audio(" ".join(replies))).decode("ascii")
+        return name, replies, encoded, handler_s, time.perf_counter() - started
+    return name, replies, encoded, handler_s, 0.0
+
+
+def _worker_recognize(pcm, sample_rate, sample_width):
+    """Transcribe raw PCM with the worker's recognizer backend"""
+    import speech_recognition as sr
+
+    text = _assistant.recognize(sr.AudioData(pcm, sample_rate, sample_width))
+    return text, _assistant.last_recognition.latency if _assistant.last_recognition else 0.0
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Session:
+    """Per-user state kept by the server between requests"""
+
+    def __init__(self, session_id, city=None, history=20):
+        self.id = session_id
+        self.city = city
+        self.created = time.time()
+        self.last_seen = time.monotonic()
+        self.requests = 0
+        self.history = collections.deque(maxlen=history)
+        # Commands from one session run in the order they arrive
+        self.lock = asyncio.Lock()
+
+    def describe(self):
+        return {"session": self.id, "city": self.city, "requests": self.requests,
+                "history": list(self.history)}
+
+
+class AssistantServer:
+    """Routes HTTP requests to sessions and the worker pool"""
+
+    def __init__(self, workers=None, config=None, max_sessions=1000, session_ttl=1800.0,
+                 max_body=5 * 1024 * 1024, max_pending=256):
+        self.workers = workers or os.cpu_count() or 1
+        self.config = config or {}
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.max_body = max_body
+        self.sessions = {}
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_worker_init,
+                                        initargs=(self.config,))
+        # Requests waiting on or running in the pool; beyond this we answer 429
+        self.max_pending = max_pending
+        self._pending = 0
+        self._latencies = collections.deque(maxlen=10000)
+        self._requests = 0
+        self._errors = 0
+        self._started = time.monotonic()
+
+    async def warm_up(self):
+        """Start every worker process so the first requests don't pay for it"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, time.sleep, 0.05)
+                               for _ in range(self.workers)))
+
+    async def _call(self, fn, *args):
+        if self._pending >= self.max_pending:
+            raise HttpError(429, "Server is busy")
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+        finally:
+            self._pending -= 1
+
+    def _expire_sessions(self):
+        cutoff = time.monotonic() - self.session_ttl
+        for session_id in [s.id for s in self.sessions.values() if s.last_seen < cutoff]:
+            del self.sessions[session_id]
+
+    def create_session(self, city=None):
+        self._expire_sessions()
+        if len(self.sessions) >= self.max_sessions:
+            raise HttpError(429, "Too many sessions")
+        session = Session(uuid.uuid4().hex, city)
+        self.sessions[session.id] = session
+        return session
+
+    def _session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HttpError(404, "Unknown session")
+        session.last_seen = time.monotonic()
+        return session
+
+    def _apply_context(self, session, command):
+        """Fill in per-session defaults the command leaves out"""
+        from assistant.weather import extract_city
+
+        if session.city and "weather" in command.lower() and extract_city(command, None) is None:
+            return f"{command} in {session.city}"
+        return command
+
+    async def handle_text(self, session, text, audio=False, extra_timings=None):
+        started = time.perf_counter()
+        async with session.lock:
+            command = self._apply_context(session, text)
+            name, replies, encoded, handler_s, synth_s = await self._call(_worker_run, command, audio)
+        session.requests += 1
+        session.history.append({"command": text, "handler": name, "replies": replies})
+        timings = dict(extra_timings or {})
+        timings.update({"handler_ms": round(handler_s * 1000, 3),
+                        "synthesis_ms": round(synth_s * 1000, 3),
+                        "total_ms": round((time.perf_counter() - started) * 1000, 3)})
+        result = {"session": session.id, "command": text, "handler": name,
+                  "replies": replies, "timings": timings}
+        if encoded is not None:
+            result["audio"] = encoded
+            result["audio_format"] = "wav"
+        return result
+
+    async def handle_audio(self, session, body, audio=False):
+        try:
+            with wave.open(io.BytesIO(body), "rb") as f:
+                if f.getnchannels() != 1:
+                    raise HttpError(400, "Audio must be mono")
+                rate, width = f.getframerate(), f.getsampwidth()
+                pcm = f.readframes(f.getnframes())
+        except (wave.Error, EOFError):
+            raise HttpError(400, "Body must be a WAV file")
+        text, recognize_s = await self._call(_worker_recognize, pcm, rate, width)
+        if not text:
+            return {"session": session.id, "command": "", "handler": None, "replies": [],
+                    "timings": {"recognize_ms": round(recognize_s * 1000, 3)}}
+        return await self.handle_text(session, text, audio,
+                                      {"recognize_ms": round(recognize_s * 1000, 3)})
+
+    async def route(self, method, path, query, body):
+        parts = [p for p in path.split("/") if p]
+        if parts == ["stats"] and method == "GET":
+            return 200, self.stats()
+        if parts == ["sessions"] and method == "POST":
+            options = json.loads(body) if body else {}
+            return 201, {"session": self.create_session(options.get("city")).id}
+        if len(parts) >= 2 and parts[0] == "sessions":
+            session = self._session(parts[1])
+            if len(parts) == 2:
+                if method == "GET":
+                    return 200, session.describe()
+                if method == "DELETE":
+                    del self.sessions[session.id]
+                    return 204, None
+            elif method == "POST" and parts[2] == "text":
+                request = json.loads(body or b"{}")
+                text = str(request.get("text", "")).strip()
+                if not text:
+                    raise HttpError(400, "Missing text")
+                return 200, await self.handle_text(session, text, bool(request.get("audio")))
+            elif method == "POST" and parts[2] == "audio":
+                wants_audio = query.get("audio", ["0"])[0] in ("1", "true")
+                return 200, await self.handle_audio(session, body, wants_audio)
+            raise HttpError(405, "Method not allowed")
+        raise HttpError(404, "Not found")
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until it closes"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0) or 0)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                started = time.perf_counter()
+                try:
+                    if length > self.max_body:
+                        raise HttpError(413, "Body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    url = urlsplit(target)
+                    status, payload = await self.route(method, url.path, parse_qs(url.query), body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except (ValueError, KeyError) as e:
+                    status, payload = 400, {"error": str(e)}
+                except Exception as e:
+                    print(f"Error handling request: {str(e)}")
+                    status, payload = 500, {"error": "Internal error"}
+                self._requests += 1
+                if status >= 400:
+                    self._errors += 1
+                else:
+                    self._latencies.append(time.perf_counter() - started)
+
+                data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+                head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                        f"Content-Type: application/json\r\n"
+                        f"Content-Length: {len(data)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+                writer.write(head.encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def stats(self):
+        from assistant.bench import percentiles
+
+        uptime = time.monotonic() - self._started
+        return {
+            "sessions": len(self.sessions),
+            "workers": self.workers,
+            "pending": self._pending,
+            "requests": self._requests,
+            "errors": self._errors,
+            "requests_per_s": round(self._requests / uptime, 2) if uptime else 0.0,
+            "latency_ms": percentiles([s * 1000 for s in self._latencies]),
+        }
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(host="127.0.0.1", port=8765, unix_path=None, workers=None, config=None):
+    server = AssistantServer(workers=workers, config=config)
+    await server.warm_up()
+    if unix_path:
+        listener = await asyncio.start_unix_server(server.handle_connection, path=unix_path)
+        where = unix_path
+    else:
+        listener = await asyncio.start_server(server.handle_connection, host, port)
+        where = f"http://{host}:{port}"
+    print(f"ZILNOVA server on {where} with {server.workers} workers")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless multi-session ZILNOVA server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--tts-engine", default="pyttsx3", help="'pyttsx3', or 'fake' for load tests")
+    parser.add_argument("--recognizer", default=None, help="recognizer backend for audio requests")
+    args = parser.parse_args(argv)
+
+    config = {"tts_engine": args.tts_engine}
+    if args.recognizer:
+        config["recognizer"] = args.recognizer
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, config))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import heapq
+import itertools
+import re
+import time
+from collections import deque
+from threading import Condition, Event
+
+# Lower numbers are spoken first
+PRIORITY_HIGH = 0     # errors and acknowledgements
+PRIORITY_NORMAL = 1   # regular answers
+PRIORITY_LOW = 2      # long monologues (intro, help) that may be preempted
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+_CLAUSE_BREAK = re.compile(r"(?<=[,;:])\s+")
+# Words whose period doesn't end a sentence, so "Dr. Smith" stays together
+_ABBREVIATIONS = frozenset(
+    "mr mrs ms dr prof sr jr st mt ave rd vs approx dept fig e.g i.e a.m p.m".split())
+
+
+def _ends_with_abbreviation(text):
+    words = text.rsplit(None, 1)
+    if not words or not words[-1].endswith("."):
+        return False
+    word = words[-1][:-1].lower()
+    # Single letters are initials, as in "J. R. R. Tolkien"
+    return word in _ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+
+def _sentences(text):
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        if "\n" not in match.group() and _ends_with_abbreviation(text[start:match.start()]):
+            continue
+        yield text[start:match.start()]
+        start = match.end()
+    yield text[start:]
+
+
+def split_segments(text, max_chars=120):
+    """Split text into sentences, and overlong sentences at clause breaks.
+
+    Each segment is synthesized separately so the first one can play while
+    the rest are rendered, and speech can be cut off between segments.
+    Periods after common abbreviations and initials don't end a sentence.
+    """
+    segments = []
+    for sentence in _sentences(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            segments.append(sentence)
+            continue
+        current = ""
+        for clause in _CLAUSE_BREAK.split(sentence):
+            if current and len(current) + 1 + len(clause) > max_chars:
+                segments.append(current)
+                current = clause
+            else:
+                current = f"{current} {clause}" if current else clause
+        if current:
+            segments.append(current)
+    return segments
+
+
+class SpeechItem:
+    """A single queued utterance"""
+    __slots__ = ("text", "priority", "enqueued_at", "started_at", "first_audio_at", "cancelled",
+                 "utterance_id")
+
+    def __init__(self, text, priority, enqueued_at, utterance_id=None):
+        self.text = text
+        self.priority = priority
+        self.enqueued_at = enqueued_at
+        self.utterance_id = utterance_id
+        self.started_at = None
+        self.first_audio_at = None
+        self.cancelled = False
+
+
+class SpeechJob:
+    """Work that has to run on the speech thread, such as rendering with the engine"""
+    __slots__ = ("fn", "args", "done", "result", "error")
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.result = self.fn(*self.args)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    def fail(self, error):
+        self.error = error
+        self.done.set()
+
+    def wait(self):
+        """Block until the job has run; returns its result or raises its error"""
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SpeechScheduler:
+    """Priority queue of pending utterances with a blocking dequeue.
+
+    Identical texts that are still waiting are coalesced into one item, and
+    pending items can be flushed so a new command can preempt old output.
+    Jobs from ``submit`` are handed out only when no speech is waiting.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._pending = {}
+        self._cond = Condition()
+        self._closed = False
+        self._jobs = deque()
+
+        self._enqueued = 0
+        self._dequeued = 0
+        self._coalesced = 0
+        self._flushed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+        self._finished = 0
+        self._interrupted = 0
+        self._segments = 0
+        self._total_first_audio = 0.0
+        self._max_first_audio = 0.0
+        self._last_first_audio = 0.0
+        self._total_speaking = 0.0
+
+    def put(self, text, priority=PRIORITY_NORMAL, utterance_id=None):
+        """Queue text for speaking; returns False if it was coalesced"""
+        with self._cond:
+            if self._closed:
+                return False
+            existing = self._pending.get(text)
+            if existing is not None:
+                self._coalesced += 1
+                if priority >= existing.priority:
+                    return False
+                # Re-queue at the higher priority, keeping the original wait start
+                existing.cancelled = True
+                item = SpeechItem(text, priority, existing.enqueued_at, existing.utterance_id)
+            else:
+                item = SpeechItem(text, priority, time.perf_counter(), utterance_id)
+                self._enqueued += 1
+            self._pending[text] = item
+            heapq.heappush(self._heap, (priority, next(self._counter), item))
+            self._cond.notify()
+            return True
+
+    def submit(self, job):
+        """Queue a SpeechJob for the consumer to run between utterances"""
+        with self._cond:
+            if self._closed:
+                job.fail(RuntimeError("speech queue is closed"))
+                return
+            self._jobs.append(job)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Block until an item or job is available; returns None on timeout or close"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                if self._heap:
+                    item = heapq.heappop(self._heap)[2]
+                    del self._pending[item.text]
+                    item.started_at = time.perf_counter()
+                    wait = item.started_at - item.enqueued_at
+                    self._dequeued += 1
+                    self._total_wait += wait
+                    self._last_wait = wait
+                    self._max_wait = max(self._max_wait, wait)
+                    return item
+                if self._jobs:
+                    return self._jobs.popleft()
+                if self._closed:
+                    return None
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+
+    def flush(self, min_priority=PRIORITY_HIGH):
+        """Drop pending items whose priority is min_priority or lower"""
+        with self._cond:
+            dropped = 0
+            for text, item in list(self._pending.items()):
+                if item.priority >= min_priority:
+                    item.cancelled = True
+                    del self._pending[text]
+                    dropped += 1
+            self._flushed += dropped
+            return dropped
+
+    def record_spoken(self, item, finished_at, segments=1):
+        """Account time-to-first-audio and speaking time for a finished item"""
+        if item.first_audio_at is None:
+            return
+        first_audio = item.first_audio_at - item.started_at
+        with self._cond:
+            self._finished += 1
+            self._interrupted += item.cancelled
+            self._segments += segments
+            self._total_first_audio += first_audio
+            self._max_first_audio = max(self._max_first_audio, first_audio)
+            self._last_first_audio = first_audio
+            self._total_speaking += finished_at - item.first_audio_at
+
+    def close(self):
+        """Wake any waiting consumer and refuse further items"""
+        with self._cond:
+            self._closed = True
+            while self._jobs:
+                self._jobs.popleft().fail(RuntimeError("speech queue is closed"))
+            self._cond.notify_all()
+
+    def qsize(self):
+        with self._cond:
+            return len(self._pending)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def stats(self):
+        """Return queue depth and wait-time statistics"""
+        with self._cond:
+            return {
+                "depth": len(self._pending),
+                "enqueued": self._enqueued,
+                "spoken": self._dequeued,
+                "coalesced": self._coalesced,
+                "flushed": self._flushed,
+                "avg_wait": self._total_wait / self._dequeued if self._dequeued else 0.0,
+                "max_wait": self._max_wait,
+                "last_wait": self._last_wait,
+                "interrupted": self._interrupted,
+                "segments": self._segments,
+                "avg_first_audio": self._total_first_audio / self._finished if self._finished else 0.0,
+                "max_first_audio": self._max_first_audio,
+                "last_first_audio": self._last_first_audio,
+                "avg_speaking": self._total_speaking / self._finished if self._finished else 0.0,
+            }
@@ -0,0 +1,104 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+# Budgets in milliseconds, measured from process start; exceeding one prints a warning
+DEFAULT_BUDGET_MS = {
+    "imports": 1500,
+    "time_to_window": 2000,
+    "engine_init": 2000,
+    "time_to_first_listen": 3500,
+}
+
+REPORT_PATH = os.path.join("~", ".zilnova", "startup.jsonl")
+
+
+class StartupProfiler:
+    """Records startup milestones and lazy import costs for one run.
+
+    Milestones are offsets from the moment this module was first imported,
+    which ``main.py`` does before anything heavy. Each milestone is kept
+    only the first time it is reached.
+    """
+
+    def __init__(self, budget_ms=None, report_path=REPORT_PATH):
+        self.origin = time.perf_counter()
+        self.budget_ms = dict(DEFAULT_BUDGET_MS if budget_ms is None else budget_ms)
+        self.report_path = report_path
+        self.marks = {}
+        self.durations = {}
+        self.expected = ()
+        self._lock = Lock()
+        self._reported = False
+
+    def expect(self, *names):
+        """Report automatically once all of these milestones are reached"""
+        self.expected = names
+
+    def mark(self, name):
+        """Record a milestone the first time it is reached"""
+        with self._lock:
+            if name in self.marks:
+                return
+            self.marks[name] = (time.perf_counter() - self.origin) * 1000
+            complete = self.expected and all(n in self.marks for n in self.expected)
+        if complete:
+            self.finish()
+
+    def has(self, name):
+        return name in self.marks
+
+    @contextmanager
+    def timed(self, name):
+        """Accumulate the duration of a block, e.g. a lazy import"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.durations[name] = self.durations.get(name, 0.0) + elapsed
+
+    def report(self):
+        """Return milestones, durations and any budget overruns"""
+        with self._lock:
+            marks = dict(self.marks)
+            durations = dict(self.durations)
+        over = {}
+        for name, budget in self.budget_ms.items():
+            value = marks.get(name, durations.get(name))
+            if value is not None and value > budget:
+                over[name] = round(value - budget, 1)
+        return {
+            "timestamp": time.time(),
+            "milestones_ms": {k: round(v, 1) for k, v in marks.items()},
+            "durations_ms": {k: round(v, 1) for k, v in durations.items()},
+            "over_budget_ms": over,
+        }
+
+    def finish(self):
+        """Print the report once and append it to the JSONL history"""
+        with self._lock:
+            if self._reported:
+                return None
+            self._reported = True
+        report = self.report()
+        summary = ", ".join(f"{k} {v:.0f} ms" for k, v in report["milestones_ms"].items())
+        print(f"Startup: {summary}")
+        for name, over in report["over_budget_ms"].items():
+            print(f"Startup budget exceeded: {name} by {over:.0f} ms")
+        if self.report_path:
+            try:
+                path = os.path.expanduser(self.report_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(report) + "\n")
+            except OSError as e:
+                print(f"Could not write startup report: {str(e)}")
+        return report
+
+
+# Shared by every module for the lifetime of the process
+profiler = StartupProfiler()
@@ -0,0 +1,188 @@
+import os
+import time
+from threading import Event, Lock, Thread
+
+import numpy as np
+
+# Scalar series kept besides the per-core CPU matrix
+SERIES = ("cpu", "memory", "disk", "disk_read", "disk_write", "net_sent", "net_recv")
+
+
+def default_disk_path():
+    """Root of the drive holding the home directory ('/' or e.g. 'C:\\')"""
+    drive, _ = os.path.splitdrive(os.path.expanduser("~"))
+    return drive + os.sep if drive else os.sep
+
+
+class SystemSampler:
+    """Background sampler of CPU, memory, disk and network usage.
+
+    Samples go into fixed-size NumPy ring buffers covering ``seconds`` of
+    history. CPU percentages come from psutil's counters since the previous
+    sample, so every value is a real average over the sampling interval.
+    Each sample's own CPU time is measured; when it would exceed
+    ``max_overhead`` of one core the interval is stretched to stay under it.
+    """
+
+    def __init__(self, interval=1.0, seconds=300.0, disk_path=None, max_overhead=0.01):
+        self.interval = interval
+        self.effective_interval = interval
+        self.size = max(2, int(seconds / interval))
+        self.disk_path = disk_path or default_disk_path()
+        self.max_overhead = max_overhead
+        self.cores = os.cpu_count() or 1
+        self.timestamps = np.zeros(self.size, dtype=np.float64)
+        self.per_core = np.zeros((self.size, self.cores), dtype=np.float32)
+        self.series = {name: np.zeros(self.size, dtype=np.float32) for name in SERIES}
+        self._written = 0
+        self._lock = Lock()
+        self._listeners = []
+        self._stop = Event()
+        self._thread = None
+        self._previous = None
+        self._sample_cost = 0.0
+        self._last_cost = 0.0
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def add_listener(self, callback):
+        """Call callback(sample_dict) after every sample, on the sampler thread"""
+        self._listeners.append(callback)
+
+    def _run(self):
+        import psutil
+
+        psutil.cpu_percent(percpu=True)  # the first call only primes the counters
+        self._previous = (time.monotonic(), psutil.disk_io_counters(), psutil.net_io_counters())
+        while not self._stop.wait(self.effective_interval):
+            started = time.thread_time()
+            try:
+                sample = self._sample(psutil)
+            except Exception as e:
+                print(f"Error sampling system metrics: {str(e)}")
+                continue
+            cost = time.thread_time() - started
+            self._last_cost = cost
+            self._sample_cost += cost
+            # Keep our own CPU use under the cap by sampling less often
+            self.effective_interval = max(self.interval, cost / self.max_overhead)
+            for callback in self._listeners:
+                try:
+                    callback(sample)
+                except Exception as e:
+                    print(f"Error in metrics listener: {str(e)}")
+
+    def _sample(self, psutil):
+        now = time.monotonic()
+        cores = psutil.cpu_percent(percpu=True)
+        memory = psutil.virtual_memory().percent
+        disk = psutil.disk_usage(self.disk_path).percent
+        disk_io = psutil.disk_io_counters()
+        net_io = psutil.net_io_counters()
+
+        then, previous_disk, previous_net = self._previous
+        elapsed = max(now - then, 1e-6)
+        self._previous = (now, disk_io, net_io)
+
+        def rate(current, previous, field):
+            if current is None or previous is None:
+                return 0.0
+            return max(0.0, (getattr(current, field) - getattr(previous, field)) / elapsed)
+
+        sample = {
+            "cpu": float(sum(cores) / len(cores)) if cores else 0.0,
+            "memory": memory,
+            "disk": disk,
+            "disk_read": rate(disk_io, previous_disk, "read_bytes"),
+            "disk_write": rate(disk_io, previous_disk, "write_bytes"),
+            "net_sent": rate(net_io, previous_net, "bytes_sent"),
+            "net_recv": rate(net_io, previous_net, "bytes_recv"),
+        }
+        with self._lock:
+            index = self._written % self.size
+            self.timestamps[index] = now
+            self.per_core[index, :len(cores)] = cores[:self.cores]
+            for name in SERIES:
+                self.series[name][index] = sample[name]
+            self._written += 1
+        sample["per_core"] = cores
+        return sample
+
+    def _window(self, seconds):
+        """Ring indices of the samples from the last ``seconds``, oldest first"""
+        count = min(self._written, self.size)
+        if count == 0:
+            return np.zeros(0, dtype=int)
+        end = self._written % self.size
+        indices = (np.arange(end - count, end)) % self.size
+        if seconds is not None:
+            cutoff = time.monotonic() - seconds
+            indices = indices[self.timestamps[indices] >= cutoff]
+        return indices
+
+    def history(self, name, points=None):
+        """Copy of a series, oldest first, optionally only the last ``points``"""
+        with self._lock:
+            indices = self._window(None)
+            if points is not None:
+                indices = indices[-points:]
+            return self.series[name][indices].copy()
+
+    def has_samples(self):
+        return self._written > 0
+
+    def summary(self, seconds=60.0):
+        """Current value, average and peak of every series over a rolling window"""
+        with self._lock:
+            indices = self._window(seconds)
+            if indices.size == 0:
+                return {}
+            latest = indices[-1]
+            result = {
+                name: {
+                    "current": float(values[latest]),
+                    "avg": float(values[indices].mean()),
+                    "peak": float(values[indices].max()),
+                }
+                for name, values in self.series.items()
+            }
+            result["per_core_avg"] = [round(float(v), 1) for v in self.per_core[indices].mean(axis=0)]
+            result["samples"] = int(indices.size)
+            result["window_s"] = seconds
+        return result
+
+    def stats(self):
+        """Return the sampler's own cost"""
+        samples = self._written
+        avg_cost = self._sample_cost / samples if samples else 0.0
+        return {
+            "samples": samples,
+            "avg_sample_ms": avg_cost * 1000,
+            "last_sample_ms": self._last_cost * 1000,
+            "overhead": avg_cost / self.effective_interval if samples else 0.0,
+            "interval": self.interval,
+            "effective_interval": self.effective_interval,
+        }
+
+
+def format_rate(value):
+    """Bytes per second as a short spoken string"""
+    for unit in ("bytes", "kilobytes", "megabytes"):
+        if value < 1024 or unit == "megabytes":
+            return f"{value:.0f} {unit}" if unit == "bytes" else f"{value:.1f} {unit}"
+        value /= 1024
@@ -0,0 +1,185 @@
+import itertools
+import json
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+from threading import Lock, Thread, Event, local
+
+# Histogram buckets in seconds for the Prometheus snapshot
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NoopSpan:
+    """Returned by a disabled tracer so instrumented code costs one call"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, utterance_id, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.utterance_id = utterance_id
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.start, time.perf_counter(),
+                           self.utterance_id, **self.attrs)
+        return False
+
+
+class Tracer:
+    """Timing spans for the voice pipeline, correlated by utterance ID.
+
+    Spans go to a rotating JSONL file and are aggregated into per-stage
+    histograms that can be exported as Prometheus text. The current
+    utterance is tracked per thread with ``bind``; work handed to another
+    thread carries the ID explicitly. When disabled, ``span`` returns a
+    shared no-op object and ``record`` returns immediately.
+    """
+
+    def __init__(self, enabled=False, path=None, max_bytes=5 * 1024 * 1024, backups=3,
+                 metrics_path=None, snapshot_interval=10.0):
+        self.enabled = enabled
+        self.path = os.path.expanduser(path) if path else None
+        self.metrics_path = os.path.expanduser(metrics_path) if metrics_path else None
+        self._ids = itertools.count(1)
+        self._session = f"{int(time.time()):x}"
+        self._local = local()
+        self._lock = Lock()
+        self._stats = {}
+        self._listeners = []
+        self._logger = None
+        self._stop = Event()
+        self._origin_wall = time.time() - time.perf_counter()
+
+        if enabled and self.path:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._logger = logging.getLogger(f"zilnova.trace.{id(self)}")
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            handler = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backups,
+                                          encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+        if enabled and self.metrics_path:
+            Thread(target=self._snapshot_loop, args=(snapshot_interval,), daemon=True).start()
+
+    def new_utterance(self):
+        """Allocate an utterance ID and bind it to the calling thread"""
+        utterance_id = f"{self._session}-{next(self._ids)}"
+        self.bind(utterance_id)
+        return utterance_id
+
+    def bind(self, utterance_id):
+        self._local.utterance_id = utterance_id
+
+    def current_utterance(self):
+        return getattr(self._local, "utterance_id", None)
+
+    def add_listener(self, callback):
+        """Call callback(span_dict) for every recorded span"""
+        self._listeners.append(callback)
+
+    def span(self, name, utterance_id=None, **attrs):
+        """Context manager timing a block"""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, utterance_id or self.current_utterance(), attrs)
+
+    def record(self, name, start, end, utterance_id=None, **attrs):
+        """Record a span measured elsewhere, from perf_counter timestamps"""
+        if not self.enabled:
+            return
+        duration = end - start
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {"count": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS)}
+            stats["count"] += 1
+            stats["sum"] += duration
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    stats["buckets"][i] += 1
+        span = {
+            "utterance": utterance_id or self.current_utterance(),
+            "span": name,
+            "start": round(self._origin_wall + start, 6),
+            "duration_ms": round(duration * 1000, 3),
+        }
+        if attrs:
+            span.update(attrs)
+        if self._logger is not None:
+            self._logger.info(json.dumps(span, default=str))
+        for callback in self._listeners:
+            try:
+                callback(span)
+            except Exception as e:
+                print(f"Error in trace listener: {str(e)}")
+
+    def prometheus_text(self):
+        """Render the per-stage histograms in Prometheus text format"""
+        lines = [
+            "# HELP zilnova_stage_seconds Duration of voice pipeline stages",
+            "# TYPE zilnova_stage_seconds histogram",
+        ]
+        with self._lock:
+            for name, stats in sorted(self._stats.items()):
+                for bound, count in zip(BUCKETS, stats["buckets"]):
+                    lines.append(f'zilnova_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+                lines.append(f'zilnova_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {stats["count"]}')
+                lines.append(f'zilnova_stage_seconds_sum{{stage="{name}"}} {stats["sum"]:.6f}')
+                lines.append(f'zilnova_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None):
+        """Atomically write the Prometheus snapshot"""
+        path = os.path.expanduser(path) if path else self.metrics_path
+        if not path:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def _snapshot_loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.write_prometheus()
+            except OSError as e:
+                print(f"Could not write metrics snapshot: {str(e)}")
+
+    def close(self):
+        self._stop.set()
+        if not self.enabled:
+            return
+        if self.metrics_path:
+            try:
+                self.write_prometheus()
+            except OSError as e:
+                print(f"Could not write metrics snapshot: {str(e)}")
+        if self._logger is not None:
+            for handler in list(self._logger.handlers):
+                handler.close()
+                self._logger.removeHandler(handler)
@@ -0,0 +1,394 @@
+"""Local "ZILNOVA" keyword spotting in front of the speech recognizer.
+
+Enrolled recordings of the wake phrase are kept as log-mel templates.
+Each captured utterance is matched against them with subsequence DTW
+over its first few seconds; only utterances that start with the wake
+phrase, or that follow a lone wake phrase closely, reach the recognizer.
+
+Enroll from ``src`` with a microphone, then measure false accepts and
+false rejects on fixtures (``*.wav`` with ``.txt`` transcripts; those
+starting with "zilnova" are positives)::
+
+    python -m assistant.wakeword --enroll 5
+    python -m assistant.wakeword --fixtures path/to/wavs
+
+Without ``--fixtures`` a synthetic tone-sequence set is used.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+
+WAKE_PHRASE = "zilnova"
+TEMPLATE_DIR = os.path.join("~", ".zilnova", "wakeword")
+
+FRAME_MS = 25
+HOP_MS = 10
+N_MELS = 24
+# Cosine distance used when fewer than two templates are enrolled
+DEFAULT_THRESHOLD = 0.35
+
+
+@lru_cache(maxsize=4)
+def _mel_filterbank(sample_rate, n_fft, n_mels, fmin=60.0):
+    def to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    edges = to_hz(np.linspace(to_mel(fmin), to_mel(sample_rate / 2), n_mels + 2))
+    bins = np.floor((n_fft + 1) * edges / sample_rate).astype(int)
+    bank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            bank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            bank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return bank
+
+
+def log_mel_features(pcm, sample_rate=16000, n_mels=N_MELS):
+    """Return (frames, n_mels) log-mel energies of 16-bit PCM bytes.
+
+    The per-frame mean is removed so the features ignore input gain.
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    win = int(sample_rate * FRAME_MS / 1000)
+    hop = int(sample_rate * HOP_MS / 1000)
+    if samples.size < win:
+        return np.zeros((0, n_mels), dtype=np.float32)
+    samples = np.append(samples[0], samples[1:] - 0.97 * samples[:-1])
+    frames = np.lib.stride_tricks.sliding_window_view(samples, win)[::hop] * np.hamming(win)
+    n_fft = 1 << (win - 1).bit_length()
+    power = np.abs(np.fft.rfft(frames, n_fft)) ** 2
+    mel = np.log(power @ _mel_filterbank(sample_rate, n_fft, n_mels).T + 1e-8)
+    return (mel - mel.mean(axis=1, keepdims=True)).astype(np.float32)
+
+
+def frame_rms(pcm, sample_rate=16000):
+    """RMS per hop, aligned with the feature frames"""
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    hop = int(sample_rate * HOP_MS / 1000)
+    usable = samples[:samples.size - samples.size % hop].reshape(-1, hop)
+    return np.sqrt(np.mean(usable * usable, axis=1)) if usable.size else np.zeros(0)
+
+
+def trim_silence(pcm, sample_rate=16000, floor_db=30.0):
+    """Cut leading and trailing audio more than floor_db below the loudest hop"""
+    rms = frame_rms(pcm, sample_rate)
+    if not rms.size or rms.max() <= 0:
+        return pcm
+    voiced = np.flatnonzero(rms > rms.max() * 10 ** (-floor_db / 20))
+    hop_bytes = int(sample_rate * HOP_MS / 1000) * 2
+    return pcm[voiced[0] * hop_bytes:(voiced[-1] + 1) * hop_bytes]
+
+
+def subsequence_dtw(template, query):
+    """Best match of the whole template inside query.
+
+    Returns (distance, end_frame); distance is the mean cosine distance
+    along the path. Every step advances one template frame and zero to two
+    query frames, so each row depends only on the previous one.
+    """
+    t = template / (np.linalg.norm(template, axis=1, keepdims=True) + 1e-8)
+    q = query / (np.linalg.norm(query, axis=1, keepdims=True) + 1e-8)
+    cost = 1.0 - t @ q.T
+    acc = cost[0].copy()  # free start anywhere in the query
+    inf = np.full(2, np.inf, dtype=acc.dtype)
+    for row in cost[1:]:
+        shifted = np.concatenate((inf, acc))
+        acc = row + np.minimum(np.minimum(shifted[2:], shifted[1:-1]), shifted[:-2])
+    end = int(np.argmin(acc))
+    return float(acc[end]) / len(template), end
+
+
+class WakeWordDetector:
+    """Template matcher for the wake phrase.
+
+    ``sensitivity`` runs from 0 (strict) to 1 (lenient) and scales the
+    distance threshold calibrated from the spread between templates.
+    """
+
+    def __init__(self, templates=(), sensitivity=0.5, sample_rate=16000, search_s=2.5):
+        self.templates = list(templates)
+        self.sample_rate = sample_rate
+        self.search_s = search_s
+        self.sensitivity = sensitivity
+        self.base_threshold = self._calibrate()
+
+    @property
+    def threshold(self):
+        return self.base_threshold * (0.6 + 0.8 * self.sensitivity)
+
+    def _calibrate(self):
+        if len(self.templates) < 2:
+            return DEFAULT_THRESHOLD
+        distances = []
+        for i, a in enumerate(self.templates):
+            for b in self.templates[i + 1:]:
+                distances.append(subsequence_dtw(a, b)[0] if len(a) <= len(b)
+                                 else subsequence_dtw(b, a)[0])
+        return float(np.mean(distances) * 1.5)
+
+    def enroll(self, pcm):
+        """Add a recording of the wake phrase alone"""
+        features = log_mel_features(trim_silence(pcm, self.sample_rate), self.sample_rate)
+        if len(features) < 10:
+            raise ValueError("Wake phrase recording is too short")
+        self.templates.append(features)
+        self.base_threshold = self._calibrate()
+
+    def save(self, directory=TEMPLATE_DIR):
+        directory = os.path.expanduser(directory)
+        os.makedirs(directory, exist_ok=True)
+        for old in glob.glob(os.path.join(directory, "template-*.npy")):
+            os.remove(old)
+        for index, features in enumerate(self.templates):
+            np.save(os.path.join(directory, f"template-{index:02d}.npy"), features)
+
+    @classmethod
+    def load(cls, directory=TEMPLATE_DIR, **kwargs):
+        paths = sorted(glob.glob(os.path.join(os.path.expanduser(directory), "template-*.npy")))
+        return cls([np.load(path) for path in paths], **kwargs)
+
+    def detect(self, pcm):
+        """Return (detected, distance, end_byte) for the start of an utterance"""
+        if not self.templates:
+            return False, float("inf"), 0
+        limit = int(self.sample_rate * self.search_s) * 2
+        query = log_mel_features(pcm[:limit], self.sample_rate)
+        best, best_end = float("inf"), 0
+        for template in self.templates:
+            # Too short to contain the phrase even when spoken quickly
+            if len(query) * 2 < len(template):
+                continue
+            distance, end = subsequence_dtw(template, query)
+            if distance < best:
+                best, best_end = distance, end
+        hop_bytes = int(self.sample_rate * HOP_MS / 1000) * 2
+        end_byte = min(len(pcm), (best_end + 1) * hop_bytes + int(self.sample_rate * FRAME_MS / 1000) * 2)
+        return best <= self.threshold, best, end_byte
+
+
+class WakeWordGate:
+    """Decides which captured utterances are sent to the recognizer.
+
+    An utterance that starts with the wake phrase is forwarded without it.
+    A lone wake phrase arms the gate, and the next utterance within
+    ``follow_up_s`` is forwarded whole.
+    """
+
+    def __init__(self, detector, follow_up_s=5.0, min_command_ms=250):
+        self.detector = detector
+        self.follow_up_s = follow_up_s
+        self.min_command_ms = min_command_ms
+        self.armed_until = 0.0
+
+        self.segments = 0
+        self.forwarded = 0
+        self.detections = 0
+        self.follow_ups = 0
+        self._detect_time = 0.0
+        self._last_distance = None
+
+    def _has_command(self, pcm, sample_rate):
+        """True if the audio after the wake phrase holds enough speech"""
+        rms = frame_rms(pcm, sample_rate)
+        if not rms.size:
+            return False
+        voiced = np.count_nonzero(rms > max(150.0, rms.max() * 0.1))
+        return voiced * HOP_MS >= self.min_command_ms
+
+    def process(self, audio):
+        """Return the sr.AudioData to recognize, or None to skip this utterance"""
+        self.segments += 1
+        now = time.monotonic()
+        if now < self.armed_until:
+            self.armed_until = 0.0
+            self.follow_ups += 1
+            self.forwarded += 1
+            return audio
+
+        pcm = audio.get_raw_data()
+        started = time.perf_counter()
+        detected, distance, end = self.detector.detect(pcm)
+        self._detect_time += time.perf_counter() - started
+        self._last_distance = distance
+        if not detected:
+            return None
+
+        self.detections += 1
+        rest = pcm[end:]
+        if self._has_command(rest, audio.sample_rate):
+            self.forwarded += 1
+            return type(audio)(rest, audio.sample_rate, audio.sample_width)
+        self.armed_until = now + self.follow_up_s
+        return None
+
+    def stats(self):
+        """Return detection counts and how many recognizer calls were avoided"""
+        checked = self.segments - self.follow_ups
+        return {
+            "segments": self.segments,
+            "detections": self.detections,
+            "follow_ups": self.follow_ups,
+            "forwarded": self.forwarded,
+            "recognizer_calls_saved": self.segments - self.forwarded,
+            "avg_detect_ms": self._detect_time / checked * 1000 if checked else 0.0,
+            "last_distance": self._last_distance,
+            "threshold": self.detector.threshold,
+        }
+
+
+def _tone_word(rng, formants, sample_rate, stretch=1.0, pitch=120.0):
+    """Voiced-vowel-like sequence: a harmonic buzz shaped by formant pairs"""
+    pieces = []
+    for f1, f2 in formants:
+        n = int(sample_rate * 0.12 * stretch * rng.uniform(0.9, 1.1))
+        t = np.arange(n) / sample_rate
+        wave_ = np.zeros(n)
+        for h in range(1, int(4000 / pitch)):
+            freq = h * pitch
+            gain = np.exp(-((freq - f1) / 120) ** 2) + 0.6 * np.exp(-((freq - f2) / 180) ** 2)
+            wave_ += gain * np.sin(2 * np.pi * freq * t)
+        pieces.append(wave_ * np.hanning(n))
+    return np.concatenate(pieces)
+
+
+# Stand-in formant tracks; only the relative shapes matter for the synthetic check
+_WAKE_FORMANTS = ((300, 2300), (280, 2250), (450, 1100), (650, 1250), (700, 1200))
+_OTHER_FORMANTS = ((700, 1200), (300, 870), (500, 1700), (400, 2000), (600, 1000), (350, 2400))
+
+
+def synthesize_fixtures(count=40, sample_rate=16000, seed=1):
+    """Return (pcm, is_positive) pairs plus enrollment clips"""
+    rng = np.random.default_rng(seed)
+
+    def word(formants):
+        stretch = rng.uniform(0.8, 1.25)
+        pitch = rng.uniform(100, 150)
+        return _tone_word(rng, formants, sample_rate, stretch, pitch)
+
+    def other_word():
+        picks = rng.choice(len(_OTHER_FORMANTS), size=rng.integers(2, 6))
+        return word([_OTHER_FORMANTS[i] for i in picks])
+
+    def render(parts):
+        gap = np.zeros(int(sample_rate * 0.08))
+        body = np.concatenate([np.concatenate((p, gap)) for p in parts])
+        body = body / (np.abs(body).max() + 1e-9) * rng.uniform(3000, 12000)
+        lead = np.zeros(int(sample_rate * 0.3))
+        audio = np.concatenate((lead, body, lead))
+        audio += rng.normal(0, 60, audio.size)
+        return np.clip(audio, -32768, 32767).astype(np.int16).tobytes()
+
+    enroll = [render([word(_WAKE_FORMANTS)]) for _ in range(3)]
+    fixtures = []
+    for index in range(count):
+        if index % 2 == 0:
+            parts = [word(_WAKE_FORMANTS)] + [other_word() for _ in range(rng.integers(0, 3))]
+            fixtures.append((render(parts), True))
+        else:
+            fixtures.append((render([other_word() for _ in range(rng.integers(1, 4))]), False))
+    return enroll, fixtures
+
+
+def evaluate(detector, fixtures, sensitivities=(0.2, 0.35, 0.5, 0.65, 0.8)):
+    """False-accept and false-reject rates for each sensitivity"""
+    scored = []
+    started = time.perf_counter()
+    for pcm, positive in fixtures:
+        scored.append((detector.detect(pcm)[1], positive))
+    detect_ms = (time.perf_counter() - started) / max(1, len(fixtures)) * 1000
+    positives = sum(1 for _, p in scored if p) or 1
+    negatives = sum(1 for _, p in scored if not p) or 1
+    rows = []
+    for sensitivity in sensitivities:
+        detector.sensitivity = sensitivity
+        threshold = detector.threshold
+        false_accepts = sum(1 for d, p in scored if not p and d <= threshold)
+        false_rejects = sum(1 for d, p in scored if p and d > threshold)
+        rows.append({
+            "sensitivity": sensitivity,
+            "threshold": round(threshold, 4),
+            "false_accept_rate": round(false_accepts / negatives, 3),
+            "false_reject_rate": round(false_rejects / positives, 3),
+            "recognizer_calls_saved": sum(1 for d, _ in scored if d > threshold),
+        })
+    return {"fixtures": len(fixtures), "avg_detect_ms": round(detect_ms, 3), "sweep": rows}
+
+
+def _load_fixture_dir(directory):
+    from assistant.bench import load_fixtures
+
+    fixtures = []
+    for name, rate, pcm, transcript in load_fixtures(directory):
+        if rate != 16000:
+            print(f"Skipping {name}: wake word fixtures must be 16 kHz")
+            continue
+        fixtures.append((pcm, transcript.lower().replace(" ", "").startswith(WAKE_PHRASE)))
+    return fixtures
+
+
+def _enroll(count, directory):
+    from assistant.capture import MicrophoneStream
+
+    detector = WakeWordDetector()
+    stream = MicrophoneStream()
+    stream.start()
+    try:
+        while len(detector.templates) < count:
+            print(f"Say '{WAKE_PHRASE.upper()}' ({len(detector.templates) + 1}/{count})")
+            audio = stream.get_segment(timeout=10)
+            if audio is None:
+                continue
+            try:
+                detector.enroll(audio.get_raw_data())
+            except ValueError as e:
+                print(str(e))
+    finally:
+        stream.stop()
+    detector.save(directory)
+    print(f"Saved {count} templates to {directory}, threshold {detector.threshold:.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ZILNOVA wake word enrollment and benchmark")
+    parser.add_argument("--enroll", type=int, metavar="N", help="record N wake phrase templates")
+    parser.add_argument("--templates", default=TEMPLATE_DIR, help="template directory")
+    parser.add_argument("--fixtures", help="directory of 16 kHz mono WAV files with .txt transcripts")
+    args = parser.parse_args(argv)
+
+    if args.enroll:
+        _enroll(args.enroll, args.templates)
+        return 0
+
+    if args.fixtures:
+        detector = WakeWordDetector.load(args.templates)
+        if not detector.templates:
+            print(f"No templates in {args.templates}; run with --enroll first")
+            return 2
+        fixtures = _load_fixture_dir(args.fixtures)
+    else:
+        enroll, fixtures = synthesize_fixtures()
+        detector = WakeWordDetector()
+        for pcm in enroll:
+            detector.enroll(pcm)
+
+    results = evaluate(detector, fixtures)
+    print(f"{len(fixtures)} fixtures, {results['avg_detect_ms']:.2f} ms per detection")
+    print(f"{'sensitivity':>11} {'threshold':>9} {'FA rate':>8} {'FR rate':>8} {'saved':>6}")
+    for row in results["sweep"]:
+        print(f"{row['sensitivity']:>11} {row['threshold']:>9.4f} {row['false_accept_rate']:>8.3f} "
+              f"{row['false_reject_rate']:>8.3f} {row['recognizer_calls_saved']:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
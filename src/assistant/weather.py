@@ -0,0 +1,210 @@
+import json
+import time
+from collections import OrderedDict
+from threading import Lock, Thread
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OPENWEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
+
+
+class CityNotFound(LookupError):
+    """The weather service has no data for the requested city"""
+
+
+def normalize_city(city):
+    """Cache key for a city name: lower case, single spaces"""
+    return " ".join(city.lower().split())
+
+
+def extract_city(command, default="London"):
+    """Pick the city out of a command like 'what's the weather in new york'"""
+    words = command.lower().replace("?", " ").split()
+    for marker in ("in", "at", "for"):
+        if marker in words:
+            index = len(words) - 1 - words[::-1].index(marker)
+            city = " ".join(w for w in words[index + 1:] if w not in ("today", "now", "please"))
+            if city:
+                return city
+    return default
+
+
+class WeatherService:
+    """OpenWeatherMap client with a pooled session and an LRU+TTL cache.
+
+    Entries younger than ``ttl`` are served from cache. Entries older than
+    that but within ``stale_ttl`` are still returned immediately while a
+    background refresh fetches a new copy (stale-while-revalidate).
+    """
+
+    def __init__(self, api_key, base_url=OPENWEATHER_URL, ttl=600.0, stale_ttl=3600.0,
+                 max_entries=128, connect_timeout=3.05, read_timeout=5.0, pool_size=4):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._cache = OrderedDict()
+        self._lock = Lock()
+        self._refreshing = set()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+
+    def _fetch(self, city):
+        params = {"q": city, "appid": self.api_key, "units": "metric"}
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        if response.status_code == 404:
+            raise CityNotFound(city)
+        response.raise_for_status()
+        data = response.json()
+        return {
+            "city": city,
+            "temp": data["main"]["temp"],
+            "humidity": data["main"]["humidity"],
+            "description": data["weather"][0]["description"],
+        }
+
+    def _store(self, key, report):
+        with self._lock:
+            self._cache[key] = (time.monotonic(), report)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _refresh(self, key, city):
+        try:
+            self._store(key, self._fetch(city))
+            self.stats["refreshes"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Weather refresh failed for {city}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, city):
+        """Return a weather report dict for city, using the cache when possible"""
+        key = normalize_city(city)
+        stale = None
+        refresh = False
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age <= self.ttl:
+                    self._cache.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                if age <= self.ttl + self.stale_ttl:
+                    self._cache.move_to_end(key)
+                    self.stats["stale_hits"] += 1
+                    stale = entry[1]
+                    refresh = key not in self._refreshing
+                    self._refreshing.add(key)
+            if stale is None:
+                self.stats["misses"] += 1
+        if stale is not None:
+            if refresh:
+                Thread(target=self._refresh, args=(key, city), daemon=True).start()
+            return stale
+        try:
+            report = self._fetch(city)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        self._store(key, report)
+        return report
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        self.session.close()
+
+
+class FakeWeatherServer:
+    """Local stand-in for the OpenWeatherMap endpoint, for offline benchmarks"""
+
+    def __init__(self, latency=0.05, port=0):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import urlparse, parse_qs
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                city = query.get("q", [""])[0]
+                server.requests += 1
+                time.sleep(server.latency)
+                if city.lower() == "nowhere":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = json.dumps({
+                    "name": city,
+                    "main": {"temp": 21.5, "humidity": 40},
+                    "weather": [{"description": "clear sky"}],
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.latency = latency
+        self.requests = 0
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/data/2.5/weather"
+        self._thread = Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _benchmark(rounds=50):
+    """Measure miss, hit and stale-hit latency against the local fake server"""
+    with FakeWeatherServer(latency=0.05) as server:
+        service = WeatherService("test-key", base_url=server.url, ttl=60, stale_ttl=60)
+
+        def timed(city):
+            start = time.perf_counter()
+            service.get(city)
+            return (time.perf_counter() - start) * 1000
+
+        misses = [timed(f"city {i}") for i in range(rounds)]
+        hits = [timed(f"City {i}") for i in range(rounds)]
+        # Expire everything so each lookup serves stale data and refreshes
+        service.ttl = 0
+        stale = [timed(f"city {i}") for i in range(rounds)]
+        time.sleep(server.latency * 4)
+        service.close()
+
+    def describe(samples):
+        samples = sorted(samples)
+        return f"p50 {samples[len(samples) // 2]:.3f} ms  max {samples[-1]:.3f} ms"
+
+    print(f"miss:      {describe(misses)}")
+    print(f"hit:       {describe(hits)}")
+    print(f"stale hit: {describe(stale)}")
+    print(f"stats: {service.stats}  server requests: {server.requests}")
+
+
+if __name__ == "__main__":
+    _benchmark()
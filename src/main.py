@@ -1,3 +1,5 @@
+from assistant.startup import profiler  # first, so startup timing covers the imports below
+import os
 import sys
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QTimer
@@ -5,13 +7,24 @@ from assistant.core import VoiceAssistant
 from assistant.gui import AssistantGUI
 from threading import Thread, Event
 import queue
-import time
+
+profiler.mark("imports")
+profiler.expect("time_to_window", "engine_ready", "time_to_first_listen")
+
+STARTUP_GREETING = "Hello! I am ZILNOVA, your personal AI assistant. Starting up..."
+LISTENING_PROMPT = "I'm listening. How can I help you?"
+PAUSED_PROMPT = "Voice recognition paused. Click 'Start Listening' when you need me!"
+GOODBYE = "Goodbye! ZILNOVA powering down."
+RECOGNITION_ERROR = "I encountered an error with voice recognition. Please try again."
 
 class AssistantController:
     def __init__(self):
         self.app = QApplication(sys.argv)
         self.gui = AssistantGUI()
-        self.assistant = VoiceAssistant()
+        # Indexing the user's folders and keeping a searchable log of what they
+        # said are for the desktop app, not every VoiceAssistant
+        self.assistant = VoiceAssistant({"file_index_enabled": True,
+                                         "conversation_log_enabled": True})
         self.command_queue = queue.Queue()
         self.is_listening = False
         self.stop_event = Event()
@@ -20,26 +33,55 @@ class AssistantController:
         self.gui.start_listening.connect(self.start_listening)
         self.gui.stop_listening.connect(self.stop_listening)
 
+        # Live stage timings when tracing is on and the overlay is requested
+        if self.assistant.tracer.enabled and os.environ.get("ZILNOVA_TRACE_OVERLAY") == "1":
+            self.gui.enable_trace_overlay()
+            self.assistant.tracer.add_listener(
+                lambda span: self.gui.bridge.call(self.gui.show_trace, span))
+
+        # Live system metrics under the waveform when requested
+        if os.environ.get("ZILNOVA_DASHBOARD") == "1":
+            self.gui.enable_dashboard(self.assistant.system_sampler)
+
+        # Search box over every past session's commands and replies
+        if self.assistant.conversation_log is not None:
+            self.gui.enable_history_search(self.assistant.conversation_log)
+
+        # Feed the waveform from real microphone levels
+        self.gui.waveform.setLevelSource(self.assistant.level_meter)
+        # Animate the robot only while speaking or hearing speech
+        self.gui.robot.setActivitySource(self.assistant.is_active)
+
         # Set up GUI callback for speech
-        self.assistant.set_gui_callback(self.gui.add_to_history)
+        # Speech runs on its own thread, so route it through the bridge
+        self.assistant.set_gui_callback(self.gui.bridge.add_to_history)
 
         # Initial greeting
-        self.assistant.speak("Hello! I am ZILNOVA, your personal AI assistant. Starting up...")
+        self.assistant.speak(STARTUP_GREETING)
+
+        # Pre-render fixed responses in the background
+        self.assistant.warm_phrase_cache(
+            extra=[LISTENING_PROMPT, PAUSED_PROMPT, GOODBYE, RECOGNITION_ERROR])
 
     def start_listening(self):
         if not self.is_listening:
             self.is_listening = True
             self.stop_event.clear()
             self.gui.update_status("Listening...")
+            self.gui.set_listening(True)
+            self.assistant.start_capture()
             Thread(target=self.listening_thread, daemon=True).start()
-            QTimer.singleShot(500, lambda: self.assistant.speak("I'm listening. How can I help you?"))
+            QTimer.singleShot(500, lambda: self.assistant.speak(LISTENING_PROMPT))
 
     def stop_listening(self):
         if self.is_listening:
             self.is_listening = False
             self.stop_event.set()
+            self.assistant.stop_capture()
+            # Same teardown as the stop button, so the frame clock goes idle
+            self.gui.set_listening(False)
             self.gui.update_status("Ready")
-            QTimer.singleShot(500, lambda: self.assistant.speak("Voice recognition paused. Click 'Start Listening' when you need me!"))
+            QTimer.singleShot(500, lambda: self.assistant.speak(PAUSED_PROMPT))
 
     def listening_thread(self):
         consecutive_empty = 0
@@ -47,41 +89,43 @@ class AssistantController:
         
         while self.is_listening and not self.stop_event.is_set():
             try:
-                command = self.assistant.listen()
+                if self.assistant.wake_gate is not None:
+                    # Waiting for the wake word; silence and other speech never
+                    # reach the recognizer, so they don't count as empty results
+                    audio = self.assistant.gate_utterance(self.assistant.next_utterance(timeout=5))
+                    if audio is None:
+                        continue
+                    command = self.assistant.recognize(audio)
+                else:
+                    # Recognized from the persistent microphone stream as it is spoken
+                    command = self.assistant.listen(timeout=5)
                 
                 if not command:
                     consecutive_empty += 1
                     if consecutive_empty >= max_empty:
-                        self.stop_listening()
+                        self.gui.bridge.call(self.stop_listening)
                         break
                     continue
                 
                 consecutive_empty = 0  # Reset counter on valid command
                 
                 if self.is_listening:
-                    self.gui.add_to_history(command, is_user=True)
+                    self.gui.bridge.add_to_history(command, is_user=True)
                     
                     # Check for exit commands
                     if any(word in command.lower() for word in ["exit", "quit", "bye", "goodbye"]):
-                        self.stop_listening()
-                        self.assistant.speak("Goodbye! ZILNOVA powering down.")
-                        self.cleanup()
+                        self.gui.bridge.call(self.stop_listening)
+                        self.assistant.speak(GOODBYE)
+                        self.gui.bridge.call(self.cleanup)
                         break
                     
-                    # Process the command
-                    try:
-                        self.assistant.process_command(command)
-                    except Exception as e:
-                        print(f"Error processing command: {str(e)}")
-                        self.assistant.speak("I'm sorry, I encountered an error processing that command.")
-                    
-                    # Small delay to prevent rapid-fire processing
-                    time.sleep(0.5)
+                    # Hand the command to the worker pool and keep listening
+                    self.assistant.dispatch_command(command)
                     
             except Exception as e:
                 print(f"Error in listening thread: {str(e)}")
-                self.stop_listening()
-                QTimer.singleShot(500, lambda: self.assistant.speak("I encountered an error with voice recognition. Please try again."))
+                self.gui.bridge.call(self.stop_listening)
+                self.gui.bridge.call(QTimer.singleShot, 500, lambda: self.assistant.speak(RECOGNITION_ERROR))
                 break
 
     def cleanup(self):
@@ -91,6 +135,8 @@ class AssistantController:
 
     def run(self):
         self.gui.show()
+        # Fires once the first batch of events, including the first paint, is handled
+        QTimer.singleShot(0, lambda: profiler.mark("time_to_window"))
         # Start listening automatically after 1 second
         QTimer.singleShot(1000, self.start_listening)
         return self.app.exec()